@@ -0,0 +1,56 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from vis_escape.constants import ASSETS_DIR  # noqa: E402
+from vis_escape.experiment.agent import utils  # noqa: E402
+
+
+def room_names():
+    rooms = [
+        name
+        for name in os.listdir(ASSETS_DIR)
+        if os.path.exists(os.path.join(ASSETS_DIR, name, "config.py"))
+    ]
+    return sorted(rooms, key=lambda name: int(name.replace("room", "")))
+
+
+def load_room(room_name):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return utils.load_game_state_from_config(
+            os.path.join(ASSETS_DIR, room_name, "config.py")
+        )
+
+
+def oracle_actions(room_name):
+    oracle_path = os.path.join(ASSETS_DIR, room_name, "walkthrough_oracle.json")
+    with open(oracle_path, "r") as f:
+        return [turn["chosen_action"] for turn in json.load(f)]
+
+
+def replay(game_state, actions):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for action in actions:
+            game_state.handle_action(action)
+    return game_state
+
+
+def best_of(fn, repeat=5):
+    """Return the best wall-clock time in seconds over `repeat` calls of fn."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
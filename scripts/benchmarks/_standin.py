@@ -0,0 +1,324 @@
+"""A local stand-in for an OpenAI-compatible chat completions server.
+
+It decodes every image of a request the way a vLLM server would (inline
+base64 data URLs, or file:// URLs under --allowed-local-media-path), waits
+a fixed delay in place of generation, and answers with a fixed reply. Used
+by the inference benchmarks in this directory.
+"""
+
+import ast
+import base64
+import collections
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+from PIL import Image
+
+_ACTIONS = re.compile(r"following actions:\s*(\[.*\])")
+
+
+def _tokens(text):
+    return [token for token in re.split(r"(?<=\s)", text) if token]
+
+
+def action_reply(body):
+    """Reply choosing a random action from the agent prompt's action list"""
+    match = _ACTIONS.search(_prompt_text(body))
+    actions = ast.literal_eval(match.group(1)) if match else ["look around"]
+    return f"[THINK]Let me try something new.\n[ACTION]{random.choice(actions)}"
+
+
+def _prompt_text(body):
+    content = body["messages"][-1]["content"]
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content)
+    return content
+
+
+class _Server(ThreadingHTTPServer):
+    # clients open many connections at once; the default backlog of 5
+    # would reset some of them
+    request_queue_size = 256
+
+
+class StandInServer:
+    """Serve /v1/chat/completions on 127.0.0.1 in a background thread.
+
+    delay: seconds spent per request in place of generation
+    allowed_local_media_path: directory file:// image URLs may point into
+        (None rejects file:// URLs with a 400, like vLLM does by default)
+    reply: content of every answer, or a function of the request body
+        returning it (e.g. action_reply)
+    error_rate: fraction of requests failed with error_status instead
+    retry_after: Retry-After seconds sent with those errors (None omits it)
+    rpm: requests per minute answered; requests over it get a 429, like a
+        rate-limited provider (None is unlimited)
+    rpm_window: seconds of the sliding window rpm is enforced over, with a
+        proportional quota (providers enforce limits over windows shorter
+        than a minute, too)
+    max_concurrency: requests generated at once, like the batch slots of
+        a GPU server; the rest queue (None is unlimited)
+    token_delay: seconds per token of the reply (a whitespace-separated
+        piece) after the delay; requests with "stream": true get the reply
+        token by token as server-sent events, and their generation stops
+        when the client closes the stream
+    slow_rate: fraction of requests that take slow_delay seconds instead of
+        delay, the stragglers of a loaded server
+    """
+
+    def __init__(
+        self,
+        delay=0.0,
+        allowed_local_media_path=None,
+        reply="look around",
+        error_rate=0.0,
+        error_status=429,
+        retry_after=None,
+        rpm=None,
+        rpm_window=60.0,
+        max_concurrency=None,
+        slow_rate=0.0,
+        slow_delay=0.0,
+        token_delay=0.0,
+        seed=0,
+    ):
+        self.delay = delay
+        self.token_delay = token_delay
+        self.tokens = 0
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.slow = 0
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.errors = 0
+        self.rpm = rpm
+        self.rpm_window = rpm_window
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.rate_limited = 0
+        self._answered = collections.deque()
+        self._rng = random.Random(seed)
+        self.allowed_local_media_path = (
+            os.path.realpath(allowed_local_media_path) if allowed_local_media_path else None
+        )
+        self.reply = reply
+        self.requests = 0
+        self.request_bytes = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _over_rpm(self):
+        # sliding window of answered requests
+        if self.rpm is None:
+            return False
+        now = time.monotonic()
+        while self._answered and self._answered[0] <= now - self.rpm_window:
+            self._answered.popleft()
+        if len(self._answered) >= self.rpm * self.rpm_window / 60:
+            return True
+        self._answered.append(now)
+        return False
+
+    def load_image(self, url):
+        if url.startswith("data:"):
+            return Image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1])))
+        if url.startswith("file://"):
+            path = os.path.realpath(unquote(urlparse(url).path))
+            if self.allowed_local_media_path is None or not path.startswith(
+                self.allowed_local_media_path + os.sep
+            ):
+                raise ValueError("Cannot load local files without --allowed-local-media-path")
+            return Image.open(path)
+        raise ValueError(f"Unsupported image url {url[:32]}")
+
+    def prepare(self, body):
+        """Decode the request's images; returns the reply and its image count"""
+        images = 0
+        for message in body["messages"]:
+            content = message["content"]
+            for part in content if isinstance(content, list) else ():
+                if part.get("type") == "image_url":
+                    self.load_image(part["image_url"]["url"]).convert("RGB").load()
+                    images += 1
+        reply = self.reply(body) if callable(self.reply) else self.reply
+        return reply, images
+
+    def _usage(self, reply, images):
+        prompt_tokens = 10 + 256 * images
+        completion_tokens = len(_tokens(reply))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def complete(self, body, delay=None):
+        reply, images = self.prepare(body)
+        tokens = len(_tokens(reply))
+        with self._slots or contextlib.nullcontext():
+            time.sleep((self.delay if delay is None else delay) + tokens * self.token_delay)
+        with self._lock:
+            self.tokens += tokens
+        return {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": self._usage(reply, images),
+        }
+
+    def stream(self, body, reply, images, delay, write):
+        """Generate the prepared reply of a streamed request token by token,
+        handing every server-sent event to write(); stops when write()
+        fails, i.e. the client went away"""
+
+        def event(delta, finish_reason=None, usage=None):
+            chunk = {
+                "id": "chatcmpl-standin",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if usage:
+                chunk["usage"] = usage
+            write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        with self._slots or contextlib.nullcontext():
+            time.sleep(self.delay if delay is None else delay)
+            event({"role": "assistant", "content": ""})
+            for token in _tokens(reply):
+                time.sleep(self.token_delay)
+                with self._lock:
+                    self.tokens += 1
+                event({"content": token})
+        event({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event({}, usage=self._usage(reply, images))
+        write(b"data: [DONE]\n\n")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers["Content-Length"]))
+                with server._lock:
+                    server.requests += 1
+                    server.request_bytes += len(raw)
+                    failed = server._rng.random() < server.error_rate
+                    server.errors += failed
+                    limited = not failed and server._over_rpm()
+                    server.rate_limited += limited
+                    slow = server.slow_rate > 0 and server._rng.random() < server.slow_rate
+                    server.slow += slow
+                headers = {}
+                if limited:
+                    status = 429
+                    answer = {"error": {"message": "Rate limit reached", "type": "requests"}}
+                elif failed:
+                    status = server.error_status
+                    answer = {"error": {"message": f"stand-in error {status}", "type": "StandInError"}}
+                    if server.retry_after is not None:
+                        headers["Retry-After"] = f"{server.retry_after:g}"
+                else:
+                    try:
+                        body = json.loads(raw)
+                        if body.get("stream"):
+                            return self._stream(body, server.slow_delay if slow else None)
+                        status, answer = 200, server.complete(body, server.slow_delay if slow else None)
+                    except ValueError as e:
+                        status, answer = 400, {"error": {"message": str(e), "type": "BadRequestError"}}
+                data = json.dumps(answer).encode()
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client cancelled the request
+
+            def _stream(self, body, delay):
+                # fails with ValueError, like complete(), before answering
+                reply, images = server.prepare(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def write(data):
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+
+                try:
+                    server.stream(body, reply, images, delay, write)
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # the client closed the stream
+
+        return Handler
+
+
+def _serve(queue, kwargs):
+    server = StandInServer(**kwargs)
+    queue.put(server.base_url)
+    server._server.serve_forever()
+
+
+@contextlib.contextmanager
+def standin_process(**kwargs):
+    """Run a StandInServer in a child process, so its work does not share
+    the client's interpreter; yields the server's base_url"""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(queue, kwargs), daemon=True)
+    process.start()
+    try:
+        yield queue.get(timeout=30)
+    finally:
+        process.terminate()
+        process.join()
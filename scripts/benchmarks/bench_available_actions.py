@@ -0,0 +1,50 @@
+"""Cost of GameState.get_available_actions() and of the membership check in
+handle_action, cached versus rebuilt from scratch, at every step of each
+room's walkthrough_oracle.json.
+
+Usage:
+    python scripts/benchmarks/bench_available_actions.py [--repeat 200]
+"""
+
+import argparse
+import contextlib
+import io
+
+from _common import best_of, load_room, oracle_actions, room_names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'room':<8}{'rebuild us':>12}{'cached us':>11}"
+        f"{'list in us':>12}{'set in us':>11}"
+    )
+    for room_name in room_names():
+        game_state = load_room(room_name)
+        rebuild_time = cached_time = list_time = set_time = 0.0
+        actions = oracle_actions(room_name)
+        for action in actions:
+            rebuild_time += best_of(game_state._build_available_actions, args.repeat)
+            cached_time += best_of(game_state.get_available_actions, args.repeat)
+            list_time += best_of(
+                lambda: action in game_state._build_available_actions(), args.repeat
+            )
+            set_time += best_of(
+                lambda: action in game_state._get_cached_actions()[1], args.repeat
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                game_state.handle_action(action)
+
+        steps = len(actions)
+        print(
+            f"{room_name:<8}{rebuild_time / steps * 1e6:>12.2f}"
+            f"{cached_time / steps * 1e6:>11.2f}"
+            f"{list_time / steps * 1e6:>12.2f}{set_time / steps * 1e6:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
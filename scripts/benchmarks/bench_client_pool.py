@@ -0,0 +1,80 @@
+"""Connection setup cost of a full caption pass (every observation image of
+the rooms captioned once) with a new OpenAI client per image, as captioning
+did before, versus the process-wide client pool, against a local stand-in
+vLLM server that answers immediately.
+
+Usage:
+    python scripts/benchmarks/bench_client_pool.py [--rooms room1] [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from _common import room_names
+from _standin import StandInServer
+from openai import OpenAI
+
+from vis_escape.config.models import get_image_profile
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.llm.clients import close_clients
+from vis_escape.llm.image_cache import image_url
+from vis_escape.utils import run_inference_vision_caption
+
+MODEL = "stand-in"
+PROMPT = "Describe the image."
+
+
+def caption_new_client(path, base_url):
+    # what run_inference_vision_caption did for every image
+    client = OpenAI(api_key="EMPTY", base_url=base_url)
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT},
+                {"type": "image_url", "image_url": image_url(path, get_image_profile(MODEL))},
+            ],
+        }
+    ]
+    response = client.chat.completions.create(model=MODEL, messages=messages, temperature=0.0)
+    return response.choices[0].message.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", nargs="*", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = [
+        path
+        for room_name in args.rooms or room_names()
+        for path in sorted(glob.glob(os.path.join(ASSETS_DIR, room_name, "image", "*", "*", "*.png")))
+    ]
+    for path in paths:
+        image_url(path, get_image_profile(MODEL))  # warm the image cache
+
+    passes = {
+        "client per image": caption_new_client,
+        "pooled client": lambda path, base_url: run_inference_vision_caption(path, PROMPT, MODEL, base_url),
+    }
+    print(f"caption pass over {len(paths)} images")
+    print(f"{'clients':<18}{'wall s':>8}{'ms/image':>10}{'connections':>13}")
+    with StandInServer(reply="A caption.") as server:
+        for name, caption in passes.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                close_clients()
+                connections = server.connections
+                start = time.perf_counter()
+                for path in paths:
+                    caption(path, server.base_url)
+                best = min(best, time.perf_counter() - start)
+                connections = server.connections - connections
+            print(f"{name:<18}{best:>8.2f}{best / len(paths) * 1e3:>10.2f}{connections:>13}")
+
+
+if __name__ == "__main__":
+    main()
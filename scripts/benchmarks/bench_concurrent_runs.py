@@ -0,0 +1,65 @@
+"""Wall-clock of a batch of BaseAgent experiments played one at a time versus
+concurrently from one process by the batch runner, against a local stand-in
+vLLM server that spends --delay seconds per request.
+
+Usage:
+    python scripts/benchmarks/bench_concurrent_runs.py [--room room1]
+        [--experiments 16] [--max-steps 10] [--delay 0.2] [--concurrency 1 4 16]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from _standin import action_reply, standin_process
+from openai import OpenAI
+
+from vis_escape.experiment.agent.baseagent.experiment_runner import AIExperimentRunner
+from vis_escape.experiment.agent.batch_runner import run_experiments
+from vis_escape.game.env.escape_env import EscapeEnv
+
+MODEL = "stand-in"
+# the agents also build clients for the OpenAI models of endpoints.yaml
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+
+def make_runners(room_name, base_url, count):
+    model_mapping = {"caption": MODEL, "actor": MODEL, "feedback": MODEL, "memory": MODEL}
+    runners = []
+    for _ in range(count):
+        runner = AIExperimentRunner(room_name, model_mapping, "vlm", "no_hint", env=EscapeEnv(room_name))
+        runner.ai_player.clients = {MODEL: OpenAI(api_key="EMPTY", base_url=base_url)}
+        runner.save_run_history = lambda **kwargs: None
+        runners.append(runner)
+    return runners
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--room", default="room1")
+    parser.add_argument("--experiments", type=int, default=16)
+    parser.add_argument("--max-steps", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.2, help="stand-in seconds per request")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    requests = args.experiments * args.max_steps
+    print(f"{args.experiments} experiments x {args.max_steps} steps, {args.delay * 1e3:g}ms per request")
+    print(f"{'concurrency':<13}{'wall s':>8}{'requests/s':>12}{'speedup':>9}")
+    with standin_process(delay=args.delay, reply=action_reply) as base_url:
+        baseline = None
+        for concurrency in args.concurrency:
+            runners = make_runners(args.room, base_url, args.experiments)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = run_experiments(runners, args.max_steps, concurrency=concurrency)
+            wall = time.perf_counter() - start
+            assert all(result["reason"] in ("success", "max_steps_exceeded") for result in results)
+            baseline = baseline or wall
+            print(f"{concurrency:<13}{wall:>8.2f}{requests / wall:>12.1f}{baseline / wall:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Cost of starting an episode: reloading config.py and building a
+ViewManager (what every runner used to do) versus EscapeEnv.reset() on a
+warm env.
+
+Usage:
+    python scripts/benchmarks/bench_env_reset.py [--repeat 20]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+
+from _common import best_of, room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.env.escape_env import EscapeEnv
+from vis_escape.game.manage.room_definition import RoomDefinition
+from vis_escape.game.manage.view_manager import ViewManager
+
+
+def cold_start(room_name):
+    room_dir = os.path.join(ASSETS_DIR, room_name)
+    game_state = RoomDefinition.from_config(os.path.join(room_dir, "config.py")).new_game()
+    view_manager = ViewManager(room_dir, "", game_state, play_mode="human")
+    return view_manager.get_current_view_image(game_state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'cold ms':>10}{'reset us':>10}{'gain':>9}")
+    for room_name in room_names():
+        with contextlib.redirect_stdout(io.StringIO()):
+            env = EscapeEnv(room_name)
+            cold_time = best_of(lambda: cold_start(room_name), args.repeat)
+            reset_time = best_of(env.reset, args.repeat * 50)
+        print(
+            f"{room_name:<8}{cold_time * 1e3:>10.2f}{reset_time * 1e6:>10.1f}"
+            f"{cold_time / reset_time:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
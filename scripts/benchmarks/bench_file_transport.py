@@ -0,0 +1,85 @@
+"""Request size, client CPU time and latency of sending observation images
+to a vLLM-like endpoint inline as base64 versus as file:// URLs, against a
+local stand-in server that decodes every image it receives.
+
+Usage:
+    python scripts/benchmarks/bench_file_transport.py [--rooms room1] [--repeat 3]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from _common import room_names
+from _standin import standin_process
+from openai import BadRequestError, OpenAI
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.llm.image_cache import image_url
+from vis_escape.llm.image_encoding import encode_image_uncached
+
+
+def send(client, url):
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": "Which action do you take?"},
+                {"type": "image_url", "image_url": url},
+            ],
+        }
+    ]
+    client.chat.completions.create(model="stand-in", messages=messages)
+    return len(json.dumps(messages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", nargs="*", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = [
+        path
+        for room_name in args.rooms or room_names()
+        for path in sorted(glob.glob(os.path.join(ASSETS_DIR, room_name, "image", "*", "*", "*.png")))
+    ]
+    transports = {
+        # what the old code did on every call
+        "base64, encoded": lambda path: {
+            "url": f"data:image/jpeg;base64,{encode_image_uncached(path)}"
+        },
+        "base64, cached": lambda path: image_url(path),
+        "file://": lambda path: image_url(path, local_media_path=ASSETS_DIR),
+    }
+    for path in paths:
+        image_url(path)  # warm the cache
+
+    with standin_process(allowed_local_media_path=ASSETS_DIR) as base_url:
+        client = OpenAI(api_key="EMPTY", base_url=base_url)
+        print(f"{len(paths)} images")
+        print(f"{'transport':<18}{'KiB/request':>13}{'client cpu ms':>15}{'latency ms':>12}")
+        for name, make_url in transports.items():
+            best_wall = best_cpu = float("inf")
+            for _ in range(args.repeat):
+                wall, cpu = time.perf_counter(), time.process_time()
+                request_bytes = sum(send(client, make_url(path)) for path in paths)
+                best_wall = min(best_wall, time.perf_counter() - wall)
+                best_cpu = min(best_cpu, time.process_time() - cpu)
+            print(
+                f"{name:<18}{request_bytes / len(paths) / 1024:>13.1f}"
+                f"{best_cpu / len(paths) * 1e3:>15.3f}{best_wall / len(paths) * 1e3:>12.3f}"
+            )
+
+    with standin_process() as base_url:
+        try:
+            send(OpenAI(api_key="EMPTY", base_url=base_url, max_retries=0), transports["file://"](paths[0]))
+        except BadRequestError:
+            print("server without --allowed-local-media-path refuses file:// (400), "
+                  "run_inference_vision falls back to base64")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Cost of GameState.fork() and snapshot()/restore() versus copy.deepcopy,
+measured at every step of each room's walkthrough_oracle.json.
+
+Usage:
+    python scripts/benchmarks/bench_fork.py [--repeat 200]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import time
+
+from _common import load_room, oracle_actions, room_names
+
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'room':<8}{'deepcopy us':>13}{'fork us':>10}{'restore us':>12}"
+        f"{'fork gain':>11}{'restore gain':>14}"
+    )
+    worst_gain = float("inf")
+    for room_name in room_names():
+        game_state = load_room(room_name)
+        deepcopy_time = fork_time = restore_time = 0.0
+        actions = oracle_actions(room_name)
+        for action in actions:
+            snapshot = game_state.snapshot()
+            deepcopy_time += per_call(lambda: copy.deepcopy(game_state), args.repeat // 10 or 1)
+            fork_time += per_call(game_state.fork, args.repeat)
+            scratch = game_state.fork()
+            restore_time += per_call(lambda: scratch.restore(snapshot), args.repeat)
+            with contextlib.redirect_stdout(io.StringIO()):
+                game_state.handle_action(action)
+
+        steps = len(actions)
+        fork_gain = deepcopy_time / fork_time
+        restore_gain = deepcopy_time / restore_time
+        worst_gain = min(worst_gain, fork_gain)
+        print(
+            f"{room_name:<8}{deepcopy_time / steps * 1e6:>13.1f}"
+            f"{fork_time / steps * 1e6:>10.1f}{restore_time / steps * 1e6:>12.1f}"
+            f"{fork_gain:>10.1f}x{restore_gain:>13.1f}x"
+        )
+    print(f"worst fork gain over deepcopy: {worst_gain:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-step cost of replaying every room's walkthrough_oracle.json with the
+indexed GameState lookups versus the former wall/receptacle/item scans.
+
+Usage:
+    python scripts/benchmarks/bench_game_state_lookup.py [--repeat 20]
+"""
+
+import argparse
+import copy
+import time
+import types
+
+from _common import load_room, oracle_actions, replay, room_names
+
+
+def _scan_item_by_name(self, item_name):
+    for wall in self.walls.values():
+        for receptacle in wall.receptacles.values():
+            for item_state in receptacle.item_states.values():
+                if item_state.game_item.item_name == item_name:
+                    return item_state.game_item
+    return None
+
+
+def _scan_receptacle_by_id(self, receptacle_id):
+    for wall in self.walls.values():
+        for receptacle in wall.receptacles.values():
+            if receptacle.game_receptacle.id == receptacle_id:
+                return receptacle
+    return None
+
+
+def _use_scans(game_state):
+    game_state.get_item_by_name = types.MethodType(_scan_item_by_name, game_state)
+    game_state.get_receptacle_by_id = types.MethodType(
+        _scan_receptacle_by_id, game_state
+    )
+    return game_state
+
+
+def time_replay(pristine, actions, repeat, prepare=None):
+    best = float("inf")
+    for _ in range(repeat):
+        game_state = copy.deepcopy(pristine)
+        if prepare:
+            prepare(game_state)
+        start = time.perf_counter()
+        replay(game_state, actions)
+        best = min(best, time.perf_counter() - start)
+    return best / max(len(actions), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'steps':>6}{'scan us/step':>15}{'index us/step':>15}{'speedup':>9}")
+    total_scan = total_index = 0.0
+    for room_name in room_names():
+        pristine = load_room(room_name)
+        actions = oracle_actions(room_name)
+        scan = time_replay(pristine, actions, args.repeat, _use_scans)
+        indexed = time_replay(pristine, actions, args.repeat)
+        total_scan += scan
+        total_index += indexed
+        print(
+            f"{room_name:<8}{len(actions):>6}{scan * 1e6:>15.2f}"
+            f"{indexed * 1e6:>15.2f}{scan / indexed:>8.2f}x"
+        )
+    print(f"{'mean':<14}{total_scan / len(room_names()) * 1e6:>15.2f}"
+          f"{total_index / len(room_names()) * 1e6:>15.2f}"
+          f"{total_scan / total_index:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Latency of a sequence of agent calls (one per step, as in a run) against
+local stand-in vLLM servers where a few requests straggle, without hedging
+versus hedged at a percentile of recent latency: to the same server, and to
+the other of two replicas.
+
+Usage:
+    python scripts/benchmarks/bench_hedging.py [--calls 300] [--delay 0.05]
+        [--slow-rate 0.02] [--slow-delay 1.0] [--percentile 95]
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from _standin import StandInServer
+
+from vis_escape.experiment.agent.inference import _chat_completion
+from vis_escape.llm.aio import run_sync
+from vis_escape.llm.balancer import ReplicaSet
+from vis_escape.llm.clients import get_client
+from vis_escape.llm.hedging import HedgePolicy, configure_hedging, get_hedger
+
+MESSAGES = [{"role": "user", "content": "Which action do you take?"}]
+
+
+def run(model, client, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        run_sync(_chat_completion(client, model, hedge=True, messages=MESSAGES))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--delay", type=float, default=0.05, help="stand-in seconds per request")
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="fraction of requests that straggle")
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="seconds a straggler takes")
+    parser.add_argument("--percentile", type=float, default=95.0)
+    args = parser.parse_args()
+
+    server = {"delay": args.delay, "slow_rate": args.slow_rate, "slow_delay": args.slow_delay}
+    policy = HedgePolicy(percentile=args.percentile)
+    scenarios = (("none", None, 1), ("same server", policy, 1), ("2 replicas", policy, 2))
+    print(
+        f"{args.calls} calls, {args.delay * 1e3:g}ms each, {args.slow_rate:.0%} straggling for "
+        f"{args.slow_delay:g}s; hedged at p{args.percentile:g}"
+    )
+    print(
+        f"{'hedging':<13}{'wall s':>8}{'p50 ms':>8}{'p99 ms':>8}{'max ms':>8}"
+        f"{'hedged':>8}{'won':>6}{'saved s':>9}{'requests':>10}"
+    )
+    for index, (name, hedge_policy, count) in enumerate(scenarios):
+        model = f"stand-in-{index}"
+        configure_hedging(model, hedge_policy)
+        with contextlib.ExitStack() as stack:
+            servers = [
+                stack.enter_context(StandInServer(**server, seed=seed)) for seed in range(count)
+            ]
+            clients = [get_client(standin.base_url) for standin in servers]
+            client = ReplicaSet(model, clients) if count > 1 else clients[0]
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies = run(model, client, args.calls)
+            wall = time.perf_counter() - start
+        quantiles = statistics.quantiles(latencies, n=100)
+        hedger = get_hedger(model, hedge_policy)
+        stats = hedger.stats if hedger is not None else {}
+        print(
+            f"{name:<13}{wall:>8.2f}{quantiles[49] * 1e3:>8.0f}{quantiles[98] * 1e3:>8.0f}"
+            f"{max(latencies) * 1e3:>8.0f}{stats.get('hedged', 0):>8}{stats.get('hedge_won', 0):>6}"
+            f"{stats.get('saved', 0):>9.2f}{sum(standin.requests for standin in servers):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
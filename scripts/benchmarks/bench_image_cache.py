@@ -0,0 +1,62 @@
+"""Cost of building the base64 payload of every room image: encoding it on
+each call (the old _encode_image) versus the shared EncodedImageCache, from
+memory and from a warm on-disk cache in a fresh cache instance (as a new
+worker process would see it).
+
+Usage:
+    python scripts/benchmarks/bench_image_cache.py [--repeat 3] [--calls 5]
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from _common import room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.llm.image_cache import EncodedImageCache, encode_image_uncached
+
+
+def timed(fn, paths, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        for path in paths:
+            fn(path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--calls", type=int, default=5, help="payloads requested per image")
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'images':>8}{'encode ms':>11}{'memory ms':>11}{'disk ms':>9}{'gain':>8}")
+    for room_name in room_names():
+        paths = sorted(glob.glob(os.path.join(ASSETS_DIR, room_name, "image", "*", "*", "*.png")))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            warm = EncodedImageCache(cache_dir=cache_dir)
+            for path in paths:
+                warm.get(path)
+
+            encode_time = memory_time = disk_time = float("inf")
+            for _ in range(args.repeat):
+                encode_time = min(encode_time, timed(encode_image_uncached, paths, args.calls))
+                memory_time = min(memory_time, timed(warm.get, paths, args.calls))
+                # a fresh process over the same cache_dir: read from disk once per image
+                disk_time = min(
+                    disk_time, timed(EncodedImageCache(cache_dir=cache_dir).get, paths, 1)
+                )
+
+        n = len(paths) * args.calls
+        print(
+            f"{room_name:<8}{len(paths):>8}{encode_time / n * 1e3:>11.3f}"
+            f"{memory_time / n * 1e3:>11.3f}{disk_time / len(paths) * 1e3:>9.3f}"
+            f"{encode_time / memory_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
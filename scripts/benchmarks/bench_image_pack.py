@@ -0,0 +1,72 @@
+"""Cost of the first payload of every room image in a fresh worker: encoding
+it, reading it from an on-disk EncodedImageCache, or slicing it out of the
+room's memory-mapped image pack.
+
+Usage:
+    python scripts/benchmarks/bench_image_pack.py [--repeat 3]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from _common import room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.llm.image_cache import EncodedImageCache
+from vis_escape.llm.image_encoding import DEFAULT_PROFILE, encode_image_uncached
+from vis_escape.llm.image_pack import ImagePack, build_image_pack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'images':>8}{'pack KiB':>10}{'encode ms':>11}{'disk ms':>9}{'pack ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for room_name in room_names():
+            room_dir = os.path.join(ASSETS_DIR, room_name)
+            pack_path = build_image_pack(room_dir, pack_dir=tmp_dir)
+            pack = ImagePack(pack_path)
+            rel_paths = list(pack.images)
+            paths = [os.path.join(room_dir, rel_path) for rel_path in rel_paths]
+            cache_dir = os.path.join(tmp_dir, room_name)
+            warm = EncodedImageCache(cache_dir=cache_dir)
+            for path in paths:
+                warm.get(path)
+            pack.close()
+
+            def read_pack():
+                pack = ImagePack(pack_path)
+                for rel_path, path in zip(rel_paths, paths):
+                    stat = os.stat(path)
+                    assert pack.get(rel_path, stat.st_mtime_ns, stat.st_size, DEFAULT_PROFILE)
+                pack.close()
+
+            def read_disk():
+                cache = EncodedImageCache(cache_dir=cache_dir)
+                for path in paths:
+                    cache._read_disk(cache._key(path, DEFAULT_PROFILE))
+
+            def encode():
+                for path in paths:
+                    encode_image_uncached(path)
+
+            times = []
+            for fn in (encode, read_disk, read_pack):
+                best = float("inf")
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - start)
+                times.append(best / len(paths) * 1e3)
+            print(
+                f"{room_name:<8}{len(paths):>8}{os.path.getsize(pack_path) >> 10:>10}"
+                f"{times[0]:>11.3f}{times[1]:>9.3f}{times[2]:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Payload size, encode time and image tokens of candidate image profiles, and
+optionally request latency and billed prompt tokens against a live endpoint.
+
+Without --model only offline numbers are reported; image tokens are then
+estimated with OpenAI's gpt-4o tiling rule. With --model, --samples images
+per profile are sent with a short prompt through the endpoint configured in
+endpoints.yaml (or --base-url), and mean latency and usage.prompt_tokens
+are reported per profile.
+
+Usage:
+    python scripts/benchmarks/bench_image_profiles.py [--rooms room1 room2]
+        [--profile side=512,q=85,rgb ...] [--model gpt-4o-mini] [--samples 5]
+"""
+
+import argparse
+import base64
+import glob
+import io
+import math
+import os
+import time
+from dataclasses import replace
+
+from _common import room_names
+from PIL import Image
+
+from vis_escape.config.models import get_image_profile, get_image_profiles, get_model_config
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.llm.image_cache import image_url
+from vis_escape.llm.image_encoding import ImageProfile, encode_image_uncached
+
+CANDIDATES = (
+    "side=full,q=default,rgb",
+    "side=1024,q=85,rgb",
+    "side=768,q=75,rgb",
+    "side=512,q=75,rgb",
+    "side=512,q=60,gray",
+)
+
+
+def estimate_tokens(size, detail):
+    """Image tokens of a gpt-4o image input of the given (width, height)"""
+    if detail == "low":
+        return 85
+    width, height = size
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def make_client(model, base_url):
+    from openai import OpenAI
+
+    model_config = get_model_config(model) or {}
+    base_url = base_url or model_config.get("base_url")
+    if base_url:
+        return OpenAI(api_key="EMPTY", base_url=base_url)
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", nargs="*", default=None)
+    parser.add_argument("--profile", action="append", default=[], help="profile key to compare")
+    parser.add_argument("--detail", default=None, help="detail hint (default: the model's)")
+    parser.add_argument("--model", default=None, help="send requests to this endpoints.yaml model")
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--samples", type=int, default=5, help="requests per profile")
+    args = parser.parse_args()
+
+    configured = [profile.key for profile in get_image_profiles()]
+    keys = list(dict.fromkeys([*CANDIDATES, *configured, *args.profile]))
+    detail = args.detail
+    if detail is None:
+        detail = get_image_profile(args.model).detail if args.model else None
+    profiles = [replace(ImageProfile.from_key(key), detail=detail) for key in keys]
+    paths = [
+        path
+        for room_name in args.rooms or room_names()
+        for path in sorted(glob.glob(os.path.join(ASSETS_DIR, room_name, "image", "*", "*", "*.png")))
+    ]
+    client = make_client(args.model, args.base_url) if args.model else None
+
+    header = f"{'profile':<26}{'KiB/img':>9}{'encode ms':>11}{'est tokens':>12}"
+    if client:
+        header += f"{'latency ms':>12}{'prompt tokens':>15}"
+    print(f"{len(paths)} images, detail={detail}")
+    print(header)
+    for profile in profiles:
+        start = time.perf_counter()
+        payloads = [encode_image_uncached(path, profile) for path in paths]
+        encode_time = (time.perf_counter() - start) / len(paths)
+        payload_bytes = sum(len(payload) for payload in payloads) / len(paths)
+        tokens = sum(
+            estimate_tokens(Image.open(io.BytesIO(base64.b64decode(payload))).size, detail)
+            for payload in payloads
+        ) / len(paths)
+        row = f"{profile.key:<26}{payload_bytes / 1024:>9.1f}{encode_time * 1e3:>11.2f}{tokens:>12.0f}"
+
+        if client:
+            sample = paths[:: max(1, len(paths) // args.samples)][: args.samples]
+            latency = prompt_tokens = 0
+            for path in sample:
+                url = image_url(path, profile)
+                start = time.perf_counter()
+                response = client.chat.completions.create(
+                    model=args.model,
+                    messages=[{"role": "user", "content": [
+                        {"type": "text", "text": "Describe this image in one sentence."},
+                        {"type": "image_url", "image_url": url},
+                    ]}],
+                    max_tokens=32,
+                    temperature=0.0,
+                )
+                latency += time.perf_counter() - start
+                prompt_tokens += response.usage.prompt_tokens if response.usage else 0
+            row += f"{latency / len(sample) * 1e3:>12.0f}{prompt_tokens / len(sample):>15.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Steps per second replaying each room's walkthrough_oracle.json with every
+engine message emitted and captured (what print() used to cost under
+redirect_stdout), at the default INFO level, and in quiet mode.
+
+Usage:
+    python scripts/benchmarks/bench_quiet_steps.py [--steps 20000]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from _common import oracle_actions, room_names
+
+from vis_escape.game.manage.room_definition import load_room_definition
+from vis_escape.log import DEBUG, INFO, quiet
+
+
+def replay_rate(room, actions, steps):
+    game_state = room.new_game()
+    start = time.perf_counter()
+    for step in range(steps):
+        if step % len(actions) == 0:
+            game_state.restore(room.initial_snapshot)
+        game_state.handle_action(actions[step % len(actions)])
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'debug/s':>10}{'info/s':>10}{'quiet/s':>10}{'gain':>8}")
+    for room_name in room_names():
+        actions = oracle_actions(room_name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            room = load_room_definition(room_name)
+            with quiet(DEBUG):
+                debug_rate = replay_rate(room, actions, args.steps)
+            with quiet(INFO):
+                info_rate = replay_rate(room, actions, args.steps)
+        with quiet():
+            quiet_rate = replay_rate(room, actions, args.steps)
+        print(
+            f"{room_name:<8}{debug_rate:>10.0f}{info_rate:>10.0f}{quiet_rate:>10.0f}"
+            f"{quiet_rate / debug_rate:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
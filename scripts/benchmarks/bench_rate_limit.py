@@ -0,0 +1,122 @@
+"""Aggregate throughput and 429s of several processes sending requests to one
+rate-limited endpoint as fast as they can, without a limiter versus sharing
+a file-backed token bucket set to the endpoint's limit. The endpoint is a
+local stand-in server that answers --rpm requests per minute (enforced
+over a sliding --window) and rejects the rest with 429.
+
+Then the wait of a single caller spacing --request-tokens requests
+--interval seconds apart under a --tpm limit, with a single-token bucket
+versus the tpm bucket's burst: under the limit, it should not wait.
+
+Usage:
+    python scripts/benchmarks/bench_rate_limit.py [--processes 4]
+        [--concurrency 4] [--rpm 600] [--window 6] [--seconds 20]
+        [--tpm 90000] [--request-tokens 2000] [--interval 3] [--requests 10]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
+import time
+from collections import Counter
+
+import openai
+from _standin import StandInServer
+
+from vis_escape.llm.rate_limit import TPM_BURST, RateLimiter, SharedTokenBucket
+
+MESSAGES = [{"role": "user", "content": "Which action do you take?"}]
+
+
+def worker(base_url, rpm, state_dir, seconds, concurrency, results):
+    async def run():
+        client = openai.AsyncOpenAI(api_key="EMPTY", base_url=base_url, max_retries=0)
+        limiter = RateLimiter("bench", rpm=rpm, state_dir=state_dir) if rpm else None
+        counts = Counter()
+        end = time.monotonic() + seconds
+
+        async def send():
+            while True:
+                if limiter is not None:
+                    await limiter.acquire(0)
+                if time.monotonic() >= end:
+                    return
+                try:
+                    await client.chat.completions.create(model="stand-in", messages=MESSAGES)
+                    counts["ok"] += 1
+                except openai.RateLimitError:
+                    counts["429"] += 1
+
+        await asyncio.gather(*(send() for _ in range(concurrency)))
+        return counts
+
+    results.put(asyncio.run(run()))
+
+
+def paced_waits(tpm, burst, state_dir, request_tokens, interval, requests):
+    """Seconds each of `requests` paced requests waits for its tokens"""
+
+    async def run():
+        limiter = RateLimiter("bench", tpm=tpm, state_dir=state_dir)
+        limiter.tokens = SharedTokenBucket(limiter.tokens.path, tpm, burst=burst)
+        waits = []
+        for _ in range(requests):
+            start = time.monotonic()
+            await limiter.acquire(request_tokens)
+            waits.append(time.monotonic() - start)
+            await asyncio.sleep(interval)
+        return waits
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight per process")
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--window", type=float, default=6.0, help="seconds the server enforces rpm over")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--tpm", type=float, default=90000)
+    parser.add_argument("--request-tokens", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=3.0, help="seconds between paced requests")
+    parser.add_argument("--requests", type=int, default=10, help="paced requests")
+    args = parser.parse_args()
+
+    print(
+        f"{args.processes} processes x {args.concurrency} in flight for {args.seconds:g}s, "
+        f"endpoint limit {args.rpm:g} rpm over {args.window:g}s windows"
+    )
+    print(f"{'limiter':<14}{'answered':>10}{'per min':>9}{'429s':>8}")
+    for name, rpm in (("none", None), ("token bucket", args.rpm)):
+        with StandInServer(rpm=args.rpm, rpm_window=args.window) as server, tempfile.TemporaryDirectory() as state_dir:
+            results = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(
+                    target=worker,
+                    args=(server.base_url, rpm, state_dir, args.seconds, args.concurrency, results),
+                )
+                for _ in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            counts = sum((results.get() for _ in processes), Counter())
+            for process in processes:
+                process.join()
+        print(f"{name:<14}{counts['ok']:>10}{counts['ok'] / args.seconds * 60:>9.0f}{counts['429']:>8}")
+
+
+    print(
+        f"\n{args.request_tokens} tokens every {args.interval:g}s "
+        f"({args.request_tokens * 60 / args.interval:.0f} tpm) under {args.tpm:g} tpm"
+    )
+    print(f"{'bucket':<14}{'mean wait s':>12}{'max wait s':>12}")
+    for name, burst in (("single token", 0.0), (f"{TPM_BURST:g}s burst", TPM_BURST)):
+        with tempfile.TemporaryDirectory() as state_dir:
+            waits = paced_waits(args.tpm, burst, state_dir, args.request_tokens, args.interval, args.requests)
+        print(f"{name:<14}{sum(waits) / len(waits):>12.3f}{max(waits):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
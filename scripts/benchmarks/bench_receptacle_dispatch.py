@@ -0,0 +1,97 @@
+"""Time spent in Receptacle.handle_action while replaying every room's
+walkthrough_oracle.json, compiled TransitionTable versus the former
+nested-dict dispatch.
+
+Usage:
+    python scripts/benchmarks/bench_receptacle_dispatch.py [--repeat 20]
+"""
+
+import argparse
+import time
+
+from _common import load_room, oracle_actions, replay, room_names
+
+from vis_escape.objects.items.lock.non_key_lock import NonKeyLock
+from vis_escape.objects.receptacle import Receptacle
+
+
+def _legacy_handle_action(self, action, context):
+    for item in self.get_interactable_items_in_current_state():
+        if isinstance(item, NonKeyLock) and item.answer.lower() == action.lower():
+            next_state, rule = self._transitions[self._current_state]["unlock"]
+            self._move_to(next_state)
+            return self.get_full_state()
+
+    transitions = self._transitions
+    if " " in action:
+        action_type = action.split(" ")[0]
+        target_item_name = action.split(" ")[1]
+        if action_type == "pick":
+            names = [
+                item.item_name for item in self.get_interactable_items_in_current_state()
+            ]
+            if target_item_name not in names:
+                raise ValueError(f"Error: {target_item_name} is not in the current state")
+            self.pick_item(target_item_name, context)
+            return self.get_full_state()
+        if self._current_state in transitions and action in transitions[self._current_state]:
+            next_state, rule = transitions[self._current_state][action]
+            if rule.evaluate(context):
+                if action_type == "use":
+                    self.use_item(target_item_name, context)
+                self._move_to(next_state)
+        if action_type != "use":
+            context.set_trigger(action)
+        return self.get_full_state()
+    if self._current_state in transitions and action in transitions[self._current_state]:
+        next_state, rule = transitions[self._current_state][action]
+        if rule.evaluate(context):
+            self._move_to(next_state)
+    return self.get_full_state()
+
+
+def _time_dispatch(game_state, handle_action, totals):
+    for receptacle in game_state._receptacle_states:
+        game_receptacle = receptacle.game_receptacle
+
+        def timed(action, context, game_receptacle=game_receptacle):
+            start = time.perf_counter()
+            try:
+                return handle_action(game_receptacle, action, context)
+            finally:
+                totals[0] += time.perf_counter() - start
+
+        game_receptacle.handle_action = timed
+
+
+def time_dispatch(pristine, actions, repeat, handle_action):
+    best = float("inf")
+    for _ in range(repeat):
+        game_state = pristine.fork()
+        totals = [0.0]
+        _time_dispatch(game_state, handle_action, totals)
+        replay(game_state, actions)
+        best = min(best, totals[0])
+    return best / max(len(actions), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'steps':>6}{'dict us/step':>15}{'table us/step':>15}{'speedup':>9}")
+    for room_name in room_names():
+        pristine = load_room(room_name)
+        actions = oracle_actions(room_name)
+        legacy = time_dispatch(pristine, actions, args.repeat, _legacy_handle_action)
+        compiled = time_dispatch(
+            pristine, actions, args.repeat, Receptacle.handle_action
+        )
+        print(
+            f"{room_name:<8}{len(actions):>6}{legacy * 1e6:>15.2f}"
+            f"{compiled * 1e6:>15.2f}{legacy / compiled:>8.2f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Throughput of a replicated model against 1, 2, 4... local stand-in vLLM
+servers, each generating --slots requests at once in --delay seconds, for
+every balancing policy; then with replicas of mixed speed, and with one
+replica failing every request. The requests are spread over --runners
+sets of clients made by model_clients, as every agent of the concurrent
+runner makes its own.
+
+Usage:
+    python scripts/benchmarks/bench_replicas.py [--replicas 1 2 4]
+        [--requests 256] [--delay 0.1] [--slots 4] [--in-flight 64]
+        [--runners 8]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from _standin import standin_process
+
+from vis_escape.experiment.agent.inference import _chat_completion
+from vis_escape.llm.aio import run_sync
+from vis_escape.llm.balancer import ReplicaSet
+from vis_escape.llm.clients import model_clients
+
+MODEL = "stand-in"
+
+
+async def fire(runner_clients, requests, in_flight):
+    slots = asyncio.Semaphore(in_flight)
+    failed = 0
+
+    async def one(index):
+        nonlocal failed
+        async with slots:
+            try:
+                await _chat_completion(
+                    runner_clients[index % len(runner_clients)][MODEL],
+                    MODEL,
+                    messages=[{"role": "user", "content": f"Request {index}"}],
+                )
+            except Exception:
+                failed += 1
+
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return failed
+
+
+def measure(servers, policy, args, eject_for=30.0):
+    """requests/s over the stand-ins made from `servers` (kwargs each), the
+    requests that failed and the share each replica answered"""
+    with contextlib.ExitStack() as stack:
+        base_urls = [stack.enter_context(standin_process(**kwargs)) for kwargs in servers]
+        config = {
+            "models": {
+                MODEL: {
+                    "type": "vllm",
+                    "base_url": base_urls,
+                    "balancing": policy,
+                    "eject_for": eject_for,
+                }
+            }
+        }
+        runner_clients = [model_clients(config) for _ in range(args.runners)]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            failed = run_sync(fire(runner_clients, args.requests, args.in_flight))
+        wall = time.perf_counter() - start
+    replicas = runner_clients[0][MODEL]
+    # every runner balances over the same process-wide ReplicaSet
+    assert all(clients[MODEL] is replicas for clients in runner_clients)
+    shares = "/".join(f"{replica.requests}" for replica in replicas.replicas)
+    return args.requests / wall, failed, shares
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--delay", type=float, default=0.1, help="stand-in seconds per request")
+    parser.add_argument("--slots", type=int, default=4, help="requests each stand-in generates at once")
+    parser.add_argument("--in-flight", type=int, default=64, help="requests the client keeps in flight")
+    parser.add_argument("--runners", type=int, default=8, help="client sets the requests are spread over")
+    args = parser.parse_args()
+
+    server = {"delay": args.delay, "max_concurrency": args.slots, "reply": "look around"}
+    capacity = args.slots / args.delay
+    print(
+        f"{args.requests} requests, {args.in_flight} in flight from {args.runners} runners; "
+        f"each replica {capacity:g} requests/s"
+    )
+    print(f"{'replicas':<10}{'policy':<19}{'requests/s':>11}{'of ideal':>10}{'failed':>8}  requests per replica")
+    for count in args.replicas:
+        for policy in ReplicaSet.POLICIES:
+            throughput, failed, shares = measure([server] * count, policy, args)
+            print(
+                f"{count:<10}{policy:<19}{throughput:>11.1f}{throughput / (capacity * count):>10.0%}"
+                f"{failed:>8}  {shares}"
+            )
+
+    slow = {**server, "delay": args.delay * 3}
+    print(f"\n4 replicas, two of them 3x slower (ideal {capacity * 2 + capacity * 2 / 3:g} requests/s)")
+    for policy in ReplicaSet.POLICIES:
+        throughput, failed, shares = measure([server, server, slow, slow], policy, args)
+        print(f"{'mixed':<10}{policy:<19}{throughput:>11.1f}{'':>10}{failed:>8}  {shares}")
+
+    broken = {**server, "error_rate": 1.0, "error_status": 503}
+    print("\n4 replicas, one answering every request with 503")
+    for policy in ReplicaSet.POLICIES:
+        throughput, failed, shares = measure([server, server, server, broken], policy, args)
+        print(f"{'1 broken':<10}{policy:<19}{throughput:>11.1f}{'':>10}{failed:>8}  {shares}")
+
+
+if __name__ == "__main__":
+    main()
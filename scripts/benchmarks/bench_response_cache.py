@@ -0,0 +1,72 @@
+"""Record a seeded BaseAgent experiment through the response cache against a
+local stand-in vLLM server, replay it from the cache, and check that the
+replayed run history is byte-identical and made no request.
+
+Usage:
+    python scripts/benchmarks/bench_response_cache.py [--room room1]
+        [--max-steps 30] [--delay 0.05] [--seed 0] [--run-mode vlm]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from _standin import StandInServer, action_reply
+from openai import OpenAI
+
+from vis_escape.experiment.agent.baseagent.experiment_runner import AIExperimentRunner
+from vis_escape.game.env.escape_env import EscapeEnv
+from vis_escape.llm.response_cache import configure_response_cache
+
+MODEL = "stand-in"
+# the agents also build clients for the OpenAI models of endpoints.yaml
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+
+def play(env, base_url, args):
+    model_mapping = {"caption": MODEL, "actor": MODEL, "feedback": MODEL, "memory": MODEL}
+    runner = AIExperimentRunner(args.room, model_mapping, args.run_mode, "no_hint", env=env, seed=args.seed)
+    runner.ai_player.clients = {MODEL: OpenAI(api_key="EMPTY", base_url=base_url)}
+    runner.save_run_history = lambda **kwargs: None
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        runner.run_experiment(max_steps=args.max_steps)
+    wall = time.perf_counter() - start
+    return json.dumps(runner.run_history, indent=4).encode(), wall, output.getvalue().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--room", default="room1")
+    parser.add_argument("--max-steps", type=int, default=30)
+    parser.add_argument("--delay", type=float, default=0.05, help="stand-in seconds per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--run-mode", default="vlm", choices=["vlm", "socratic"])
+    args = parser.parse_args()
+
+    env = EscapeEnv(args.room)
+    print(f"{args.room}, {args.max_steps} steps, {args.delay * 1e3:g}ms per request")
+    print(f"{'mode':<8}{'wall s':>8}{'requests':>10}  cache")
+    with tempfile.TemporaryDirectory() as tmp, StandInServer(
+        delay=args.delay, reply=action_reply
+    ) as server:
+        path = os.path.join(tmp, "responses.sqlite")
+        histories = {}
+        for mode in ("record", "replay"):
+            cache = configure_response_cache(mode, path)
+            before = server.requests
+            histories[mode], wall, summary = play(env, server.base_url, args)
+            print(f"{mode:<8}{wall:>8.2f}{server.requests - before:>10}  {summary}")
+        cache.close()
+    identical = histories["record"] == histories["replay"]
+    print(f"run history {len(histories['record'])} bytes, identical: {identical}")
+    assert identical
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Wall-clock, give-ups and requests sent for a sequence of chat calls against
+a local stand-in vLLM server that fails a fraction of requests, with the old
+fixed retry loop (5 s sleep, 3 attempts) versus the model's RetryPolicy
+(exponential backoff with full jitter, Retry-After on 429).
+
+Usage:
+    python scripts/benchmarks/bench_retry.py [--calls 30] [--error-rate 0.2]
+        [--delay 0.02]
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from _standin import StandInServer
+from openai import OpenAI
+
+from vis_escape.experiment.agent.inference import _chat_completion
+from vis_escape.llm.aio import run_sync
+from vis_escape.llm.retry import retry_budget
+
+MODEL = "stand-in"
+MESSAGES = [{"role": "user", "content": "Which action do you take?"}]
+
+
+def fixed_loop(client):
+    # what run_inference_text did before
+    for attempt in range(3):
+        try:
+            return client.chat.completions.create(model=MODEL, messages=MESSAGES)
+        except Exception:
+            if attempt < 2:
+                time.sleep(5)
+    raise RuntimeError("gave up")
+
+
+def retry_policy(client):
+    return run_sync(_chat_completion(client, MODEL, messages=MESSAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=30)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--delay", type=float, default=0.02, help="stand-in seconds per request")
+    args = parser.parse_args()
+
+    scenarios = {
+        "503": {"error_status": 503},
+        "429, Retry-After 0.5s": {"error_status": 429, "retry_after": 0.5},
+    }
+    print(f"{args.calls} calls, {args.error_rate:.0%} of requests fail, {args.delay * 1e3:g}ms per request")
+    print(f"{'errors':<23}{'retries':<15}{'wall s':>8}{'gave up':>9}{'requests':>10}")
+    for scenario, kwargs in scenarios.items():
+        for name, call in (("fixed 5s x3", fixed_loop), ("RetryPolicy", retry_policy)):
+            with StandInServer(delay=args.delay, error_rate=args.error_rate, seed=1, **kwargs) as server:
+                client = OpenAI(api_key="EMPTY", base_url=server.base_url, max_retries=0)
+                gave_up = 0
+                start = time.perf_counter()
+                with retry_budget(None), contextlib.redirect_stdout(io.StringIO()):
+                    for _ in range(args.calls):
+                        try:
+                            call(client)
+                        except Exception:
+                            gave_up += 1
+                wall = time.perf_counter() - start
+            print(f"{scenario:<23}{name:<15}{wall:>8.2f}{gave_up:>9}{server.requests:>10}")
+
+
+if __name__ == "__main__":
+    main()
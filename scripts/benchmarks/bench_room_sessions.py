@@ -0,0 +1,57 @@
+"""Memory and creation time per concurrent session when games share one
+RoomDefinition versus loading config.py for every game.
+
+Usage:
+    python scripts/benchmarks/bench_room_sessions.py [--sessions 1000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+import tracemalloc
+
+from _common import room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.room_definition import RoomDefinition, load_room_definition
+
+
+def measure(make_session, sessions):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        games = [make_session() for _ in range(sessions)]
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del games
+    return allocated / sessions, elapsed / sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(
+        f"{'room':<8}{'config KiB':>12}{'shared KiB':>12}"
+        f"{'config us':>11}{'shared us':>11}"
+    )
+    for room_name in room_names():
+        config_path = os.path.join(ASSETS_DIR, room_name, "config.py")
+        room = load_room_definition(room_name)
+        config_mem, config_time = measure(
+            lambda: RoomDefinition.from_config(config_path).new_game(),
+            max(args.sessions // 10, 1),
+        )
+        shared_mem, shared_time = measure(room.new_game, args.sessions)
+        print(
+            f"{room_name:<8}{config_mem / 1024:>12.1f}{shared_mem / 1024:>12.1f}"
+            f"{config_time * 1e6:>11.0f}{shared_time * 1e6:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Cold start of a runner in a fresh interpreter: importing vis_escape, then
+loading a room up to the first observation of EscapeEnv(room).reset(), from
+config.py versus from its compiled bundle (`vis-escape compile-rooms`).
+
+Usage:
+    python scripts/benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from _common import SRC_DIR, room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.room_bundle import compile_room
+
+CHILD = """
+import contextlib, io, sys, time
+start = time.perf_counter()
+from vis_escape.game.env.escape_env import EscapeEnv
+imported = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    EscapeEnv(sys.argv[1]).reset()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def cold_start(room_name, bundle_dir, repeat):
+    """Best (import seconds, room load seconds) over repeat fresh processes"""
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR), VIS_ESCAPE_ROOM_CACHE=bundle_dir)
+    runs = [
+        tuple(
+            map(
+                float,
+                subprocess.run(
+                    [sys.executable, "-c", CHILD, room_name],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout.split(),
+            )
+        )
+        for _ in range(repeat)
+    ]
+    return min(run[0] for run in runs), min(run[1] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as empty_dir, tempfile.TemporaryDirectory() as bundle_dir:
+        print(f"{'room':<8}{'import ms':>11}{'config ms':>11}{'bundle ms':>11}{'gain':>8}")
+        for room_name in room_names():
+            compile_room(os.path.join(ASSETS_DIR, room_name), bundle_dir)
+            import_time, config_time = cold_start(room_name, empty_dir, args.repeat)
+            _, bundle_time = cold_start(room_name, bundle_dir, args.repeat)
+            print(
+                f"{room_name:<8}{import_time * 1e3:>11.1f}{config_time * 1e3:>11.1f}"
+                f"{bundle_time * 1e3:>11.1f}{config_time / bundle_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
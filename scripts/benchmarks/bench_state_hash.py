@@ -0,0 +1,43 @@
+"""Cost of GameState.state_hash() versus the exporter's JSON state key,
+measured at every step of each room's walkthrough_oracle.json.
+
+Usage:
+    python scripts/benchmarks/bench_state_hash.py [--repeat 200]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+
+from _common import PROJECT_ROOT, best_of, load_room, oracle_actions, room_names
+
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from export_room_static import _state_key  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'json key us':>13}{'state_hash us':>15}{'gain':>9}")
+    for room_name in room_names():
+        game_state = load_room(room_name)
+        json_time = hash_time = 0.0
+        actions = oracle_actions(room_name)
+        for action in actions:
+            json_time += best_of(lambda: _state_key(game_state), args.repeat)
+            hash_time += best_of(game_state.state_hash, args.repeat)
+            with contextlib.redirect_stdout(io.StringIO()):
+                game_state.handle_action(action)
+
+        steps = len(actions)
+        print(
+            f"{room_name:<8}{json_time / steps * 1e6:>13.1f}"
+            f"{hash_time / steps * 1e6:>15.2f}{json_time / hash_time:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Time to action of agent calls against a local stand-in vLLM server that
+generates --token-delay seconds per token after --delay seconds: waiting for
+the full answer, streaming it until a valid action is emitted, and streaming
+while capturing the full answer in the background. Answers are shaped like
+a reasoning model's (action, then an explanation) and an R1 model's (a
+<think> block before the action).
+
+Usage:
+    python scripts/benchmarks/bench_streaming.py [--calls 10] [--delay 0.2]
+        [--token-delay 0.005] [--think-words 200] [--explain-words 100]
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from _standin import StandInServer, action_reply
+
+from vis_escape.experiment.agent.inference import run_inference_text
+from vis_escape.experiment.agent.utils import action_emitted
+from vis_escape.llm import streaming
+from vis_escape.llm.clients import get_client
+
+ACTIONS = ["look around", "turn left", "turn right", "inspect desk", "inspect drawer", "open drawer"]
+PROMPT = f"Choose one of the following actions: {ACTIONS}\n[ACTION]"
+
+
+def run(model, base_url, calls, until, capture, tail):
+    clients = {model: get_client(base_url)}
+    seconds = []
+    wrong = 0
+    with streaming.capture_streams(capture), contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(calls):
+            start = time.perf_counter()
+            response = run_inference_text(clients, model, PROMPT, until=until)
+            seconds.append(time.perf_counter() - start)
+            action = response.split("[ACTION]")[1].strip().split("\n")[0].strip()
+            wrong += action not in ACTIONS
+        streams = streaming.take_streams()
+        texts = streaming.full_texts(streams)
+        streaming.wait_streams()
+    # captured answers that reached the end of the reply
+    complete = sum(text.endswith(tail) for text in texts)
+    return statistics.mean(seconds), wrong, f"{complete}/{len(streams)}" if capture else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.2, help="stand-in seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="stand-in seconds per token")
+    parser.add_argument("--think-words", type=int, default=200, help="words of an R1 <think> block")
+    parser.add_argument("--explain-words", type=int, default=100, help="words after the action")
+    args = parser.parse_args()
+
+    explanation = "\nThe drawer might hold something useful" + " so I check it" * (args.explain_words // 4)
+    thinking = "<think>" + "Let me consider the room " * (args.think_words // 5) + "</think>\n"
+    shapes = {
+        "action last": ("stand-in", action_reply, ""),
+        "explained": ("stand-in", lambda body: action_reply(body) + "\n" + explanation, explanation),
+        "R1 think": ("stand-in-R1", lambda body: thinking + action_reply(body) + "\n" + explanation, explanation),
+    }
+    modes = {
+        "full answer": (None, False),
+        "stream": (action_emitted(ACTIONS), False),
+        "stream+capture": (action_emitted(ACTIONS), True),
+    }
+    print(
+        f"{args.calls} calls per row, {args.delay * 1e3:g}ms to the first token, "
+        f"{args.token_delay * 1e3:g}ms per token"
+    )
+    print(f"{'answer':<13}{'mode':<16}{'to action s':>12}{'speedup':>9}{'tokens':>8}{'wrong':>7}{'captured':>10}")
+    for shape, (model, reply, tail) in shapes.items():
+        baseline = None
+        for mode, (until, capture) in modes.items():
+            with StandInServer(delay=args.delay, token_delay=args.token_delay, reply=reply, seed=1) as server:
+                seconds, wrong, captured = run(model, server.base_url, args.calls, until, capture, tail)
+                time.sleep(0.1)  # let the server notice closed streams
+                tokens = server.tokens
+            baseline = baseline or seconds
+            print(
+                f"{shape:<13}{mode:<16}{seconds:>12.3f}{baseline / seconds:>8.1f}x"
+                f"{tokens:>8}{wrong:>7}{captured:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
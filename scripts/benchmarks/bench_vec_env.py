@@ -0,0 +1,64 @@
+"""Env-steps per second of VecEscapeEnv on one core, stepping precomputed
+random action ids (step only) and uniformly random valid actions (mask
+sampling included).
+
+Usage:
+    python scripts/benchmarks/bench_vec_env.py [--rooms room1 room7] [--num-envs 4096] [--steps 200]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from _common import room_names
+
+from vis_escape.game.env.vec_env import VecEscapeEnv, load_compiled_room
+
+
+def steps_per_second(env, action_batches):
+    env.reset()
+    start = time.perf_counter()
+    for actions in action_batches:
+        env.step(actions)
+    return env.num_envs * len(action_batches) / (time.perf_counter() - start)
+
+
+def sampled_steps_per_second(env, steps):
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(env.sample_valid_actions())
+    return env.num_envs * steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", nargs="+", default=None)
+    parser.add_argument("--num-envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'room':<8}{'states':>8}{'compile s':>11}"
+        f"{'step M/s':>10}{'sampled M/s':>13}"
+    )
+    rng = np.random.default_rng(0)
+    for room_name in args.rooms or room_names():
+        start = time.perf_counter()
+        compiled = load_compiled_room(room_name)
+        compile_time = time.perf_counter() - start
+        env = VecEscapeEnv(compiled, args.num_envs, seed=0)
+        action_batches = [
+            rng.integers(compiled.num_actions, size=args.num_envs, dtype=np.int32)
+            for _ in range(args.steps)
+        ]
+        step_rate = steps_per_second(env, action_batches)
+        sampled_rate = sampled_steps_per_second(env, args.steps)
+        print(
+            f"{room_name:<8}{compiled.num_states:>8}{compile_time:>11.1f}"
+            f"{step_rate / 1e6:>10.1f}{sampled_rate / 1e6:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
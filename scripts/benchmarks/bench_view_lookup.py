@@ -0,0 +1,120 @@
+"""Cost of resolving the current view image: reading and scanning the mapping
+file on every lookup (the old ViewManager) versus the MappingIndex, at every
+step of each room's walkthrough_oracle.json.
+
+Usage:
+    python scripts/benchmarks/bench_view_lookup.py [--repeat 200]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+
+from _common import best_of, load_room, oracle_actions, room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.view_manager import ViewManager
+from vis_escape.log import quiet
+
+
+def scan_view_image(mapping_dir, game_state):
+    """Image file name of the current view, the way it was looked up before"""
+    if game_state.current_view == "WALL":
+        wall_state = game_state.get_current_wall()
+        with open(os.path.join(mapping_dir, "wall_view", f"{wall_state.wall_id}.json")) as f:
+            scenes = json.load(f)["scene_states"]
+        states = {
+            obj_id: obj.current_state for obj_id, obj in wall_state.receptacles.items()
+        }
+        matching_scenes = [
+            scene
+            for scene in scenes
+            if all(
+                scene["object_states"][obj_id]["receptacle_state"] == state["receptacle_state"]
+                for obj_id, state in states.items()
+                if obj_id in scene["object_states"]
+            )
+        ]
+        if not matching_scenes:
+            return "0"
+        matching_count = [
+            sum(
+                1
+                for obj_id, state in states.items()
+                if obj_id in scene["object_states"]
+                and set(scene["object_states"][obj_id]["items"])
+                == set(state["interactable_items"])
+            )
+            for scene in matching_scenes
+        ]
+        return matching_scenes[matching_count.index(max(matching_count))]["image_path"]
+
+    receptacle = game_state.get_current_wall().get_receptacle(game_state.inspected_receptacle)
+    if game_state.current_view == "RECEPTACLE":
+        path = os.path.join(mapping_dir, "object_view", f"{game_state.inspected_receptacle}.json")
+        with open(path) as f:
+            scenes = json.load(f)["scene_states"]
+        state = receptacle.current_state
+        for scene in scenes:
+            if scene["object_states"]["receptacle_state"] == state["receptacle_state"] and set(
+                scene["object_states"]["items"]
+            ) == set(state["interactable_items"]):
+                return scene["image_path"]
+        return None
+
+    item_state = receptacle.get_item_state(game_state.current_item)
+    path = os.path.join(mapping_dir, "item_view", f"{item_state.game_item.item_name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        for state in json.load(f)["item_states"]:
+            if state["name"] == item_state.get_current_state():
+                return state["image_path"]
+    return None
+
+
+def index_view_image(view_manager, game_state):
+    """The same lookup through the ViewManager's MappingIndex"""
+    if game_state.current_view == "WALL":
+        return view_manager._encode_wall_state(game_state.get_current_wall())
+    receptacle = game_state.get_current_wall().get_receptacle(game_state.inspected_receptacle)
+    if game_state.current_view == "RECEPTACLE":
+        return view_manager._encode_receptacle_state(game_state.inspected_receptacle, receptacle)
+    return view_manager._encode_item_state(receptacle.get_item_state(game_state.current_item))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'scan us':>10}{'index us':>10}{'gain':>8}")
+    for room_name in room_names():
+        game_state = load_room(room_name)
+        room_dir = os.path.join(ASSETS_DIR, room_name)
+        mapping_dir = os.path.join(room_dir, "mapping")
+        view_manager = ViewManager(room_dir, "", game_state, play_mode="human")
+        scan_time = index_time = 0.0
+        actions = oracle_actions(room_name)
+        for action in actions:
+            # quiet: rooms without an item mapping warn on every lookup
+            with quiet(logging.ERROR):
+                scan_time += best_of(lambda: scan_view_image(mapping_dir, game_state), args.repeat)
+                index_time += best_of(
+                    lambda: index_view_image(view_manager, game_state), args.repeat
+                )
+            with contextlib.redirect_stdout(io.StringIO()):
+                game_state.handle_action(action)
+
+        steps = len(actions)
+        print(
+            f"{room_name:<8}{scan_time / steps * 1e6:>10.1f}"
+            f"{index_time / steps * 1e6:>10.1f}{scan_time / index_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
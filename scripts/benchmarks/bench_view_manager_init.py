@@ -0,0 +1,45 @@
+"""Cost of constructing a ViewManager when every instance reloads the room's
+image manifest and mappings from disk versus sharing the process-wide
+RoomAssets.
+
+Usage:
+    python scripts/benchmarks/bench_view_manager_init.py [--repeat 50]
+"""
+
+import argparse
+import os
+
+from _common import best_of, load_room, room_names
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.room_assets import invalidate_room_assets
+from vis_escape.game.manage.view_manager import ViewManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'room':<8}{'reload us':>11}{'shared us':>11}{'gain':>8}")
+    for room_name in room_names():
+        game_state = load_room(room_name)
+        room_dir = os.path.join(ASSETS_DIR, room_name)
+
+        def new_view_manager():
+            return ViewManager(room_dir, "", game_state, play_mode="human")
+
+        def reload_view_manager():
+            invalidate_room_assets(room_dir)
+            return new_view_manager()
+
+        reload_time = best_of(reload_view_manager, args.repeat)
+        shared_time = best_of(new_view_manager, args.repeat)
+        print(
+            f"{room_name:<8}{reload_time * 1e6:>11.1f}{shared_time * 1e6:>11.1f}"
+            f"{reload_time / shared_time:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
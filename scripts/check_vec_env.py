@@ -0,0 +1,127 @@
+"""Differential check of VecEscapeEnv against the GameState object engine.
+
+Each room's walkthrough_oracle.json and a set of random walkers (mostly
+valid actions, some invalid ones) step both engines in lockstep; every step
+must agree on success, the resulting state hash and game clear.
+
+Usage:
+    python3 scripts/check_vec_env.py [--rooms room1 room2] [--walkers 16] [--steps 400]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from vis_escape.constants import ASSETS_DIR  # noqa: E402
+from vis_escape.game.env.vec_env import VecEscapeEnv, load_compiled_room  # noqa: E402
+from vis_escape.game.manage.room_definition import load_room_definition  # noqa: E402
+from vis_escape.log import quiet  # noqa: E402
+
+
+def check_oracle(room_name: str) -> int:
+    room = load_room_definition(room_name)
+    compiled = load_compiled_room(room_name)
+    env = VecEscapeEnv(compiled, 1)
+    game = room.new_game()
+    with open(os.path.join(ASSETS_DIR, room_name, "walkthrough_oracle.json")) as f:
+        actions = [turn["chosen_action"] for turn in json.load(f)]
+
+    with quiet():
+        for step, action in enumerate(actions):
+            try:
+                action_id = compiled.action_id(action)
+            except ValueError:
+                # outside the action space: must be a no-op for the object engine
+                before = game.state_hash()
+                if game.handle_action(action) or game.state_hash() != before:
+                    print(f"{room_name} oracle step {step}: {action!r} is not a no-op", file=sys.stderr)
+                    return 1
+                continue
+            states, _, dones, successes = env.step(np.array([action_id]))
+            success = bool(game.handle_action(action))
+            if (
+                success != successes[0]
+                or game.game_clear != dones[0]
+                or (not dones[0] and game.state_hash() != compiled.state_hashes[states[0]])
+            ):
+                print(f"{room_name} oracle step {step}: {action!r} diverged", file=sys.stderr)
+                return 1
+            if dones[0]:
+                break
+    print(f"{room_name:<8} oracle {'cleared' if game.game_clear else 'not cleared'}")
+    return 0
+
+
+def check_room(room_name: str, walkers: int, steps: int, seed: int) -> int:
+    room = load_room_definition(room_name)
+    compiled = load_compiled_room(room_name)
+    env = VecEscapeEnv(compiled, walkers, seed=seed)
+    games = [room.new_game() for _ in range(walkers)]
+    rng = np.random.default_rng(seed)
+    mismatches = clears = 0
+
+    with quiet():
+        for step in range(steps):
+            actions = env.sample_valid_actions()
+            explore = rng.random(walkers) < 0.1
+            actions[explore] = rng.integers(compiled.num_actions, size=explore.sum())
+            states, _, dones, successes = env.step(actions)
+
+            for index, game in enumerate(games):
+                success = bool(game.handle_action(compiled.actions[actions[index]]))
+                if game.game_clear:
+                    clears += 1
+                    games[index] = room.new_game()
+                expected = games[index].state_hash()
+                if (
+                    success != successes[index]
+                    or game.game_clear != dones[index]
+                    or expected != compiled.state_hashes[states[index]]
+                ):
+                    mismatches += 1
+                    print(
+                        f"{room_name} step {step} walker {index}: "
+                        f"{compiled.actions[actions[index]]!r} diverged",
+                        file=sys.stderr,
+                    )
+                    games[index] = compiled.game_state(states[index], room)
+
+    print(
+        f"{room_name:<8} states {compiled.num_states:>7} actions {compiled.num_actions:>3} "
+        f"clears {clears:>4} mismatches {mismatches}"
+    )
+    return mismatches
+
+
+def main() -> None:
+    rooms = sorted(
+        (name for name in os.listdir(ASSETS_DIR) if name.startswith("room")),
+        key=lambda name: int(name[len("room") :]),
+    )
+    parser = argparse.ArgumentParser(description="Check VecEscapeEnv against GameState")
+    parser.add_argument("--rooms", nargs="+", default=rooms)
+    parser.add_argument("--walkers", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mismatches = sum(
+        check_oracle(room_name) + check_room(room_name, args.walkers, args.steps, args.seed)
+        for room_name in args.rooms
+    )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
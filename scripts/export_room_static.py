@@ -12,9 +12,6 @@ experience.
 from __future__ import annotations
 
 import argparse
-import copy
-import contextlib
-import io
 import json
 import os
 import sys
@@ -29,9 +26,11 @@ if str(SRC_DIR) not in sys.path:
 
 from vis_escape.constants import ASSETS_DIR  # noqa: E402
 from vis_escape.game.manage.game_state import GameState  # noqa: E402
+from vis_escape.game.manage.room_definition import load_room_definition  # noqa: E402
 from vis_escape.game.manage.view_manager import ViewManager  # noqa: E402
 from vis_escape.objects.item import QuizItem  # noqa: E402
 from vis_escape.game.manage.game_state import ItemState  # noqa: E402
+from vis_escape.log import quiet  # noqa: E402
 
 SYSTEM_MESSAGE = (
     "You are playing a room escape game. The room is surrounded by 4 walls, and "
@@ -124,27 +123,29 @@ def _quiz_meta(game_state: GameState) -> Dict[str, Any]:
     return {}
 
 
-def build_state_graph(room_name: str) -> Dict[str, Any]:
-    import importlib.util
-
-    room_assets = Path(ASSETS_DIR) / room_name
-    config_path = room_assets / "config.py"
+def _export_transition_tables(game_state: GameState) -> Dict[str, Any]:
+    return {
+        receptacle_id: receptacle.game_receptacle.transition_table.to_dict()
+        for wall_state in game_state.walls.values()
+        for receptacle_id, receptacle in wall_state.receptacles.items()
+    }
 
-    spec = importlib.util.spec_from_file_location(f"vis_escape_room_{room_name}", config_path)
-    module = importlib.util.module_from_spec(spec)
-    assert spec.loader is not None
-    spec.loader.exec_module(module)
-    game_state: GameState = module.game_state
 
-    initial_state = copy.deepcopy(game_state)
+def build_state_graph(
+    room_name: str, include_transitions: bool = False
+) -> Dict[str, Any]:
+    room_assets = Path(ASSETS_DIR) / room_name
+    initial_state = load_room_definition(room_name).new_game()
+    # one ViewManager for the whole export; only last_message changes per call
+    view_manager = ViewManager(str(room_assets), "", initial_state, play_mode="human")
 
     graph: Dict[str, Any] = {}
     queue: deque[GameState] = deque([initial_state])
-    visited: set[str] = set()
-    key_to_id: Dict[str, str] = {}
+    visited: set[int] = set()
+    key_to_id: Dict[int, str] = {}
 
-    def ensure_state_id(gs: GameState) -> tuple[str, str]:
-        key = _state_key(gs)
+    def ensure_state_id(gs: GameState) -> tuple[int, str]:
+        key = gs.state_hash()
         if key not in key_to_id:
             key_to_id[key] = f"s{len(key_to_id)}"
         return key, key_to_id[key]
@@ -158,8 +159,7 @@ def build_state_graph(room_name: str) -> Dict[str, Any]:
 
         node_export = _export_game_state(current_state)
         # Build display info for this node
-        vm_for_node = ViewManager(str(room_assets), "", copy.deepcopy(current_state), play_mode="human")
-        image_path = vm_for_node.get_current_view_image(current_state)
+        image_path = view_manager.get_current_view_image(current_state)
         node_data = {
             "id": state_id,
             "view": node_export["current_view"],
@@ -179,16 +179,13 @@ def build_state_graph(room_name: str) -> Dict[str, Any]:
         used_action_labels: set[str] = set()
 
         for action in actions:
-            next_state = copy.deepcopy(current_state)
-            prev_snapshot = copy.deepcopy(current_state)
-            with contextlib.redirect_stdout(io.StringIO()):
+            next_state = current_state.fork()
+            prev_snapshot = current_state
+            with quiet():
                 success = next_state.handle_action(action)
 
             result_state = next_state if success else prev_snapshot
-            transition_vm = ViewManager(
-                str(room_assets), "", copy.deepcopy(result_state), play_mode="human"
-            )
-            image_after = transition_vm.get_current_view_image(
+            image_after = view_manager.get_current_view_image(
                 result_state, prev_snapshot, action
             )
 
@@ -198,8 +195,8 @@ def build_state_graph(room_name: str) -> Dict[str, Any]:
                 "type": "button",
                 "next": next_id,
                 "messages": {
-                    "action": transition_vm.last_message.get("action_message", ""),
-                    "after": transition_vm.last_message.get("after_state_message", ""),
+                    "action": view_manager.last_message.get("action_message", ""),
+                    "after": view_manager.last_message.get("after_state_message", ""),
                 },
                 "image": _relative_image_path(image_after) if image_after else None,
             }
@@ -214,15 +211,12 @@ def build_state_graph(room_name: str) -> Dict[str, Any]:
         if quiz:
             answer = quiz.get("answer")
             if answer and answer not in used_action_labels:
-                solved_state = copy.deepcopy(current_state)
-                prev_snapshot = copy.deepcopy(current_state)
-                with contextlib.redirect_stdout(io.StringIO()):
+                solved_state = current_state.fork()
+                prev_snapshot = current_state
+                with quiet():
                     success = solved_state.handle_action(answer)
                 if success:
-                    vm_after_answer = ViewManager(
-                        str(room_assets), "", copy.deepcopy(solved_state), play_mode="human"
-                    )
-                    image_after = vm_after_answer.get_current_view_image(
+                    image_after = view_manager.get_current_view_image(
                         solved_state, prev_snapshot, answer
                     )
                     next_key, next_id = ensure_state_id(solved_state)
@@ -231,10 +225,10 @@ def build_state_graph(room_name: str) -> Dict[str, Any]:
                             "expected": answer,
                             "next": next_id,
                             "messages": {
-                                "action": vm_after_answer.last_message.get(
+                                "action": view_manager.last_message.get(
                                     "action_message", ""
                                 ),
-                                "after": vm_after_answer.last_message.get(
+                                "after": view_manager.last_message.get(
                                     "after_state_message", ""
                                 ),
                             },
@@ -248,21 +242,24 @@ def build_state_graph(room_name: str) -> Dict[str, Any]:
 
         graph[state_id] = node_data
 
-    initial_vm = ViewManager(str(room_assets), "", copy.deepcopy(initial_state), play_mode="human")
-    initial_image = initial_vm.get_current_view_image(initial_state)
+    view_manager.reset_message(initial_state)
+    initial_image = view_manager.get_current_view_image(initial_state)
     _, initial_state_id = ensure_state_id(initial_state)
 
-    return {
+    exported = {
         "room": room_name,
         "systemMessage": SYSTEM_MESSAGE,
         "initialState": initial_state_id,
         "initialMessages": {
-            "action": initial_vm.last_message.get("action_message", ""),
-            "after": initial_vm.last_message.get("after_state_message", ""),
+            "action": view_manager.last_message.get("action_message", ""),
+            "after": view_manager.last_message.get("after_state_message", ""),
         },
         "initialImage": _relative_image_path(initial_image) if initial_image else None,
         "states": graph,
     }
+    if include_transitions:
+        exported["transitions"] = _export_transition_tables(initial_state)
+    return exported
 
 
 def main() -> None:
@@ -274,11 +271,16 @@ def main() -> None:
         default=PROJECT_ROOT / "web" / "static_data",
         help="Directory to write the JSON graph",
     )
+    parser.add_argument(
+        "--include-transitions",
+        action="store_true",
+        help="Also export each receptacle's compiled transition table",
+    )
 
     args = parser.parse_args()
     args.output.mkdir(parents=True, exist_ok=True)
 
-    graph = build_state_graph(args.room)
+    graph = build_state_graph(args.room, include_transitions=args.include_transitions)
     output_path = args.output / f"{args.room}.js"
     payload = json.dumps(graph, ensure_ascii=False, separators=(",", ":"))
     js_content = (
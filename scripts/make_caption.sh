@@ -20,6 +20,9 @@ MODEL_NAME="gpt-4o-mini"
 # AGENT_HOSTNAME="localhost"
 # AGENT_PORT=39002
 
+# Reuse captions already generated for unchanged images (see README)
+# export VIS_ESCAPE_RESPONSE_CACHE_MODE="read-write"
+
 # Initialize Virtualenvs
 conda activate vis-escape
 
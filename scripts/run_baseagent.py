@@ -7,7 +7,11 @@ import numpy as np
 
 from vis_escape.config.models import get_config, get_preset
 from vis_escape.constants import ASSETS_DIR
+from vis_escape.experiment.agent.batch_runner import run_experiments
 from vis_escape.experiment.agent.baseagent.experiment_runner import AIExperimentRunner
+from vis_escape.game.env.escape_env import EscapeEnv
+from vis_escape.llm.response_cache import MODES, configure_response_cache
+from vis_escape.llm.retry import DEFAULT_RETRY_BUDGET
 
 
 def check_file(room_name, assets_dir: Optional[Union[str, Path]] = None):
@@ -74,6 +78,12 @@ def run_multiple_experiments(
     model_mapping: Mapping[str, Mapping[str, str]],
     run_mode: str,
     hint_mode: str,
+    concurrency: int = 1,
+    timeout: Optional[float] = None,
+    seed: Optional[int] = None,
+    retry_budget: Optional[int] = DEFAULT_RETRY_BUDGET,
+    stream_actions: bool = False,
+    capture_streams: bool = False,
 ):
     print(f"\nRunning {num_experiments} experiments for {room_name}")
     print("-" * 50)
@@ -82,15 +92,48 @@ def run_multiple_experiments(
     total_steps = 0
     successful_steps = []
 
+    # a timeout needs the runs' cancel scopes, so timed runs go through
+    # run_experiments even one at a time
+    batched = concurrency > 1 or timeout is not None
+    if batched:
+        # concurrent runs cannot share an env
+        runners = [
+            AIExperimentRunner(
+                room_name=room_name,
+                model_mapping=model_mapping,
+                run_mode=run_mode,
+                hint_mode=hint_mode,
+                env=EscapeEnv(room_name, caption_model=model_mapping["caption"]),
+                seed=None if seed is None else seed + i,
+                retry_budget=retry_budget,
+                stream_actions=stream_actions,
+                capture_streams=capture_streams,
+            )
+            for i in range(num_experiments)
+        ]
+        results = run_experiments(runners, max_steps, concurrency=concurrency, timeout=timeout)
+    else:
+        results = []
+        # one env per room, reset by each runner instead of reloading the room
+        env = EscapeEnv(room_name, caption_model=model_mapping["caption"])
+
     for i in range(num_experiments):
         print(f"\nExperiment {i+1}/{num_experiments}")
-        runner = AIExperimentRunner(
-            room_name=room_name,
-            model_mapping=model_mapping,
-            run_mode=run_mode,
-            hint_mode=hint_mode,
-        )
-        result = runner.run_experiment(max_steps=max_steps)
+        if batched:
+            result = results[i]
+        else:
+            runner = AIExperimentRunner(
+                room_name=room_name,
+                model_mapping=model_mapping,
+                run_mode=run_mode,
+                hint_mode=hint_mode,
+                env=env,
+                seed=None if seed is None else seed + i,
+                retry_budget=retry_budget,
+                stream_actions=stream_actions,
+                capture_streams=capture_streams,
+            )
+            result = runner.run_experiment(max_steps=max_steps)
 
         if result["success"]:
             total_success += 1
@@ -129,11 +172,70 @@ def run_multiple_experiments(
     default=200,
     help="Maximum number of steps per experiment (default: 200)",
 )
+@click.option(
+    "-j",
+    "--concurrency",
+    type=int,
+    default=1,
+    help="Number of experiments to run at once (default: 1)",
+)
+@click.option(
+    "--timeout",
+    type=float,
+    default=None,
+    help="Cancel an experiment after this many seconds, with any concurrency (default: none)",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=None,
+    help="Seed of experiment i is SEED + i, for reproducible runs (default: unseeded)",
+)
+@click.option(
+    "--retry-budget",
+    type=int,
+    default=DEFAULT_RETRY_BUDGET,
+    help=f"Retries of failed requests allowed per experiment (default: {DEFAULT_RETRY_BUDGET})",
+)
+@click.option(
+    "--stream-actions",
+    is_flag=True,
+    help="Stream the actor's answers and stop reading once a valid action is emitted",
+)
+@click.option(
+    "--capture-streams",
+    is_flag=True,
+    help="With --stream-actions, keep reading the answers in the background "
+    "and record them in full in the run history",
+)
+@click.option(
+    "--response-cache",
+    type=click.Choice(MODES),
+    default=None,
+    help="Response cache mode (default: $VIS_ESCAPE_RESPONSE_CACHE_MODE or off); "
+    "replay a recorded run with the same --seed",
+)
 @click.option("-m", "--model-name", type=str, default="gpt4o-mini")
 @click.option("-t", "--hint-mode", type=str, default="no_hint")
 @click.option("-r", "--run-mode", type=str, default="vlm")
-def main(room_name, num_experiments, max_steps, model_name, hint_mode, run_mode):
+def main(
+    room_name,
+    num_experiments,
+    max_steps,
+    concurrency,
+    timeout,
+    seed,
+    retry_budget,
+    stream_actions,
+    capture_streams,
+    response_cache,
+    model_name,
+    hint_mode,
+    run_mode,
+):
     """Run AI experiments for room escape."""
+    if response_cache:
+        configure_response_cache(response_cache)
     check_file(room_name)
     model_mapping = get_model_mapping(run_mode=run_mode, model_name=model_name)
 
@@ -144,6 +246,12 @@ def main(room_name, num_experiments, max_steps, model_name, hint_mode, run_mode)
         model_mapping,
         run_mode,
         hint_mode,
+        concurrency,
+        timeout,
+        seed,
+        retry_budget,
+        stream_actions,
+        capture_streams,
     )
 
 
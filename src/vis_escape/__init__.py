@@ -1,6 +1,11 @@
-from importlib.metadata import PackageNotFoundError, version
+def __getattr__(name):
+    # importlib.metadata costs tens of ms, more than loading a room; only
+    # pay for it when the version is asked for
+    if name == "__version__":
+        from importlib.metadata import PackageNotFoundError, version
 
-try:
-    __version__ = version("vis_escape")
-except PackageNotFoundError:
-    __version__ = "0.0.dev"
+        try:
+            return version("vis_escape")
+        except PackageNotFoundError:
+            return "0.0.dev"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
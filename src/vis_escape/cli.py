@@ -0,0 +1,62 @@
+import os
+
+import click
+
+from vis_escape.config.models import get_image_profiles
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.room_bundle import BUNDLE_DIR, compile_room
+from vis_escape.llm.image_encoding import ImageProfile
+from vis_escape.llm.image_pack import PACK_DIR, build_image_pack
+
+
+@click.group()
+def main():
+    """VisEscape command line tools."""
+
+
+def _room_names(assets_dir):
+    return sorted(
+        (
+            name
+            for name in os.listdir(assets_dir)
+            if os.path.exists(os.path.join(assets_dir, name, "config.py"))
+        ),
+        key=lambda name: int(name.replace("room", "")),
+    )
+
+
+@main.command("compile-rooms")
+@click.argument("rooms", nargs=-1)
+@click.option("-a", "--assets-dir", type=str, default=ASSETS_DIR, show_default=True)
+@click.option("-o", "--output-dir", type=str, default=BUNDLE_DIR, show_default=True)
+def compile_rooms(rooms, assets_dir, output_dir):
+    """Compile room bundles for fast startup (all rooms if none are given)."""
+    for room_name in rooms or _room_names(assets_dir):
+        path = compile_room(os.path.join(assets_dir, room_name), output_dir)
+        click.echo(f"{room_name}: {path}")
+
+
+@main.command("pack-images")
+@click.argument("rooms", nargs=-1)
+@click.option("-a", "--assets-dir", type=str, default=ASSETS_DIR, show_default=True)
+@click.option("-o", "--output-dir", type=str, default=PACK_DIR, show_default=True)
+@click.option(
+    "-p",
+    "--profile",
+    "profiles",
+    multiple=True,
+    help="Image profile to pack, e.g. side=512,q=85,rgb (default: every profile in endpoints.yaml)",
+)
+def pack_images(rooms, assets_dir, output_dir, profiles):
+    """Pre-encode room images into memory-mapped packs (all rooms if none are given)."""
+    try:
+        profiles = [ImageProfile.from_key(key) for key in profiles] or get_image_profiles()
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--profile")
+    for room_name in rooms or _room_names(assets_dir):
+        path = build_image_pack(os.path.join(assets_dir, room_name), profiles, output_dir)
+        click.echo(f"{room_name}: {path} ({os.path.getsize(path) >> 10} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+import functools
+import os
 from pathlib import Path
 
 import yaml
 
+from vis_escape.constants import PROJECT_ROOT
+from vis_escape.llm.image_encoding import ImageProfile
+from vis_escape.llm.hedging import HedgePolicy
+from vis_escape.llm.retry import RetryPolicy
+
 
 def get_config(config_path=None):
     """
@@ -56,6 +63,177 @@ def get_preset(preset_name: str = None, config_path=None):
         return config["presets"]
 
 
+@functools.lru_cache(maxsize=None)
+def _image_profiles(config_path=None):
+    profiles = {}
+    for model_name, model_config in get_config(config_path)["models"].items():
+        if "image" in model_config:
+            try:
+                profiles[model_name] = ImageProfile.from_config(model_config["image"] or {})
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid image profile for model '{model_name}': {e}")
+    return profiles
+
+
+def get_image_profile(model_name: str, config_path=None) -> ImageProfile:
+    """
+    Get the image profile used when sending images to a model.
+    
+    Args:
+        model_name: The model name (e.g., 'gpt-4o-mini')
+        config_path: Optional path to config file
+    
+    Returns:
+        The ImageProfile of the model's `image` section in endpoints.yaml.
+        Models without one get full-size images, with detail "low" for
+        OpenAI gpt models as before profiles existed.
+    """
+    profile = _image_profiles(config_path).get(model_name)
+    if profile is None:
+        profile = ImageProfile(detail="low" if "gpt" in model_name.lower() else None)
+    return profile
+
+
+def get_image_profiles(config_path=None):
+    """
+    Get every distinct image profile configured in endpoints.yaml.
+    
+    Returns:
+        List of ImageProfile, including the default full-size profile
+    """
+    profiles = {ImageProfile().key: ImageProfile()}
+    for profile in _image_profiles(config_path).values():
+        profiles.setdefault(profile.key, profile)
+    return list(profiles.values())
+
+
+@functools.lru_cache(maxsize=None)
+def get_local_media_path(model_name: str, config_path=None):
+    """
+    Get the directory a model's server may read images from by file:// URL.
+    
+    Set `local_media_path` on a vllm model in endpoints.yaml when its server
+    shares this machine's filesystem and was started with
+    `--allowed-local-media-path` covering that directory. Relative paths are
+    taken from the project root.
+    
+    Returns:
+        Absolute directory path, or None to always send images inline
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    local_media_path = model_config.get("local_media_path")
+    if not local_media_path:
+        return None
+    return os.path.join(PROJECT_ROOT, os.path.expanduser(local_media_path))
+
+
+# Defaults for models that do not set max_concurrency / timeout
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_REQUEST_TIMEOUT = 600.0
+
+
+@functools.lru_cache(maxsize=None)
+def get_max_concurrency(model_name: str, config_path=None) -> int:
+    """
+    Get the number of requests a process may have in flight to a model's
+    endpoint (`max_concurrency` in endpoints.yaml).
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    max_concurrency = int(model_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+    if max_concurrency < 1:
+        raise ValueError(f"Invalid max_concurrency {max_concurrency} for model '{model_name}'")
+    return max_concurrency
+
+
+@functools.lru_cache(maxsize=None)
+def get_request_timeout(model_name: str, config_path=None) -> float:
+    """
+    Get the seconds a single request to a model may take before it is
+    abandoned and retried (`timeout` in endpoints.yaml).
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    return float(model_config.get("timeout", DEFAULT_REQUEST_TIMEOUT))
+
+
+@functools.lru_cache(maxsize=None)
+def get_retry_policy(model_name: str, config_path=None) -> RetryPolicy:
+    """
+    Get how failed requests to a model are retried (the `retry` section of
+    the model in endpoints.yaml; see RetryPolicy for the options).
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    try:
+        return RetryPolicy.from_config(model_config.get("retry") or {})
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid retry policy for model '{model_name}': {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_hedge_policy(model_name: str, config_path=None):
+    """
+    Get when slow calls to a model are sent a second time (the `hedge`
+    section of the model in endpoints.yaml; see HedgePolicy for the options).
+    
+    Returns:
+        HedgePolicy, or None when the model's calls are not hedged
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    if "hedge" not in model_config:
+        return None
+    try:
+        return HedgePolicy.from_config(model_config["hedge"] or {})
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid hedge policy for model '{model_name}': {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_rate_limits(model_name: str, config_path=None):
+    """
+    Get the requests and tokens per minute a model may be sent, by all
+    processes on this machine together (`rpm` and `tpm` in endpoints.yaml).
+    
+    Returns:
+        (rpm, tpm), each None when unlimited
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    limits = []
+    for name in ("rpm", "tpm"):
+        value = model_config.get(name)
+        if value is not None:
+            value = float(value)
+            if value <= 0:
+                raise ValueError(f"Invalid {name} {value:g} for model '{model_name}'")
+        limits.append(value)
+    return tuple(limits)
+
+
+# Idle keep-alive connections are closed after this many seconds
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+
+@functools.lru_cache(maxsize=None)
+def get_connection_limits(model_name: str, config_path=None):
+    """
+    Get the HTTP connection limits of a model's endpoint: `max_connections`
+    (default: the model's max_concurrency) and `keepalive_expiry` (seconds,
+    default 60) in endpoints.yaml.
+    
+    Returns:
+        Dictionary of max_connections, max_keepalive_connections and
+        keepalive_expiry; every connection may be kept alive
+    """
+    model_config = get_config(config_path)["models"].get(model_name) or {}
+    max_connections = int(model_config.get("max_connections", get_max_concurrency(model_name, config_path)))
+    if max_connections < 1:
+        raise ValueError(f"Invalid max_connections {max_connections} for model '{model_name}'")
+    keepalive_expiry = float(model_config.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY))
+    return {
+        "max_connections": max_connections,
+        "max_keepalive_connections": max_connections,
+        "keepalive_expiry": keepalive_expiry,
+    }
+
+
 # Backward compatibility functions
 def get_model_tag(name, model_cfg=None):
     """
@@ -78,6 +256,8 @@ def get_model_long(model_cfg=None):
         if model_config["type"] == "vllm":
             # Extract hostname and port from base_url
             base_url = model_config["base_url"]
+            if not isinstance(base_url, str):
+                base_url = base_url[0]  # replicated model: its first server
             # Parse "http://127.0.0.1:39001/v1"
             parts = base_url.replace("http://", "").replace("/v1", "").split(":")
             result[model_name] = {
@@ -1,22 +1,28 @@
-import os
 from typing import List, Optional
 
-from openai import OpenAI
-
 from vis_escape.config.models import get_config
 from vis_escape.experiment.agent.inference import (
     run_inference_text,
     run_inference_vision,
     run_inference_vision_noimage,
 )
+from vis_escape.experiment.agent.utils import action_emitted
+from vis_escape.llm.clients import model_clients
 
 from .prompt import *
 
 
 class Agent:
-    def __init__(self, model_cfg=None):
+    def __init__(self, model_cfg=None, stream_actions=False):
         self.config = get_config(model_cfg)
-        self.clients = self._get_client()
+        self.clients = model_clients(self.config)
+        # stream action answers and stop reading once the action is emitted
+        self.stream_actions = stream_actions
+
+    def _until(self, available_actions, ispuzzle=False):
+        if not self.stream_actions:
+            return None
+        return action_emitted(available_actions, ispuzzle)
 
     def get_next_action_first_turn(self, model: str,
                        direction: str,
@@ -26,13 +32,14 @@ class Agent:
                        run_mode: Optional[str] = "vlm",
                        ) -> tuple[str, str]:
         system_prompt = "Your response should be in the following format: [ACTION]Your action"
+        until = self._until(available_actions)
         
         if run_mode == "socratic":
             prompt = get_prompt_next_action_first_turn(direction, current_scene_desc, inventory, available_actions)
-            response = run_inference_text(self.clients, model, prompt, "action", system_prompt)
+            response = run_inference_text(self.clients, model, prompt, "action", system_prompt, until)
         else:  # vlm mode
             prompt = get_prompt_next_action_first_turn_vlm(direction, current_scene_desc, inventory, available_actions)
-            response = run_inference_vision(self.clients, model, current_scene_desc, prompt)
+            response = run_inference_vision(self.clients, model, current_scene_desc, prompt, until)
             
         print("---------------PROMPT------------------")
         print(prompt)
@@ -68,6 +75,7 @@ class Agent:
                        run_mode: Optional[str] = "vlm",
                        ) -> tuple[str, str, bool]:
         system_prompt = "Your response should be in the following format: [ACTION]Your action"
+        until = self._until(available_actions, ispuzzle)
         
         if run_mode == "socratic":
             prompt = get_prompt_next_action_withreason(
@@ -76,7 +84,7 @@ class Agent:
                 previous_action, available_actions, 
                 ispuzzle, hint_message
             )
-            response = run_inference_text(self.clients, model, prompt, "action", system_prompt)
+            response = run_inference_text(self.clients, model, prompt, "action", system_prompt, until)
         else:  # vlm mode
             prompt = get_prompt_next_action_withreason_vlm(
                 direction, current_scene_desc, inventory, 
@@ -84,7 +92,7 @@ class Agent:
                 previous_action, available_actions, 
                 ispuzzle, hint_message
             )
-            response = run_inference_vision(self.clients, model, current_scene_desc, prompt)
+            response = run_inference_vision(self.clients, model, current_scene_desc, prompt, until)
             
         print("---------------PROMPT------------------")
         print(prompt)
@@ -114,9 +122,9 @@ class Agent:
                                 system_prompt = "Your response should be in the following format: [ACTION]Your action"
                                 prompt = get_prompt_next_action_withreason_retry(direction, chosen_action, available_actions, hint_message)
                                 if run_mode == "socratic":
-                                    response = run_inference_text(self.clients, model, prompt, "action_retry", system_prompt)
+                                    response = run_inference_text(self.clients, model, prompt, "action_retry", system_prompt, until)
                                 else:
-                                    response = run_inference_vision_noimage(self.clients, model, prompt, "action_retry", system_prompt)
+                                    response = run_inference_vision_noimage(self.clients, model, prompt, "action_retry", system_prompt, until)
                                 print("---------------RETRY PROMPT------------------")
                                 print(prompt)
                                 print("---------------ANSWER------------------")
@@ -129,9 +137,9 @@ class Agent:
                             print(f"Attempt {attempt + 1}: No action found. Retrying...")
                             system_prompt = "Your response should be in the following format: [ACTION]Your action"
                             if run_mode == "socratic":
-                                response = run_inference_text(self.clients, model, prompt, "action", system_prompt)
+                                response = run_inference_text(self.clients, model, prompt, "action", system_prompt, until)
                             else:
-                                response = run_inference_vision_noimage(self.clients, model, prompt, "action", system_prompt)
+                                response = run_inference_vision_noimage(self.clients, model, prompt, "action", system_prompt, until)
                 else:
                     if "[ACTION]" in response:
                         chosen_action = response.split("[ACTION]")[1].strip().replace(":", "")
@@ -144,9 +152,9 @@ class Agent:
                             system_prompt = "Your response should be in the following format: [ACTION]Your action"
                             prompt = get_prompt_next_action_withreason_retry(direction, chosen_action, available_actions, hint_message)
                             if run_mode == "socratic":
-                                response = run_inference_text(self.clients, model, prompt, "action_retry", system_prompt)
+                                response = run_inference_text(self.clients, model, prompt, "action_retry", system_prompt, until)
                             else:
-                                response = run_inference_vision_noimage(self.clients, model, prompt, "action_retry")
+                                response = run_inference_vision_noimage(self.clients, model, prompt, "action_retry", until=until)
                             print("---------------RETRY PROMPT------------------")
                             print(prompt)
                             print("---------------ANSWER------------------")
@@ -159,44 +167,12 @@ class Agent:
                         print(f"Action: [{chosen_action}] Attempt {attempt + 1}: No action found. Retrying...")
                         system_prompt = "Your response should be in the following format: [ACTION]Your action"
                         if run_mode == "socratic":
-                            response = run_inference_text(self.clients, model, prompt, "action", system_prompt)
+                            response = run_inference_text(self.clients, model, prompt, "action", system_prompt, until)
                         else:
-                            response = run_inference_vision_noimage(self.clients, model, prompt, "action", system_prompt)
+                            response = run_inference_vision_noimage(self.clients, model, prompt, "action", system_prompt, until)
             print("All attempts failed. Returning default action.")
             return available_actions[0], response, False
                 
         except Exception as e:
             print(f"Response {response} does not contain [ACTION] in available_actions {available_actions}")
             return available_actions[0], response, False
-
-
-
-
-
-       
-    def _get_client(self):
-        """
-        Create OpenAI clients for all configured models.
-        Returns a dict mapping model names to OpenAI client instances.
-        """
-        clients = {}
-        
-        for model_name, model_config in self.config["models"].items():
-            if model_config["type"] == "openai":
-                # OpenAI API
-                try:
-                    clients[model_name] = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                except Exception as e:
-                    print(f"Warning: Failed to create OpenAI client for {model_name}: {e}")
-            
-            elif model_config["type"] == "vllm":
-                # vLLM endpoint (OpenAI-compatible)
-                base_url = model_config["base_url"]
-                default_query = model_config.get("args", None)
-                clients[model_name] = OpenAI(
-                    api_key="EMPTY",
-                    base_url=base_url,
-                    default_query=default_query
-                )
-        
-        return clients
\ No newline at end of file
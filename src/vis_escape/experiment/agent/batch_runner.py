@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from vis_escape.llm.aio import cancel_scope
+
+
+async def arun_experiments(
+    runners: Sequence[Any],
+    max_steps: int,
+    concurrency: int = 8,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Run AIExperimentRunners concurrently and return their results in order.
+
+    Each runner plays in a worker thread; its LLM requests all go to the
+    shared inference loop, where the per-endpoint limits of endpoints.yaml
+    bound how many are in flight. Runners must not share an EscapeEnv.
+
+    A run that takes longer than `timeout` seconds is cancelled at its next
+    request and reported with reason "timeout"; a run that raises is
+    reported with reason "error". Cancelling this coroutine cancels every
+    run in progress.
+    """
+    # runners made in the same second would write the same run_history file
+    start_times = Counter(runner.run_start_time for runner in runners)
+    for index, runner in enumerate(runners):
+        if start_times[runner.run_start_time] > 1:
+            runner.run_start_time = f"{runner.run_start_time}_{index:03d}"
+
+    loop = asyncio.get_running_loop()
+    # at most `concurrency` runs play at once, but a cancelled run keeps its
+    # thread until its next request, so threads are not capped at that
+    executor = ThreadPoolExecutor(max_workers=max(1, len(runners)), thread_name_prefix="experiment")
+    cancel_events = [threading.Event() for _ in runners]
+    slots = asyncio.Semaphore(concurrency)
+
+    def play(runner, cancelled):
+        with cancel_scope(cancelled):
+            try:
+                return runner.run_experiment(max_steps=max_steps)
+            except asyncio.CancelledError:
+                return None  # the run was already reported as cancelled
+
+    async def run(runner, cancelled):
+        try:
+            # the timeout starts once the run has a worker, not while it is queued
+            async with slots:
+                return await asyncio.wait_for(
+                    asyncio.shield(loop.run_in_executor(executor, play, runner, cancelled)),
+                    timeout,
+                )
+        except asyncio.TimeoutError:
+            cancelled.set()
+            print(f"Experiment {runner.run_start_time} cancelled after {timeout:g}s")
+            return {"success": False, "steps_taken": runner.step_count, "reason": "timeout"}
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        except Exception as e:
+            print(f"Experiment {runner.run_start_time} failed: {e!r}")
+            return {"success": False, "steps_taken": runner.step_count, "reason": "error"}
+
+    try:
+        return await asyncio.gather(
+            *(run(runner, cancelled) for runner, cancelled in zip(runners, cancel_events))
+        )
+    finally:
+        for cancelled in cancel_events:
+            cancelled.set()
+        executor.shutdown(wait=False)
+
+
+def run_experiments(
+    runners: Sequence[Any],
+    max_steps: int,
+    concurrency: int = 8,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Blocking arun_experiments"""
+    return asyncio.run(arun_experiments(runners, max_steps, concurrency, timeout))
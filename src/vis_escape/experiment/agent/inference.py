@@ -1,36 +1,161 @@
-import base64
-import io
+import asyncio
+import contextlib
 import time
+from typing import Callable, Optional
 
-from PIL import Image
+import openai
 
+from vis_escape.config.models import (
+    get_hedge_policy,
+    get_image_profile,
+    get_local_media_path,
+    get_rate_limits,
+    get_request_timeout,
+    get_retry_policy,
+)
+from vis_escape.llm.aio import run_sync
+from vis_escape.llm.balancer import ReplicaSet
+from vis_escape.llm.endpoints import async_client, endpoint_key, endpoint_semaphore
+from vis_escape.llm.hedging import get_hedger
+from vis_escape.llm.image_cache import image_url
+from vis_escape.llm.rate_limit import estimate_prompt_tokens, estimate_tokens, get_rate_limiter
+from vis_escape.llm.response_cache import ResponseCacheMiss, get_response_cache, request_key
+from vis_escape.llm.retry import spend_retry
+from vis_escape.llm.streaming import stream_completion
 
-def _encode_image(image_path: str) -> str:
-    with Image.open(image_path) as img:
-        if img.mode != "RGB":
-            img = img.convert("RGB")
+# Models whose server refused a file:// image; they get inline base64 from then on
+_file_transport_refused = set()
+# Prompt types whose calls are hedged: the agents' action calls, which the
+# game waits on; feedback and memory calls have latencies of their own
+HEDGED_PROMPT_TYPES = ("action", "action_retry")
 
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG")
-        return base64.b64encode(buffer.getvalue()).decode("utf-8")
 
+async def _chat_completion(client, model: str, hedge: bool = False, until=None, **kwargs):
+    """One chat completion request, answered from the response cache when
+    possible, otherwise bounded by the endpoint's concurrency limit and the
+    model's request timeout, and retried by the model's RetryPolicy.
 
-def run_inference_text(
+    Every retry is spent from the current run's retry budget and reported
+    in its history; the last error is raised once the attempts, the call's
+    deadline or the budget run out. With `hedge`, an attempt of a model
+    with a HedgePolicy that is slower than usual is sent a second time,
+    to another replica if the model has several. With `until`, the answer
+    is streamed and returned as soon as until(text so far) is true (see
+    stream_completion).
+    """
+    cache = get_response_cache()
+    key = None
+    if cache.enabled:
+        # a streamed answer may be cut short: never served for a full one
+        key = request_key(model, kwargs if until is None else {**kwargs, "stream": True})
+    if key is not None:
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+    # a replicated model picks one of its servers per request
+    replicas = client if isinstance(client, ReplicaSet) else None
+    if replicas is None:
+        client = async_client(client, model)
+    policy = get_retry_policy(model)
+    hedger = get_hedger(model, get_hedge_policy(model)) if hedge else None
+    limiter = get_rate_limiter(endpoint_key(client), client.api_key, model, *get_rate_limits(model))
+    estimated_tokens = estimate_tokens(kwargs, limiter.completion_tokens) if limiter is not None else 0
+    deadline = time.monotonic() + policy.deadline
+
+    async def send(serving, dispatched=None):
+        # `serving`: the replicas of the attempt's other requests;
+        # dispatched(): called once the request goes out, for the hedger
+        response = None
+        try:
+            if limiter is not None:
+                # every request counts against the endpoint's limits
+                await limiter.acquire(estimated_tokens)
+            timeout = min(get_request_timeout(model), deadline - time.monotonic())
+            with replicas.request(serving) if replicas is not None else contextlib.nullcontext() as replica:
+                server = client
+                if replica is not None:
+                    serving.append(replica)
+                    server = async_client(replica.client, model)
+                async with endpoint_semaphore(server, model):
+                    if dispatched is not None:
+                        dispatched()
+                    if until is None:
+                        request = server.chat.completions.create(model=model, **kwargs)
+                    else:
+                        request = stream_completion(server, model, until, **kwargs)
+                    try:
+                        response = await asyncio.wait_for(request, timeout)
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(f"{model} did not answer within {timeout:g}s") from None
+        finally:
+            # also when cancelled (a hedge's loser, a run's timeout), so
+            # that the reservation of a request left unanswered is given back
+            if limiter is not None:
+                if response is None:
+                    limiter.settle(estimated_tokens)
+                elif response.usage is not None:
+                    limiter.settle(estimated_tokens, response.usage)
+                else:
+                    # a stream ended early, or a server, reports no usage
+                    limiter.settle_streamed(
+                        estimated_tokens, estimate_prompt_tokens(kwargs), response.choices[0].message.content
+                    )
+        return response
+
+    attempt = 0
+    while True:
+        attempt += 1
+        serving = []
+        try:
+            if hedger is not None:
+                response = await hedger.call(lambda dispatched: send(serving, dispatched))
+            else:
+                response = await send(serving)
+            break
+        except Exception as e:
+            if not policy.is_retryable(e) or attempt >= policy.max_attempts:
+                raise
+            delay = policy.delay(attempt, e)
+            if time.monotonic() + delay >= deadline:
+                raise
+            event = {
+                "model": model,
+                "attempt": attempt,
+                "error": f"{type(e).__name__}: {e}"[:200],
+                "delay": round(delay, 3),
+            }
+            if not spend_retry(event):
+                print(f"Retry budget of this run is spent, giving up on {model}")
+                raise
+            print(f"{model} failed (attempt {attempt}/{policy.max_attempts}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+    if key is not None:
+        cache.put(key, model, response)
+    return response
+
+
+async def arun_inference_text(
     clients,
     model: str,
     prompt: str,
     prompt_type: str = "action",
     system_prompt: str = None,
+    until: Optional[Callable[[str], bool]] = None,
 ) -> str:
     """
     Run text inference using the specified model.
     
     Args:
-        clients: Dictionary of model name -> OpenAI client
+        clients: Dictionary of model name -> OpenAI or AsyncOpenAI client, or
+            ReplicaSet of a replicated model
         model: Model name (e.g., 'gpt-4o-mini' or 'Qwen/Qwen2.5-32B-Instruct')
         prompt: The prompt text
-        prompt_type: Type of prompt (for logging)
+        prompt_type: Type of prompt (for logging; action calls are hedged)
         system_prompt: Optional system prompt
+        until: Optional test of the answer so far; when given, the answer is
+            streamed and returned as soon as the test passes (e.g. once the
+            action is emitted)
     
     Returns:
         Generated text response
@@ -39,58 +164,68 @@ def run_inference_text(
         raise ValueError(f"Model '{model}' not found in configured clients. Available models: {list(clients.keys())}")
     
     client = clients[model]
-    r1_error_count = 0
-    retry_count = 0
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+        print(f"Running Inference with {model} with system prompt")
+    else:
+        print(f"Running Inference with {model}")
+    
+    messages.append({"role": "user", "content": prompt})
+    is_r1 = "R1" in model or "DeepSeek" in model
+    if until is not None and is_r1:
+        # only the answer after the reasoning counts
+        test = until
+        until = lambda text: "</think>" in text and test(text.split("</think>")[1].strip())
 
-    while retry_count < 3:
+    # Failed requests are retried inside _chat_completion; this loop only asks
+    # DeepSeek R1 models again when they leave out the </think> tag
+    for r1_error_count in range(1, 4):
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-                print(f"Running Inference with {model} with system prompt")
-            else:
-                print(f"Running Inference with {model}")
-            
-            messages.append({"role": "user", "content": prompt})
-            
-            chat_response = client.chat.completions.create(
-                model=model,
-                messages=messages,
+            chat_response = await _chat_completion(
+                client, model, hedge=prompt_type in HEDGED_PROMPT_TYPES, until=until, messages=messages
             )
-            
-            response_text = chat_response.choices[0].message.content.strip()
-            
-            # Special handling for DeepSeek R1 models
-            if "R1" in model or "DeepSeek" in model:
-                if "</think>" not in response_text:
-                    r1_error_count += 1
-                    if r1_error_count >= 3:
-                        print("R1 model failed to return <think> tag 3 times, returning response anyway")
-                        return response_text
-                    raise Exception("R1 model did not return <think> tag")
-                else:
-                    # Extract content after </think> tag
-                    return response_text.split("</think>")[1].strip()
-            else:
-                return response_text
-
+        except ResponseCacheMiss:
+            raise
         except Exception as e:
             print(f"Error during API call: {e}")
-            retry_count += 1
-            time.sleep(5)
+            return ""
+        
+        response_text = chat_response.choices[0].message.content.strip()
+        
+        # Special handling for DeepSeek R1 models
+        if not is_r1:
+            return response_text
+        if "</think>" in response_text:
+            # Extract content after </think> tag
+            return response_text.split("</think>")[1].strip()
+        print("R1 model did not return <think> tag")
     
-    return ""
+    print("R1 model failed to return <think> tag 3 times, returning response anyway")
+    return response_text
 
 
-def run_inference_vision(clients, model_name: str, image_path: str, prompt: str) -> str:
+async def arun_inference_vision(
+    clients,
+    model_name: str,
+    image_path: str,
+    prompt: str,
+    until: Optional[Callable[[str], bool]] = None,
+    prompt_type: str = "action",
+) -> str:
     """
     Run vision inference using the specified model.
     
     Args:
-        clients: Dictionary of model name -> OpenAI client
+        clients: Dictionary of model name -> OpenAI or AsyncOpenAI client, or
+            ReplicaSet of a replicated model
         model_name: Model name (e.g., 'gpt-4o-mini' or 'OpenGVLab/InternVL2_5-38B')
         image_path: Path to the image file
         prompt: The prompt text
+        until: Optional test of the answer so far; when given, the answer is
+            streamed and returned as soon as the test passes (e.g. once the
+            action is emitted)
+        prompt_type: Type of prompt (action calls are hedged)
     
     Returns:
         Generated text response
@@ -100,19 +235,20 @@ def run_inference_vision(clients, model_name: str, image_path: str, prompt: str)
     
     client = clients[model_name]
     print(f"Running Vision Inference with {model_name}")
+    profile = get_image_profile(model_name)
+    local_media_path = None
+    if model_name not in _file_transport_refused:
+        local_media_path = get_local_media_path(model_name)
     
-    retry_count = 0
-    while retry_count < 3:
+    while True:
         try:
-            base64_image = _encode_image(image_path)
-            
-            # Determine detail level based on model type
-            image_config = {"url": f"data:image/jpeg;base64,{base64_image}"}
-            if "gpt" in model_name.lower():
-                image_config["detail"] = "low"
+            image_config = image_url(image_path, profile, local_media_path)
             
-            response = client.chat.completions.create(
-                model=model_name,
+            response = await _chat_completion(
+                client,
+                model_name,
+                hedge=prompt_type in HEDGED_PROMPT_TYPES,
+                until=until,
                 messages=[
                     {
                         "role": "user",
@@ -128,33 +264,40 @@ def run_inference_vision(clients, model_name: str, image_path: str, prompt: str)
             )
             return response.choices[0].message.content.strip()
         
+        except ResponseCacheMiss:
+            raise
         except Exception as e:
+            if isinstance(e, openai.BadRequestError) and image_config["url"].startswith("file://"):
+                # The server cannot read our files after all: resend inline
+                print(f"{model_name} refused a file:// image, sending images inline from now on: {e}")
+                _file_transport_refused.add(model_name)
+                local_media_path = None
+                continue
             print(f"Error during Vision API call: {e}")
-            retry_count += 1
-            if retry_count < 3:
-                time.sleep(5)
-            else:
-                return ""
-    
-    return ""
+            return ""
 
 
-def run_inference_vision_noimage(
+async def arun_inference_vision_noimage(
     clients,
     model_name: str,
     prompt: str,
     prompt_type: str = "action",
     system_prompt: str = None,
+    until: Optional[Callable[[str], bool]] = None,
 ) -> str:
     """
     Run text-only inference (fallback for vision models).
     
     Args:
-        clients: Dictionary of model name -> OpenAI client
+        clients: Dictionary of model name -> OpenAI or AsyncOpenAI client, or
+            ReplicaSet of a replicated model
         model_name: Model name
         prompt: The prompt text
-        prompt_type: Type of prompt (for logging)
+        prompt_type: Type of prompt (for logging; action calls are hedged)
         system_prompt: Optional system prompt
+        until: Optional test of the answer so far; when given, the answer is
+            streamed and returned as soon as the test passes (e.g. once the
+            action is emitted)
     
     Returns:
         Generated text response
@@ -174,55 +317,104 @@ def run_inference_vision_noimage(
         
         messages.append({"role": "user", "content": [{"type": "text", "text": prompt}]})
         
-        chat_response = client.chat.completions.create(
-            model=model_name,
-            messages=messages,
+        chat_response = await _chat_completion(
+            client, model_name, hedge=prompt_type in HEDGED_PROMPT_TYPES, until=until, messages=messages
         )
         return chat_response.choices[0].message.content.strip()
     
+    except ResponseCacheMiss:
+        raise
     except Exception as e:
         print(f"Error during API call: {e}")
         return ""
 
 
-def run_inference_vision_caption(
+async def arun_inference_vision_caption(
     client, image_path: str, prompt: str, model: str = "gpt-4o-mini"
 ) -> str:
     """
     Run vision inference for captioning (backward compatibility).
     
     Args:
-        client: OpenAI client instance
+        client: OpenAI or AsyncOpenAI client instance
         image_path: Path to the image file
         prompt: The prompt text
         model: Model name
     
     Returns:
-        Generated caption
+        Generated caption, or the error once the model's retry policy gives up
     """
-    base64_image = _encode_image(image_path)
-    while True:
-        try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                },
-                            },
-                        ],
-                    }
-                ],
-                temperature=0.0,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Error during API call: {e}")
-            time.sleep(5)
-            continue
+    image_config = image_url(image_path, get_image_profile(model))
+    try:
+        response = await _chat_completion(
+            client,
+            model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": image_config,
+                        },
+                    ],
+                }
+            ],
+            temperature=0.0,
+        )
+        return response.choices[0].message.content.strip()
+    except ResponseCacheMiss:
+        raise
+    except Exception as e:
+        print(f"Error generating caption for {image_path}: {e}")
+        return f"Failed to generate caption: {str(e)}"
+
+
+# Synchronous API: the coroutines above, run on the shared inference loop so
+# that requests from any number of threads are in flight at once
+
+
+def run_inference_text(
+    clients,
+    model: str,
+    prompt: str,
+    prompt_type: str = "action",
+    system_prompt: str = None,
+    until: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """Blocking arun_inference_text"""
+    return run_sync(arun_inference_text(clients, model, prompt, prompt_type, system_prompt, until))
+
+
+def run_inference_vision(
+    clients,
+    model_name: str,
+    image_path: str,
+    prompt: str,
+    until: Optional[Callable[[str], bool]] = None,
+    prompt_type: str = "action",
+) -> str:
+    """Blocking arun_inference_vision"""
+    return run_sync(arun_inference_vision(clients, model_name, image_path, prompt, until, prompt_type))
+
+
+def run_inference_vision_noimage(
+    clients,
+    model_name: str,
+    prompt: str,
+    prompt_type: str = "action",
+    system_prompt: str = None,
+    until: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """Blocking arun_inference_vision_noimage"""
+    return run_sync(
+        arun_inference_vision_noimage(clients, model_name, prompt, prompt_type, system_prompt, until)
+    )
+
+
+def run_inference_vision_caption(
+    client, image_path: str, prompt: str, model: str = "gpt-4o-mini"
+) -> str:
+    """Blocking arun_inference_vision_caption"""
+    return run_sync(arun_inference_vision_caption(client, image_path, prompt, model))
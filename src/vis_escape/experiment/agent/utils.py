@@ -1,20 +1,18 @@
 import json
 import os
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 from vis_escape.constants import RESULTS_DIR
 from vis_escape.game.manage.game_state import GameState
+from vis_escape.game.manage.room_definition import load_room_definition_from_config
 
 
 def load_game_state_from_config(config_path: str) -> "GameState":
-    """Load game state dynamically from config.py"""
-    import importlib.util
+    """Start a new game of the room defined by config.py.
 
-    spec = importlib.util.spec_from_file_location("config", config_path)
-    config_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(config_module)
-
-    return config_module.game_state
+    The room definition is built once per process and shared by every game.
+    """
+    return load_room_definition_from_config(config_path).new_game()
 
 
 def save_run_history(
@@ -26,7 +24,11 @@ def save_run_history(
     run_start_time: str,
     current_dir: str,
     agent_type: str = None,
+    rewrite: bool = False,
 ):
+    """Append the last entry of run_history to the run's log file, or with
+    `rewrite` write all of run_history (e.g. once entries saved earlier
+    were completed)"""
     if agent_type:
         log_dir = os.path.join(
             RESULTS_DIR,
@@ -52,17 +54,43 @@ def save_run_history(
     filename = f"{log_dir}/run_history_{run_start_time}.json"
 
     existing_history = []
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            existing_history = json.load(f)
+    if rewrite:
+        existing_history = list(run_history)
+    else:
+        if os.path.exists(filename):
+            with open(filename, "r", encoding="utf-8") as f:
+                existing_history = json.load(f)
 
-    if isinstance(run_history, list) and len(run_history) > 0:
-        existing_history.append(run_history[-1])
+        if isinstance(run_history, list) and len(run_history) > 0:
+            existing_history.append(run_history[-1])
 
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(existing_history, f, ensure_ascii=False, indent=2)
 
 
+def action_emitted(available_actions: List[str], ispuzzle: bool = False) -> Callable[[str], bool]:
+    """Test of a streamed agent answer: true once its [ACTION] line names
+    one of available_actions (finished by a newline, or unambiguous: no
+    other action starts with it), or for puzzles once <ANSWER>...</ANSWER>
+    is closed. The agents parse the answer the same way."""
+
+    def emitted(text: str) -> bool:
+        if ispuzzle and "<ANSWER>" in text and "</ANSWER>" in text.split("<ANSWER>")[1]:
+            return True
+        if "[ACTION]" not in text:
+            return False
+        action = text.split("[ACTION]")[1].lstrip().replace(":", "")
+        line, newline, _ = action.partition("\n")
+        line = line.strip()
+        if line not in available_actions:
+            return False
+        return bool(newline) or not any(
+            other != line and other.startswith(line) for other in available_actions
+        )
+
+    return emitted
+
+
 def _parse_spatial_memory(spatial_memory_str: str) -> Dict:
     """Parse the spatial memory string into a structured dictionary.
 
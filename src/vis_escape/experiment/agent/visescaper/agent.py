@@ -1,21 +1,27 @@
-import os
 from typing import List, Optional
 
-from openai import OpenAI
-
 from vis_escape.config.models import get_config
 from vis_escape.experiment.agent.inference import (
     run_inference_text,
     run_inference_vision,
 )
+from vis_escape.experiment.agent.utils import action_emitted
+from vis_escape.llm.clients import model_clients
 
 from .prompt import *
 
 
 class Agent:
-    def __init__(self, model_cfg=None):
+    def __init__(self, model_cfg=None, stream_actions=False):
         self.config = get_config(model_cfg)
-        self.clients = self._get_client()
+        self.clients = model_clients(self.config)
+        # stream action answers and stop reading once the action is emitted
+        self.stream_actions = stream_actions
+
+    def _until(self, available_actions, ispuzzle=False):
+        if not self.stream_actions:
+            return None
+        return action_emitted(available_actions, ispuzzle)
 
     def get_next_action_first_turn(
         self,
@@ -27,19 +33,20 @@ class Agent:
         run_mode: Optional[str] = "socratic",
     ) -> str:
         system_prompt = "Your response should be in the following format: [THINK]Your thought\n[ACTION]Your action"
+        until = self._until(available_actions)
         if run_mode == "socratic":
             prompt = get_prompt_next_action_first_turn(
                 direction, current_scene_desc, inventory, available_actions
             )
             response = run_inference_text(
-                self.clients, model, prompt, "action", system_prompt
+                self.clients, model, prompt, "action", system_prompt, until=until
             )
         else:
             prompt = get_prompt_next_action_first_turn_vlm(
                 direction, current_scene_desc, inventory, available_actions
             )
             response = run_inference_vision(
-                self.clients, model, current_scene_desc, prompt
+                self.clients, model, current_scene_desc, prompt, until=until
             )
             print(response)
         try:
@@ -68,7 +75,7 @@ class Agent:
                             f"Action: [{chosen_action}] Attempt {attempt + 1}: No action found. Retrying..."
                         )
                         response = run_inference_text(
-                            self.clients, model, prompt, "action", system_prompt
+                            self.clients, model, prompt, "action", system_prompt, until=until
                         )
 
             print("All attempts failed. Returning default action.")
@@ -95,6 +102,7 @@ class Agent:
         run_mode: Optional[str] = "socratic",
     ) -> str:
         system_prompt = "Your response should be in the following format: [THINK]Your thought\n[ACTION]Your action"
+        until = self._until(available_actions, ispuzzle)
         if run_mode == "socratic":
             prompt = get_prompt_next_action_withreason(
                 direction,
@@ -109,7 +117,7 @@ class Agent:
                 hint_message,
             )
             response = run_inference_text(
-                self.clients, model, prompt, "action", system_prompt
+                self.clients, model, prompt, "action", system_prompt, until=until
             )
         elif run_mode == "vlm":
             prompt = get_prompt_next_action_withreason_vlm(
@@ -125,7 +133,7 @@ class Agent:
                 hint_message,
             )
             response = run_inference_vision(
-                self.clients, model, current_scene_desc, prompt
+                self.clients, model, current_scene_desc, prompt, until=until
             )
         print("---------------PROMPT------------------")
         print(prompt)
@@ -185,7 +193,7 @@ class Agent:
                             )
                             system_prompt = "Your response should be in the following format: [THINK]Your thought\n[ACTION]Your action"
                             response = run_inference_text(
-                                self.clients, model, prompt, "action", system_prompt
+                                self.clients, model, prompt, "action", system_prompt, until=until
                             )
                 else:
                     if "[ACTION]" in response:
@@ -225,7 +233,7 @@ class Agent:
                         )
                         system_prompt = "Your response should be in the following format: [THINK]Your thought\n[ACTION]Your action"
                         response = run_inference_text(
-                            self.clients, model, prompt, "action", system_prompt
+                            self.clients, model, prompt, "action", system_prompt, until=until
                         )
 
             print("All attempts failed. Returning default action.")
@@ -271,31 +279,3 @@ class Agent:
             self.clients, model, prompt, "memory", system_prompt
         )
         return response
-
-    # Helper
-    def _get_client(self):
-        """
-        Create OpenAI clients for all configured models.
-        Returns a dict mapping model names to OpenAI client instances.
-        """
-        clients = {}
-        
-        for model_name, model_config in self.config["models"].items():
-            if model_config["type"] == "openai":
-                # OpenAI API
-                try:
-                    clients[model_name] = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                except Exception as e:
-                    print(f"Warning: Failed to create OpenAI client for {model_name}: {e}")
-            
-            elif model_config["type"] == "vllm":
-                # vLLM endpoint (OpenAI-compatible)
-                base_url = model_config["base_url"]
-                default_query = model_config.get("args", None)
-                clients[model_name] = OpenAI(
-                    api_key="EMPTY",
-                    base_url=base_url,
-                    default_query=default_query
-                )
-        
-        return clients
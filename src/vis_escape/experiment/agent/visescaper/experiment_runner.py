@@ -2,9 +2,10 @@ import copy
 import os
 import random
 from datetime import datetime
+from typing import Optional
 
-from vis_escape.constants import ASSETS_DIR
-from vis_escape.game.manage.view_manager import ViewManager
+from vis_escape.game.env.escape_env import EscapeEnv
+from vis_escape.llm import response_cache, retry, streaming
 from vis_escape.objects.item import QuizItem
 
 from .. import utils
@@ -12,31 +13,45 @@ from .agent import Agent
 
 
 class AIExperimentRunner:
-    def __init__(self, room_name, model_mapping, run_mode, hint_mode):
+    def __init__(
+        self,
+        room_name,
+        model_mapping,
+        run_mode,
+        hint_mode,
+        env: Optional[EscapeEnv] = None,
+        seed: Optional[int] = None,
+        retry_budget: Optional[int] = retry.DEFAULT_RETRY_BUDGET,
+        stream_actions: bool = False,
+        capture_streams: bool = False,
+    ):
         self.room_name = room_name
         self.model_mapping = model_mapping
         self.run_mode = run_mode
         self.hint_mode = hint_mode
         self.step_count = 0
         self.give_hint_count = 30
-        self.ai_player = Agent()
+        self.ai_player = Agent(stream_actions=stream_actions)
         self.run_history = []
         self.run_start_time = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.current_dir = os.path.dirname(os.path.abspath(__file__))
-        self.current_game_state = utils.load_game_state_from_config(
-            os.path.join(ASSETS_DIR, room_name, "config.py")
-        )
-        self.view_manager = ViewManager(
-            os.path.join(ASSETS_DIR, room_name),
-            self.model_mapping["caption"],
-            self.current_game_state,
-        )
+        # a warm env can be shared by consecutive runs; reset() only restores a snapshot
+        self.env = env or EscapeEnv(room_name, caption_model=self.model_mapping["caption"])
+        self.env.reset()
+        self.current_game_state = self.env.game_state
+        self.view_manager = self.env.view_manager
         self.hint_message_dict = (
             self.current_game_state.hint_message if hint_mode == "hint" else {}
         )
         self.previous_game_state = None
         self.previous_message = None
         self.shuffle_action = True
+        # action order and fallback actions; seeded runs replay identically
+        self.rng = random.Random(seed)
+        # retries of failed requests allowed over the whole experiment
+        self.retry_budget = retry_budget
+        # record the full answers of action streams ended at the action
+        self.capture_streams = capture_streams
         self.previous_scene_path = None
         self.previous_action = None
         self.action_history = []
@@ -48,7 +63,7 @@ class AIExperimentRunner:
         self.currnet_hint_message = ""
         self.given_hints_history = set()
 
-    def save_run_history(self):
+    def save_run_history(self, rewrite=False):
         utils.save_run_history(
             self.run_history,
             self.room_name,
@@ -57,7 +72,8 @@ class AIExperimentRunner:
             self.hint_mode,
             self.run_start_time,
             self.current_dir,
-            "VisEscaper"
+            "VisEscaper",
+            rewrite,
         )
 
     def isquiz(self):
@@ -92,6 +108,19 @@ class AIExperimentRunner:
                 return action
 
     def run_experiment(self, max_steps=300):
+        with response_cache.run_stats() as cache_stats, retry.retry_budget(self.retry_budget) as retries:
+            with streaming.capture_streams(self.capture_streams):
+                experiment_result = self._run_experiment(max_steps)
+        if retries.used:
+            print(f"Retried {retries.used} failed requests")
+        if cache_stats:
+            print(
+                f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                f"{cache_stats['stores']} stored"
+            )
+        return experiment_result
+
+    def _run_experiment(self, max_steps):
         experiment_result = {"success": False, "steps_taken": 0, "reason": "incomplete"}
 
         action_feedback = ""
@@ -106,7 +135,7 @@ class AIExperimentRunner:
             current_location = self.current_game_state.get_current_location()
             available_actions = self.current_game_state.get_available_actions()
             if self.shuffle_action:
-                random.shuffle(available_actions)
+                self.rng.shuffle(available_actions)
             inventory = ", ".join(
                 self.current_game_state.context.get_player_inventory_str()
             )
@@ -199,7 +228,7 @@ class AIExperimentRunner:
                         )
                     )
                 except Exception as e:
-                    action = random.choice(available_actions)
+                    action = self.rng.choice(available_actions)
                     raw_response_action = f"Error in get_next_action_first_turn: {e}"
             else:
                 try:
@@ -225,7 +254,7 @@ class AIExperimentRunner:
                         )
                     )
                 except Exception as e:
-                    action = random.choice(available_actions)
+                    action = self.rng.choice(available_actions)
                     raw_response_action = "Error in get_next_action: {e}"
 
             print("\033[94mACTION: ", action, "\033[0m")
@@ -271,7 +300,7 @@ class AIExperimentRunner:
                     "spatial_memory_raw": (
                         self.spatial_memory if self.spatial_memory else ""
                     ),
-                    "given_hints_history": list(self.given_hints_history),
+                    "given_hints_history": sorted(self.given_hints_history),
                 }
             else:
                 turn_info = {
@@ -295,7 +324,7 @@ class AIExperimentRunner:
                     "spatial_memory_raw": (
                         self.spatial_memory if self.spatial_memory else ""
                     ),
-                    "given_hints_history": list(self.given_hints_history),
+                    "given_hints_history": sorted(self.given_hints_history),
                 }
 
             action_string_salient = self.get_action_string(
@@ -327,6 +356,13 @@ class AIExperimentRunner:
 
             # save spatial memory
             # save run history
+            retries = retry.take_retries()
+            if retries:
+                turn_info["retries"] = retries
+            streams = streaming.take_streams()
+            if streams:
+                # completed as the streams are read; the run's last save has them all
+                turn_info["full_responses"] = streaming.full_texts(streams)
             self.run_history.append(turn_info)
             self.save_run_history()
 
@@ -335,8 +371,8 @@ class AIExperimentRunner:
             
             if self.previous_game_state is not None:
                 if (
-                    self.previous_game_state.context.triggers
-                    == self.current_game_state.context.triggers
+                    self.previous_game_state.context.triggers_hash()
+                    == self.current_game_state.context.triggers_hash()
                 ):
                     self.invalid_step_count += 1
                 else:
@@ -346,7 +382,7 @@ class AIExperimentRunner:
             # current -> previous
             self.previous_scene_path = current_scene_path
             self.previous_action = action
-            self.previous_game_state = copy.deepcopy(self.current_game_state)
+            self.previous_game_state = self.current_game_state.fork()
             self.previous_message = copy.deepcopy(current_message)
 
             if self.current_game_state.check_game_clear():
@@ -368,8 +404,18 @@ class AIExperimentRunner:
                 print(f"Experiment failed: Reached maximum {self.step_count} steps")
                 break
 
+        # retries after the last step belong to it
+        retries = retry.take_retries()
+        if retries and self.run_history:
+            self.run_history[-1].setdefault("retries", []).extend(retries)
+        if self.capture_streams and not streaming.wait_streams():
+            print("Some captured streams did not end, their full responses are incomplete")
+        streams = streaming.take_streams()
+        if streams and self.run_history:
+            self.run_history[-1].setdefault("full_responses", []).extend(streaming.full_texts(streams))
         experiment_summary = {"experiment_summary": experiment_result}
         self.run_history.append(experiment_summary)
-        self.save_run_history()
+        # entries saved before their captured streams ended are rewritten
+        self.save_run_history(rewrite=self.capture_streams)
 
         return experiment_result
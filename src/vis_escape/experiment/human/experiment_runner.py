@@ -1,4 +1,3 @@
-import copy
 import json
 import os
 import tkinter as tk
@@ -7,9 +6,7 @@ from tkinter import ttk
 
 from PIL import Image, ImageTk
 
-from vis_escape.constants import ASSETS_DIR
-from vis_escape.game.manage.game_state import GameState
-from vis_escape.game.manage.view_manager import ViewManager
+from vis_escape.game.env.escape_env import EscapeEnv
 from vis_escape.objects.item import QuizItem
 
 
@@ -32,15 +29,11 @@ class RoomView:
             "reason": "incomplete",
         }
 
-        # Load GameState
-        self.game_state = self.load_game_state_from_config(
-            os.path.join(ASSETS_DIR, room_name, "config.py")
-        )
-
-        # Initialize GameState
-        self.view_manager = ViewManager(
-            os.path.join(ASSETS_DIR, room_name), "", self.game_state, play_mode="human"
-        )
+        # Load GameState and its ViewManager; a new game is env.reset()
+        self.env = EscapeEnv(room_name)
+        self.env.reset()
+        self.game_state = self.env.game_state
+        self.view_manager = self.env.view_manager
 
         # Save previous state (for generating transition msgs)
         self.previous_game_state = None
@@ -49,16 +42,6 @@ class RoomView:
         self.setup_ui()
         self.update_view()
 
-    def load_game_state_from_config(self, config_path: str) -> GameState:
-        """Load gamestate dynamically from config.py"""
-        import importlib.util
-
-        spec = importlib.util.spec_from_file_location("config", config_path)
-        config_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(config_module)
-
-        return config_module.game_state
-
     def save_run_history(self):
         os.makedirs(f"./results/Human/{self.room_name}", exist_ok=True)
         filename = f"./results/Human/{self.room_name}/run_history_{self.run_start_time}.json"
@@ -115,7 +98,7 @@ Good Luck!"""
         self.message_label.config(text=system_message)
 
         # Save current as previous
-        self.previous_game_state = copy.deepcopy(self.game_state)
+        self.previous_game_state = self.game_state.fork()
 
         # Check whether current item is quiz
         # If not key, set puzzle=True
@@ -0,0 +1,60 @@
+from typing import Dict, Optional
+
+TURN_PREFIX = "turn_to_"
+
+
+class Action(str):
+    """Action text with its verb and target parsed once.
+
+    Subclasses str (repr included), so agents, prompts, logs and JSON still
+    see the plain action text.
+
+    "turn_to_north" parses to ("turn_to", "north") and "use Key" to
+    ("use", "Key"). Single-word actions such as "step_back", receptacle
+    actions like "open_first_drawer" and quiz answers are opaque: both verb
+    and target are None.
+    """
+
+    verb: Optional[str]
+    target: Optional[str]
+
+    def __new__(cls, text: str) -> "Action":
+        if isinstance(text, Action):
+            return text
+        action = super().__new__(cls, text)
+        if text.startswith(TURN_PREFIX):
+            action.verb, action.target = "turn_to", text[len(TURN_PREFIX) :]
+        elif " " in text:
+            action.verb, action.target = text.split(" ", 1)
+        else:
+            action.verb, action.target = None, None
+        return action
+
+    @property
+    def text(self) -> str:
+        return str.__str__(self)
+
+
+class ActionRegistry:
+    """Intern table of the actions of one room, shared by all of its games.
+
+    Only actions the game itself offers are interned; free-text input such
+    as quiz answers is parsed on the fly so the table stays bounded.
+    """
+
+    def __init__(self):
+        self._actions: Dict[str, Action] = {}
+
+    def __len__(self) -> int:
+        return len(self._actions)
+
+    def intern(self, text: str) -> Action:
+        action = self._actions.get(text)
+        if action is None:
+            action = self._actions[text] = Action(text)
+        return action
+
+    def parse(self, text: str) -> Action:
+        if isinstance(text, Action):
+            return text
+        return self._actions.get(text) or Action(text)
@@ -1,6 +1,7 @@
 from collections import OrderedDict
-from typing import Dict, Set
+from typing import Dict, Iterable, Set, Tuple
 
+from vis_escape.game.core.state_hash import StateHash, zobrist_key
 from vis_escape.objects.item import Item
 
 
@@ -8,6 +9,36 @@ class GameContext:
     def __init__(self):
         self.player_inventory: Dict[str, Item] = {}
         self.triggers: OrderedDict[str, bool] = {}
+        self._state_hash = StateHash()
+        self._triggers_hash = 0
+        self._inventory_version = 0
+
+    def bind_state_hash(self, state_hash: StateHash, contribute: bool = True):
+        self._state_hash = state_hash
+        if contribute:
+            for item_name in self.player_inventory:
+                state_hash.toggle("inventory", item_name)
+            state_hash.value ^= self._triggers_hash
+
+    @property
+    def inventory_version(self) -> int:
+        """Bumped whenever an item enters or leaves the player inventory"""
+        return self._inventory_version
+
+    def triggers_hash(self) -> int:
+        """Zobrist hash of the trigger dict, for cheap progress checks"""
+        return self._triggers_hash
+
+    def set_trigger(self, trigger_name: str, state: bool = True):
+        if trigger_name in self.triggers:
+            self._toggle_trigger(trigger_name, self.triggers[trigger_name])
+        self.triggers[trigger_name] = state
+        self._toggle_trigger(trigger_name, state)
+
+    def _toggle_trigger(self, trigger_name: str, state: bool):
+        key = zobrist_key("trigger", trigger_name, state)
+        self._triggers_hash ^= key
+        self._state_hash.value ^= key
 
     def get_triggers(self) -> Dict[str, bool]:
         return self.triggers
@@ -28,9 +59,42 @@ class GameContext:
             return ("", False)
 
     def add_to_player_inventory(self, item_name: str, item: Item):
+        if item_name not in self.player_inventory:
+            self._state_hash.toggle("inventory", item_name)
         self.player_inventory[item_name] = item
+        self._inventory_version += 1
+
+    def clone(self) -> "GameContext":
+        cloned = GameContext()
+        cloned.player_inventory = dict(self.player_inventory)
+        cloned.triggers = dict(self.triggers)
+        cloned._triggers_hash = self._triggers_hash
+        cloned._inventory_version = self._inventory_version
+        return cloned
+
+    def restore(
+        self,
+        player_inventory: Iterable[Tuple[str, Item]],
+        triggers: Iterable[Tuple[str, bool]],
+    ):
+        for item_name in self.player_inventory:
+            self._state_hash.toggle("inventory", item_name)
+        self.player_inventory.clear()
+        self.player_inventory.update(player_inventory)
+        for item_name in self.player_inventory:
+            self._state_hash.toggle("inventory", item_name)
+        self._inventory_version += 1
+
+        for trigger_name, state in self.triggers.items():
+            self._toggle_trigger(trigger_name, state)
+        self.triggers.clear()
+        self.triggers.update(triggers)
+        for trigger_name, state in self.triggers.items():
+            self._toggle_trigger(trigger_name, state)
 
     def remove_from_player_inventory(self, item_name: str) -> Item:
         if item_name not in self.player_inventory:
             raise ValueError(f"Item '{item_name}' not found in inventory")
+        self._state_hash.toggle("inventory", item_name)
+        self._inventory_version += 1
         return self.player_inventory.pop(item_name)
@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
 
+from vis_escape.log import get_logger
+
 from .context import GameContext
 
+logger = get_logger(__name__)
+
 
 class TransitionRule(ABC):
     @abstractmethod
@@ -14,8 +18,11 @@ class HasItemRule(TransitionRule):
         self._required_item = required_item
 
     def evaluate(self, context: GameContext) -> bool:
-        print("REQUIRED ITEM: ", self._required_item)
-        print("Inventory: ", context.player_inventory)
+        logger.debug(
+            "required item %s, inventory %s",
+            self._required_item,
+            context.player_inventory,
+        )
         return self._required_item in context.player_inventory
 
     def __str__(self) -> str:
@@ -0,0 +1,29 @@
+import hashlib
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def zobrist_key(*feature) -> int:
+    """Stable pseudo-random 64-bit key for a hashable state feature.
+
+    Derived from the feature itself rather than from a random table, so the
+    same game state hashes identically across processes and runs.
+    """
+    digest = hashlib.blake2b(repr(feature).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class StateHash:
+    """64-bit Zobrist hash shared by the components of one game.
+
+    Each component XORs the keys of its features in and out as they change,
+    so reading the hash is O(1).
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: int = 0):
+        self.value = value
+
+    def toggle(self, *feature):
+        self.value ^= zobrist_key(*feature)
@@ -0,0 +1,74 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.game_state import GameState
+from vis_escape.game.manage.room_definition import load_room_definition
+from vis_escape.game.manage.view_manager import ViewManager
+
+
+class EscapeEnv:
+    """Gym-style single-room environment that is loaded once and reused.
+
+    The room definition, image mappings and captions are loaded in the
+    constructor; reset() only restores the pristine snapshot, so a runner can
+    keep one warm env per room across many episodes.
+
+    Args:
+        room_name: Room directory under assets, e.g. "room1"
+        caption_model: Model whose precomputed captions are returned in the
+            observations; None for no captions (human play mode)
+    """
+
+    def __init__(self, room_name: str, caption_model: Optional[str] = None):
+        self.room_name = room_name
+        self.room = load_room_definition(room_name)
+        self.game_state: GameState = self.room.new_game()
+        self.previous_game_state: GameState = self.room.new_game()
+        self.view_manager = ViewManager(
+            os.path.join(ASSETS_DIR, room_name),
+            caption_model or "",
+            self.game_state,
+            play_mode="ai" if caption_model else "human",
+        )
+        self.step_count = 0
+
+    def reset(self) -> Dict[str, Any]:
+        self.game_state.restore(self.room.initial_snapshot)
+        self.previous_game_state.restore(self.room.initial_snapshot)
+        self.view_manager.reset_message(self.game_state)
+        self.step_count = 0
+        return self._observe()
+
+    def step(self, action: str) -> Tuple[Dict[str, Any], float, bool, Dict[str, Any]]:
+        """Apply an action; returns (observation, reward, done, info).
+
+        reward is 1.0 on the step that clears the room, info["success"] is
+        what GameState.handle_action returned.
+        """
+        self.previous_game_state.restore(self.game_state.snapshot())
+        success = self.game_state.handle_action(action)
+        self.step_count += 1
+        observation = self._observe(action)
+        done = self.game_state.game_clear
+        return observation, float(done), done, {"success": success}
+
+    def action_space(self) -> List[str]:
+        return self.game_state.get_available_actions()
+
+    def _observe(self, action: Optional[str] = None) -> Dict[str, Any]:
+        game_state = self.game_state
+        image_path = self.view_manager.get_current_view_image(
+            game_state, self.previous_game_state if action else None, action
+        )
+        message = self.view_manager.last_message
+        return {
+            "image_path": image_path,
+            "caption": message.get("after_state_message"),
+            "action_message": message.get("action_message", ""),
+            "location": game_state.get_current_location(),
+            "view": game_state.current_view,
+            "inventory": sorted(game_state.context.get_player_inventory_str()),
+            "triggers": dict(game_state.context.triggers),
+            "game_clear": game_state.game_clear,
+        }
@@ -0,0 +1,229 @@
+import functools
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from vis_escape.game.manage.game_state import GameSnapshot, GameState
+from vis_escape.game.manage.room_definition import RoomDefinition, load_room_definition
+from vis_escape.log import quiet
+from vis_escape.objects.item import QuizItem
+
+
+def _quiz_answers(game_state: GameState) -> Tuple[str, ...]:
+    answers = [
+        item_state.game_item.answer
+        for receptacle in game_state._receptacle_states
+        for item_state in receptacle.item_states.values()
+        if isinstance(item_state.game_item, QuizItem)
+    ]
+    return tuple(dict.fromkeys(answers))
+
+
+class _SnapshotPool:
+    """Shares the parts of GameSnapshots across states; a room has few
+    distinct receptacle records but hundreds of thousands of combinations."""
+
+    def __init__(self):
+        self._parts: Dict[object, object] = {}
+
+    def _intern(self, key, value):
+        return self._parts.setdefault(key, value)
+
+    def intern(self, snapshot: GameSnapshot) -> GameSnapshot:
+        receptacles = tuple(
+            # current_state (a dict) is derived from the receptacle's
+            # mutable state, so it is left out of the key
+            self._intern(("receptacle", index, record[0], record[2]), record)
+            for index, record in enumerate(snapshot.receptacles)
+        )
+        return GameSnapshot(
+            view=self._intern(snapshot.view, snapshot.view),
+            game_clear=snapshot.game_clear,
+            # records are interned above, so their ids identify them
+            receptacles=self._intern(tuple(map(id, receptacles)), receptacles),
+            inventory=self._intern(snapshot.inventory, snapshot.inventory),
+            triggers=self._intern(snapshot.triggers, snapshot.triggers),
+        )
+
+
+@dataclass(frozen=True)
+class CompiledRoom:
+    """Reachable dynamics of a room as dense NumPy tables.
+
+    States are the distinct GameState.state_hash() values reachable from the
+    initial state; actions are every action the room offers anywhere plus
+    its quiz answers (typed in ITEM view). For state s and action a,
+    valid[s, a] says whether the object engine would accept a,
+    next_state[s, a] and success[s, a] are what GameState.handle_action
+    returns. Invalid actions leave the state unchanged, as they do in the
+    object engine. Cleared states are terminal and not expanded.
+    """
+
+    room_name: str
+    actions: Tuple[str, ...]
+    next_state: np.ndarray
+    valid: np.ndarray
+    success: np.ndarray
+    clear: np.ndarray
+    state_hashes: np.ndarray
+    snapshots: Tuple[GameSnapshot, ...]
+    answers: Tuple[str, ...] = ()
+    initial_state: int = 0
+
+    @classmethod
+    def from_room(cls, room: RoomDefinition) -> "CompiledRoom":
+        game_state = room.new_game()
+        answers = _quiz_answers(game_state)
+        action_ids: Dict[str, int] = {}
+        state_ids: Dict[int, int] = {game_state.state_hash(): 0}
+        pool = _SnapshotPool()
+        snapshots = [pool.intern(game_state.snapshot())]
+        clear = [game_state.game_clear]
+        edges = []  # per state: [(action_id, next_state_id, success)]
+
+        queue = deque([0])
+        with quiet():
+            while queue:
+                state_id = queue.popleft()
+                state_edges = []
+                edges.append((state_id, state_edges))
+                if clear[state_id]:
+                    continue
+                game_state.restore(snapshots[state_id])
+                actions = game_state.get_available_actions()
+                if game_state.current_view == "ITEM":
+                    actions = list(dict.fromkeys(actions + list(answers)))
+                for action in actions:
+                    action_id = action_ids.setdefault(action, len(action_ids))
+                    game_state.restore(snapshots[state_id])
+                    success = game_state.handle_action(action)
+                    key = game_state.state_hash()
+                    next_id = state_ids.get(key)
+                    if next_id is None:
+                        next_id = state_ids[key] = len(snapshots)
+                        snapshots.append(pool.intern(game_state.snapshot()))
+                        clear.append(game_state.game_clear)
+                        queue.append(next_id)
+                    state_edges.append((action_id, next_id, bool(success)))
+
+        num_states, num_actions = len(snapshots), len(action_ids)
+        next_state = np.repeat(
+            np.arange(num_states, dtype=np.int32)[:, None], num_actions, axis=1
+        )
+        valid = np.zeros((num_states, num_actions), dtype=bool)
+        success = np.zeros((num_states, num_actions), dtype=bool)
+        for state_id, state_edges in edges:
+            for action_id, next_id, succeeded in state_edges:
+                next_state[state_id, action_id] = next_id
+                valid[state_id, action_id] = True
+                success[state_id, action_id] = succeeded
+
+        return cls(
+            room_name=room.name,
+            actions=tuple(action_ids),
+            next_state=next_state,
+            valid=valid,
+            success=success,
+            clear=np.array(clear, dtype=bool),
+            state_hashes=np.array(list(state_ids), dtype=np.uint64),
+            snapshots=tuple(snapshots),
+            answers=answers,
+        )
+
+    @property
+    def num_states(self) -> int:
+        return len(self.snapshots)
+
+    @property
+    def num_actions(self) -> int:
+        return len(self.actions)
+
+    @functools.cached_property
+    def _action_index(self) -> Dict[str, int]:
+        index = {
+            answer.lower(): self.actions.index(answer)
+            for answer in self.answers
+            if answer in self.actions
+        }
+        index.update((action, action_id) for action_id, action in enumerate(self.actions))
+        return index
+
+    def action_id(self, action: str) -> int:
+        """Id of an action text. Quiz answers match case-insensitively, as
+        they do in the object engine; any other text outside the action
+        space is a no-op there and raises ValueError here."""
+        action_id = self._action_index.get(action)
+        if action_id is None:
+            action_id = self._action_index.get(action.lower())
+            if action_id is None or self.actions[action_id] not in self.answers:
+                raise ValueError(
+                    f"Action {action!r} is not in the action space of {self.room_name}"
+                )
+        return action_id
+
+    def game_state(self, state_id: int, room: RoomDefinition) -> GameState:
+        """Rebuild the object-engine GameState for a compiled state id."""
+        game_state = room.new_game()
+        game_state.restore(self.snapshots[state_id])
+        return game_state
+
+
+@functools.lru_cache(maxsize=None)
+def load_compiled_room(room_name: str) -> CompiledRoom:
+    return CompiledRoom.from_room(load_room_definition(room_name))
+
+
+class VecEscapeEnv:
+    """Steps num_envs copies of a room in lockstep on a CompiledRoom.
+
+    step() takes one action id per env and returns (states, rewards, dones,
+    successes). An env that clears the room gets reward 1 and done=True and
+    is reset to the initial state in the same call.
+    """
+
+    def __init__(
+        self,
+        room: Union[str, CompiledRoom],
+        num_envs: int,
+        seed: Optional[int] = None,
+    ):
+        self.room = (
+            room if isinstance(room, CompiledRoom) else load_compiled_room(room)
+        )
+        self.num_envs = num_envs
+        self.num_actions = self.room.num_actions
+        self._initial_state = self.room.initial_state
+        # flat tables: one take() per step instead of 2-D fancy indexing
+        self._next_state = np.ascontiguousarray(self.room.next_state).ravel()
+        self._success = np.ascontiguousarray(self.room.success).ravel()
+        self._clear = self.room.clear
+        self._valid = self.room.valid
+        self._rng = np.random.default_rng(seed)
+        self.states = np.full(num_envs, self._initial_state, dtype=np.int32)
+
+    def reset(self) -> np.ndarray:
+        self.states.fill(self._initial_state)
+        return self.states.copy()
+
+    def action_masks(self) -> np.ndarray:
+        return self._valid[self.states]
+
+    def sample_valid_actions(self) -> np.ndarray:
+        """One uniformly random valid action id per env."""
+        scores = self._rng.random((self.num_envs, self.num_actions))
+        scores[~self.action_masks()] = -1.0
+        return scores.argmax(axis=1).astype(np.int32)
+
+    def step(
+        self, actions: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        flat = self.states * np.intp(self.num_actions) + actions
+        next_states = self._next_state.take(flat)
+        successes = self._success.take(flat)
+        dones = self._clear.take(next_states)
+        rewards = dones.astype(np.float32)
+        next_states[dones] = self._initial_state
+        self.states = next_states
+        return next_states, rewards, dones, successes
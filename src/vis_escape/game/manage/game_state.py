@@ -1,7 +1,10 @@
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
 
+from vis_escape.game.core.action import Action, ActionRegistry
 from vis_escape.game.core.context import GameContext
+from vis_escape.game.core.state_hash import StateHash, zobrist_key
+from vis_escape.log import get_logger
 from vis_escape.objects.item import (
     Item,
     PickableItem,
@@ -9,6 +12,15 @@ from vis_escape.objects.item import (
 )
 from vis_escape.objects.receptacle import Receptacle
 
+logger = get_logger(__name__)
+
+
+def _shallow_copy(obj):
+    # Plain __dict__ copy; copy.copy's reduce protocol dominates fork() cost.
+    cloned = object.__new__(type(obj))
+    cloned.__dict__.update(obj.__dict__)
+    return cloned
+
 
 @dataclass
 class ItemState:
@@ -19,6 +31,7 @@ class ItemState:
         if not isinstance(game_item, Item):
             raise ValueError("ItemState can only manage Item objects")
         self.game_item = game_item
+        self._state_hash = StateHash()
 
 
         if isinstance(game_item, QuizItem):
@@ -29,6 +42,18 @@ class ItemState:
     def get_current_state(self) -> str:
         return self.current_state
 
+    def set_state(self, state: str):
+        if state != self.current_state:
+            name = self.game_item.item_name
+            self._state_hash.toggle("item", name, self.current_state)
+            self._state_hash.toggle("item", name, state)
+            self.current_state = state
+
+    def bind_state_hash(self, state_hash: StateHash, contribute: bool = True):
+        self._state_hash = state_hash
+        if contribute:
+            state_hash.toggle("item", self.game_item.item_name, self.current_state)
+
 
     def get_question_text(self) -> str:
         return self.game_item.question_text
@@ -36,7 +61,7 @@ class ItemState:
     def solve_question(self, try_answer: str) -> bool:
         if isinstance(self.game_item, QuizItem):
             if self.game_item.check_answer(try_answer):
-                self.current_state = "solved"
+                self.set_state("solved")
                 return True
         return False
 
@@ -56,15 +81,15 @@ class ReceptacleState:
                 self.item_states[item.item_name] = ItemState(item)
 
     def get_available_actions(self) -> List[str]:
-        return list(self.game_receptacle.get_actions())
+        return self.game_receptacle.get_ordered_actions()
 
     def get_item_state(self, item_name: str) -> Optional[ItemState]:
         return self.item_states.get(item_name)
 
     def apply_action(self, action: str, context: GameContext) -> bool:
-        if action.startswith("inspect "):
-            item_name = action.split("inspect ")[1]
-            item_state = self.get_item_state(item_name)
+        action = Action(action)
+        if action.verb == "inspect":
+            item_state = self.get_item_state(action.target)
             if item_state:
                 return True
         else:
@@ -79,6 +104,37 @@ class ReceptacleState:
         self.current_state = next_state
         return True
 
+    def snapshot(self) -> tuple:
+        # current_state is replaced on every change, never mutated in place,
+        # so the dict can be shared with the snapshot.
+        return (
+            self.game_receptacle.get_mutable_state(),
+            self.current_state,
+            tuple(item_state.current_state for item_state in self.item_states.values()),
+        )
+
+    def restore(self, record: tuple):
+        mutable_state, current_state, item_states = record
+        if self.game_receptacle.get_mutable_state() != mutable_state:
+            self.game_receptacle.set_mutable_state(mutable_state)
+        self.current_state = current_state
+        for item_state, state in zip(self.item_states.values(), item_states):
+            item_state.set_state(state)
+
+    def bind_state_hash(self, state_hash: StateHash, contribute: bool = True):
+        self.game_receptacle.bind_state_hash(state_hash, contribute)
+        for item_state in self.item_states.values():
+            item_state.bind_state_hash(state_hash, contribute)
+
+    def clone(self) -> "ReceptacleState":
+        cloned = _shallow_copy(self)
+        cloned.game_receptacle = self.game_receptacle.clone()
+        cloned.item_states = {
+            name: _shallow_copy(item_state)
+            for name, item_state in self.item_states.items()
+        }
+        return cloned
+
 
 class WallState:
     def __init__(self, wall_id: str, receptacles: List[ReceptacleState]):
@@ -92,6 +148,13 @@ class WallState:
     def get_receptacle(self, receptacle_id: str) -> Optional[ReceptacleState]:
         return self.receptacles.get(receptacle_id)
 
+    def clone(self) -> "WallState":
+        cloned = _shallow_copy(self)
+        cloned.receptacles = {
+            obj_id: obj.clone() for obj_id, obj in self.receptacles.items()
+        }
+        return cloned
+
     def get_state_snapshot(self) -> dict:
         return {
             "wall_id": self.wall_id,
@@ -101,6 +164,20 @@ class WallState:
         }
 
 
+@dataclass(frozen=True)
+class GameSnapshot:
+    """Mutable part of a GameState, as returned by GameState.snapshot().
+
+    receptacles holds one record per ReceptacleState in wall order.
+    """
+
+    view: Tuple[str, str, Optional[str], Optional[str]]
+    game_clear: bool
+    receptacles: Tuple[tuple, ...]
+    inventory: Tuple[Tuple[str, Item], ...]
+    triggers: Tuple[Tuple[str, bool], ...]
+
+
 class GameState:
     def __init__(self, walls: List[WallState], initial_direction: str = "NORTH"):
         self.walls = {wall.wall_id: wall for wall in walls}
@@ -115,6 +192,105 @@ class GameState:
         self.current_item = None
         self.clear_condition = None
         self.game_clear = False
+        self._action_registry = ActionRegistry()
+        self._actions_cache_key = None
+        self._actions_cache: Tuple[Tuple[str, ...], FrozenSet[str]] = ((), frozenset())
+        self._build_indexes()
+        self._bind_state_hash(StateHash(), contribute=True)
+
+    def _bind_state_hash(self, state_hash: StateHash, contribute: bool):
+        self._state_hash = state_hash
+        self.context.bind_state_hash(state_hash, contribute)
+        for receptacle in self._receptacle_states:
+            receptacle.bind_state_hash(state_hash, contribute)
+
+    def _build_indexes(self):
+        """Index receptacles, their walls and item states by id/name.
+
+        item_states are fixed at room build time (pick_item/remove_item only
+        touch the receptacle's contained items), so the indexes never go stale.
+        First match in wall order wins, as with the previous linear scans.
+        """
+        self._receptacle_states: List[ReceptacleState] = []
+        self._receptacle_index: Dict[str, ReceptacleState] = {}
+        self._receptacle_wall_index: Dict[str, str] = {}
+        self._item_index: Dict[str, ItemState] = {}
+        for wall in self.walls.values():
+            for receptacle in wall.receptacles.values():
+                self._receptacle_states.append(receptacle)
+                receptacle_id = receptacle.game_receptacle.id
+                self._receptacle_index.setdefault(receptacle_id, receptacle)
+                self._receptacle_wall_index.setdefault(receptacle_id, wall.wall_id)
+                for item_state in receptacle.item_states.values():
+                    self._item_index.setdefault(
+                        item_state.game_item.item_name, item_state
+                    )
+
+    def snapshot(self) -> GameSnapshot:
+        """Capture the mutable state only; items, transitions and rules are
+        shared with the room and never copied."""
+        return GameSnapshot(
+            view=(
+                self.current_wall,
+                self.current_view,
+                self.inspected_receptacle,
+                self.current_item,
+            ),
+            game_clear=self.game_clear,
+            receptacles=tuple(
+                receptacle.snapshot() for receptacle in self._receptacle_states
+            ),
+            inventory=tuple(self.context.player_inventory.items()),
+            triggers=tuple(self.context.triggers.items()),
+        )
+
+    def restore(self, snapshot: GameSnapshot):
+        """Roll this state back (or forward) to a snapshot taken from this
+        state or from one of its forks. Unchanged receptacles are skipped."""
+        (
+            self.current_wall,
+            self.current_view,
+            self.inspected_receptacle,
+            self.current_item,
+        ) = snapshot.view
+        self.game_clear = snapshot.game_clear
+        for receptacle, record in zip(self._receptacle_states, snapshot.receptacles):
+            if receptacle.snapshot() != record:
+                receptacle.restore(record)
+        context = self.context
+        if (
+            tuple(context.player_inventory.items()) != snapshot.inventory
+            or tuple(context.triggers.items()) != snapshot.triggers
+        ):
+            context.restore(snapshot.inventory, snapshot.triggers)
+
+    def fork(self) -> "GameState":
+        """Return an independent copy of this game.
+
+        Much cheaper than copy.deepcopy: only the mutable containers are
+        duplicated, the items, transition tables and rules are shared.
+        """
+        forked = _shallow_copy(self)
+        forked.walls = {wall_id: wall.clone() for wall_id, wall in self.walls.items()}
+        forked.context = self.context.clone()
+        forked._build_indexes()
+        forked._bind_state_hash(StateHash(self._state_hash.value), contribute=False)
+        return forked
+
+    def state_hash(self) -> int:
+        """64-bit Zobrist hash of the full game state, maintained incrementally.
+
+        Two states with equal export_current_state(), view, inventory and
+        triggers hash equally; reading it costs O(1).
+        """
+        return self._state_hash.value ^ zobrist_key(
+            "view",
+            self.current_wall,
+            self.current_view,
+            self.inspected_receptacle,
+            self.current_item,
+            self.game_clear,
+        )
 
     def set_hint_message(self, hint_message: str):
         if isinstance(hint_message, dict):
@@ -132,19 +308,18 @@ class GameState:
         return self.hint_message
 
     def get_item_by_name(self, item_name: str) -> Optional[Item]:
-        for wall in self.walls.values():
-            for receptacle in wall.receptacles.values():
-                for item_state in receptacle.item_states.values():
-                    if item_state.game_item.item_name == item_name:
-                        return item_state.game_item
-        return None
+        item_state = self._item_index.get(item_name)
+        return item_state.game_item if item_state else None
 
-    def get_receptacle_by_id(self, receptacle_id: str) -> Optional[Receptacle]:
-        for wall in self.walls.values():
-            for receptacle in wall.receptacles.values():
-                if receptacle.game_receptacle.id == receptacle_id:
-                    return receptacle
-        return None
+    def get_item_state_by_name(self, item_name: str) -> Optional[ItemState]:
+        return self._item_index.get(item_name)
+
+    def get_receptacle_by_id(self, receptacle_id: str) -> Optional[ReceptacleState]:
+        return self._receptacle_index.get(receptacle_id)
+
+    def get_wall_by_receptacle_id(self, receptacle_id: str) -> Optional[WallState]:
+        wall_id = self._receptacle_wall_index.get(receptacle_id)
+        return self.walls[wall_id] if wall_id else None
 
     def export_current_state(self) -> dict:
         state = {"NORTH": {}, "SOUTH": {}, "EAST": {}, "WEST": {}}
@@ -187,6 +362,36 @@ class GameState:
         return self.walls[self.current_wall]
 
     def get_available_actions(self) -> List[str]:
+        return list(self._get_cached_actions()[0])
+
+    def _get_cached_actions(self) -> Tuple[Tuple[Action, ...], FrozenSet[Action]]:
+        """Ordered actions and their set for the current view.
+
+        Recomputed only when the view cursor, the inspected receptacle's
+        version or the inventory version changes; the cache is replaced,
+        never mutated, so forks may share it.
+        """
+        receptacle = None
+        if self.current_view != "WALL" and self.inspected_receptacle:
+            receptacle = self.get_current_wall().get_receptacle(
+                self.inspected_receptacle
+            )
+        key = (
+            self.current_wall,
+            self.current_view,
+            self.inspected_receptacle,
+            self.current_item,
+            receptacle.game_receptacle.version if receptacle else None,
+            self.context.inventory_version,
+        )
+        if key != self._actions_cache_key:
+            intern = self._action_registry.intern
+            actions = [intern(action) for action in self._build_available_actions()]
+            self._actions_cache = (tuple(actions), frozenset(actions))
+            self._actions_cache_key = key
+        return self._actions_cache
+
+    def _build_available_actions(self) -> List[str]:
         actions = []
         wall_directions = ["NORTH", "EAST", "SOUTH", "WEST"]
         current_idx = wall_directions.index(self.current_wall)
@@ -249,9 +454,10 @@ class GameState:
         return turns
 
     def handle_action(self, action: str) -> bool:
+        action = self._action_registry.parse(action)
         result = False
-        if action.startswith("turn_to_"):
-            target_direction = action.split("turn_to_")[1].upper()
+        if action.verb == "turn_to":
+            target_direction = action.target.upper()
             if target_direction == self.current_wall:
                 return False
 
@@ -268,22 +474,22 @@ class GameState:
             return result
 
         if self.current_view == "WALL":
-            if action.startswith("inspect "):
-                receptacle_id = action.split("inspect ")[1]
+            if action.verb == "inspect":
+                receptacle_id = action.target
                 if self.get_current_wall().get_receptacle(receptacle_id):
                     self.current_view = "RECEPTACLE"
                     self.inspected_receptacle = receptacle_id
                     result = True
 
         elif self.current_view == "RECEPTACLE":
-            if action not in self.get_available_actions():
+            if action not in self._get_cached_actions()[1]:
                 return False
             if action == "step_back":
                 self.current_view = "WALL"
                 self.inspected_receptacle = None
                 result = True
-            elif action.startswith("inspect "):
-                item_name = action.split("inspect ")[1]
+            elif action.verb == "inspect":
+                item_name = action.target
                 receptacle = self.get_current_wall().get_receptacle(
                     self.inspected_receptacle
                 )
@@ -295,8 +501,8 @@ class GameState:
                     raise ValueError(
                         f"item {item_name} is not in the receptacle {self.inspected_receptacle}."
                     )
-            elif action.startswith("use "):
-                item_to_use_name = action.split("use ")[1]
+            elif action.verb == "use":
+                item_to_use_name = action.target
                 item_to_use = self.get_item_by_name(item_to_use_name)
                 receptacle = self.get_current_wall().get_receptacle(
                     self.inspected_receptacle
@@ -315,7 +521,7 @@ class GameState:
                 ):
                     if lock_item.solve_question(action):
                         trigger_name = f"used {item_to_use_name}"
-                        self.context.triggers[trigger_name] = True
+                        self.context.set_trigger(trigger_name)
                         result = self._handle_action_on_receptacle(
                             self.inspected_receptacle, action, item_to_use
                         )
@@ -324,19 +530,16 @@ class GameState:
                     current_receptacle = self.get_receptacle_by_id(
                         self.inspected_receptacle
                     )
-                    possible_transitions = (
-                        current_receptacle.game_receptacle.get_total_transitions()
-                    )
-                    if any(t["action"] == action for t in possible_transitions):
+                    if current_receptacle.game_receptacle.has_transition(action):
                         trigger_name = f"used {item_to_use_name}"
-                        self.context.triggers[trigger_name] = True
+                        self.context.set_trigger(trigger_name)
                         result = self._handle_action_on_receptacle(
                             self.inspected_receptacle, action, item_to_use
                         )
 
             else:
-                if " " in action:
-                    item_to_use = self.get_item_by_name(action.split(" ")[1])
+                if action.target is not None:
+                    item_to_use = self.get_item_by_name(action.target)
                 else:
                     item_to_use = None
                 result = self._handle_action_on_receptacle(
@@ -355,13 +558,13 @@ class GameState:
                 self.current_view = "RECEPTACLE"
                 self.current_item = None
                 result = True
-            elif action.startswith("use "):
-                item_to_use_name = action.split("use ")[1]
+            elif action.verb == "use":
+                item_to_use_name = action.target
                 item_to_use = self.get_item_by_name(item_to_use_name)
                 if item_to_use and isinstance(item_state.game_item, QuizItem):
                     if item_state.solve_question(action):
                         trigger_name = f"used {item_to_use_name}"
-                        self.context.triggers[trigger_name] = True
+                        self.context.set_trigger(trigger_name)
                         result = self._handle_action_on_receptacle(
                             self.inspected_receptacle, action, item_to_use
                         )
@@ -372,7 +575,7 @@ class GameState:
             else:
                 if item_state.solve_question(action):
                     trigger_name = f"solved_{self.current_item}"
-                    self.context.triggers[trigger_name] = True
+                    self.context.set_trigger(trigger_name)
                     target_receptacle_id = item_state.game_item.appliable_receptacle
                     target_receptacle = self.get_current_wall().get_receptacle(
                         target_receptacle_id
@@ -382,7 +585,7 @@ class GameState:
                         self.current_view = "RECEPTACLE"
                         self.current_item = None
                     else:
-                        print(f"Error: Can't find {target_receptacle_id}.")
+                        logger.warning("Error: Can't find %s.", target_receptacle_id)
                         result = False
         else:
             raise ValueError(f"Invalid view mode: {self.current_view}")
@@ -405,7 +608,7 @@ class GameState:
                     target_receptacle.current_state["receptacle_state"]
                     == item_to_use.appliable_state
                 ):
-                    self.context.triggers[action] = True
+                    self.context.set_trigger(action)
 
                     return target_receptacle.change_state(item_to_use.after_solve_state)
             else:
@@ -433,7 +636,7 @@ class GameState:
                 == self.clear_condition["state"]
             ):
                 self.game_clear = True
-                print("Game Clear!!")
+                logger.info("Game Clear!!")
                 return True
         return False
 
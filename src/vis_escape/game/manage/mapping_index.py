@@ -0,0 +1,91 @@
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+
+class MappingIndex:
+    """Hash indexes over a room's parsed mapping files (see read_mappings).
+
+    Receptacle images are keyed by (receptacle, state, frozenset(items)) and
+    item images by (item, state); the first matching entry of the file wins,
+    as in a linear scan. Wall scenes are keyed by (wall, tuple of receptacle
+    states); scenes sharing a key keep file order for the item tie-break.
+    """
+
+    def __init__(self, mappings: Dict[str, Dict[str, Any]]):
+        self._wall_mappings = mappings["wall_view"]
+        # wall_id -> receptacle ids -> [(ids in scene, {states: [scenes]})]
+        self._wall_scenes: Dict[str, Dict[Tuple[str, ...], List]] = {}
+
+        self.receptacle_images: Dict[Tuple[str, str, FrozenSet[str]], str] = {}
+        self.receptacles = frozenset(mappings["object_view"])
+        for receptacle_id, mapping_data in mappings["object_view"].items():
+            for scene in mapping_data["scene_states"]:
+                self.receptacle_images.setdefault(
+                    (
+                        receptacle_id,
+                        scene["object_states"]["receptacle_state"],
+                        frozenset(scene["object_states"]["items"]),
+                    ),
+                    scene["image_path"],
+                )
+
+        self.item_images: Dict[Tuple[str, str], str] = {}
+        self.items = frozenset(mappings["item_view"])
+        for item_name, mapping_data in mappings["item_view"].items():
+            for state in mapping_data["item_states"]:
+                self.item_images.setdefault((item_name, state["name"]), state["image_path"])
+
+    def has_wall(self, wall_id: str) -> bool:
+        return wall_id in self._wall_mappings
+
+    def _scene_groups(self, wall_id: str, receptacle_ids: Tuple[str, ...]) -> List:
+        by_receptacles = self._wall_scenes.setdefault(wall_id, {})
+        groups = by_receptacles.get(receptacle_ids)
+        if groups is None:
+            # a scene only constrains the receptacles it lists
+            indexes: Dict[Tuple[str, ...], Dict[Tuple[str, ...], List]] = {}
+            for order, scene in enumerate(self._wall_mappings[wall_id]["scene_states"]):
+                object_states = scene["object_states"]
+                ids = tuple(obj_id for obj_id in receptacle_ids if obj_id in object_states)
+                states = tuple(object_states[obj_id]["receptacle_state"] for obj_id in ids)
+                indexes.setdefault(ids, {}).setdefault(states, []).append((order, scene))
+            groups = by_receptacles[receptacle_ids] = list(indexes.items())
+        return groups
+
+    def wall_image(self, wall_id: str, receptacle_states: Dict[str, Dict[str, Any]]) -> str:
+        """Image stem of the scene matching the wall's receptacle states.
+
+        receptacle_states maps each receptacle of the wall to its
+        {"receptacle_state", "items"}. Several matching scenes are told
+        apart by how many receptacles show exactly the current items, first
+        scene winning ties; no match gives "0".
+        """
+        matching_scenes = []
+        for ids, scenes_by_states in self._scene_groups(wall_id, tuple(receptacle_states)):
+            key = tuple(receptacle_states[obj_id]["receptacle_state"] for obj_id in ids)
+            matching_scenes.extend(scenes_by_states.get(key, ()))
+
+        if not matching_scenes:
+            return "0"
+        if len(matching_scenes) > 1:
+            matching_scenes.sort(key=lambda match: match[0])
+            matching_count = [
+                sum(
+                    1
+                    for obj_id, states in receptacle_states.items()
+                    if obj_id in scene["object_states"]
+                    and set(scene["object_states"][obj_id]["items"]) == set(states["items"])
+                )
+                for _, scene in matching_scenes
+            ]
+            best_scene = matching_scenes[matching_count.index(max(matching_count))][1]
+        else:
+            best_scene = matching_scenes[0][1]
+        return best_scene["image_path"].split(".")[0]
+
+    def receptacle_image(
+        self, receptacle_id: str, receptacle_state: str, items
+    ) -> Optional[str]:
+        return self.receptacle_images.get((receptacle_id, receptacle_state, frozenset(items)))
+
+    def item_image(self, item_name: str, state: str) -> Optional[str]:
+        return self.item_images.get((item_name, state))
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from enum import Enum, auto
 from typing import Optional
 
+from vis_escape.game.core.action import Action
 from vis_escape.game.manage.game_state import GameState
 
 
@@ -56,19 +57,19 @@ class MessageManager:
             transition.target_id = current_state.current_wall
             messages = self._get_turn_message(transition, action)
         elif action_type == ActionType.INSPECT:
-            transition.target_id = action.split(" ")[1]
+            transition.target_id = Action(action).target
             messages = self._get_inspect_message(transition, action)
         elif action_type == ActionType.STEP_BACK:
             transition.target_id = None
             messages = self._get_step_back_message(transition, action)
         elif action_type == ActionType.USE_VALID:
-            transition.target_id = action.split(" ")[1]
+            transition.target_id = Action(action).target
             messages = self._get_use_message(transition, valid=True, action=action)
         elif action_type == ActionType.USE_INVALID:
-            transition.target_id = action.split(" ")[1]
+            transition.target_id = Action(action).target
             messages = self._get_use_message(transition, valid=False, action=action)
         elif action_type == ActionType.PICK:
-            transition.target_id = action.split(" ")[1]
+            transition.target_id = Action(action).target
             messages = self._get_pick_message(transition, action)
         elif action_type == ActionType.RECEPTACLE_ACTION:
             transition.target_id = current_state.current_item
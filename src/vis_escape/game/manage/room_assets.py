@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from vis_escape.game.manage.mapping_index import MappingIndex
+from vis_escape.game.manage.room_bundle import load_room_bundle, read_mappings, scan_images
+
+# view type -> object id -> state -> image path
+ImageManifest = Dict[str, Dict[str, Dict[str, str]]]
+
+
+@dataclass(frozen=True)
+class RoomAssets:
+    """Read-only view assets of one room, shared by every ViewManager.
+
+    Holds the image manifest, the parsed mappings with their MappingIndex and
+    the captions of each caption model. Taken from the room's compiled
+    bundle when it is up to date, otherwise read from the room directory.
+    Nothing here may be mutated; call invalidate_room_assets() after
+    changing a room's files.
+    """
+
+    room_dir: str
+    images: ImageManifest
+    mappings: Dict[str, Dict[str, Any]]
+    mapping_index: MappingIndex
+    _captions: Dict[str, Dict[str, Any]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def load(cls, room_dir: str) -> "RoomAssets":
+        room_dir = os.path.abspath(room_dir)
+        bundle = load_room_bundle(room_dir)
+        if bundle is not None:
+            file_names, mappings = bundle.images, bundle.mappings
+            captions = dict(bundle.captions)
+        else:
+            file_names, mappings = scan_images(room_dir), read_mappings(room_dir)
+            captions = {}
+
+        images = {}
+        for view_type, objects in file_names.items():
+            view_dir = os.path.join(room_dir, "image", view_type)
+            images[view_type] = {}
+            for obj_id, files_by_state in objects.items():
+                obj_dir = os.path.join(view_dir, obj_id)
+                images[view_type][obj_id] = {
+                    state: os.path.join(obj_dir, file_name)
+                    for state, file_name in files_by_state.items()
+                }
+        return cls(room_dir, images, mappings, MappingIndex(mappings), captions)
+
+    def captions_path(self, model_name: str) -> str:
+        return os.path.join(self.room_dir, "captions", model_name, "image_captions.json")
+
+    def captions(self, model_name: str) -> Dict[str, Any]:
+        """Captions of a caption model, read on first use"""
+        captions = self._captions.get(model_name)
+        if captions is None:
+            with open(self.captions_path(model_name), "r") as f:
+                captions = self._captions.setdefault(model_name, json.load(f))
+        return captions
+
+
+_registry: Dict[str, RoomAssets] = {}
+_registry_lock = threading.Lock()
+
+
+def get_room_assets(room_dir: str) -> RoomAssets:
+    """Process-wide RoomAssets of a room directory, loaded on first use"""
+    room_dir = os.path.abspath(room_dir)
+    assets = _registry.get(room_dir)
+    if assets is None:
+        with _registry_lock:
+            assets = _registry.get(room_dir)
+            if assets is None:
+                assets = _registry[room_dir] = RoomAssets.load(room_dir)
+    return assets
+
+
+def invalidate_room_assets(room_dir: Optional[str] = None) -> None:
+    """Drop the shared assets of a room (all rooms if None), so the next
+    ViewManager reloads them from disk. Existing ViewManagers keep theirs."""
+    with _registry_lock:
+        if room_dir is None:
+            _registry.clear()
+        else:
+            _registry.pop(os.path.abspath(room_dir), None)
@@ -0,0 +1,191 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from vis_escape.constants import PROJECT_ROOT
+from vis_escape.game.manage.room_definition import RoomDefinition, exec_config
+
+# Where `vis-escape compile-rooms` writes bundles and runners look for them
+BUNDLE_DIR = os.environ.get(
+    "VIS_ESCAPE_ROOM_CACHE", os.path.join(PROJECT_ROOT, ".cache", "rooms")
+)
+BUNDLE_FORMAT = 1
+VIEW_TYPES = ("wall_view", "object_view", "item_view")
+
+# Pickled definitions are only valid for the engine code that built them
+_ENGINE_DIRS = tuple(
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), package)
+    for package in ("game", "objects")
+)
+
+
+class ConfigFunction:
+    """Picklable stand-in for a function defined in a room's config.py, such
+    as room5's hint_message. The config is executed again on the first call.
+    """
+
+    def __init__(self, config_path: str, name: str):
+        self.config_path = config_path
+        self.name = name
+        self._function = None
+
+    def __call__(self, *args, **kwargs):
+        if self._function is None:
+            self._function = getattr(exec_config(self.config_path), self.name)
+        return self._function(*args, **kwargs)
+
+    def __getstate__(self):
+        return {"config_path": self.config_path, "name": self.name, "_function": None}
+
+
+def scan_images(room_dir: str) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """Image manifest of a room: view type -> object id -> state -> file name"""
+    manifest = {}
+    for view_type in VIEW_TYPES:
+        view_dir = Path(room_dir) / "image" / view_type
+        manifest[view_type] = {
+            object_dir.name: {path.stem: path.name for path in object_dir.glob("*.png")}
+            for object_dir in view_dir.iterdir()
+            if object_dir.is_dir()
+        }
+    return manifest
+
+
+def read_mappings(room_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Parsed mapping files: view type -> object id -> mapping data.
+
+    Files that cannot be parsed are left out, so a lookup treats them as
+    missing, as it did when mappings were read on every lookup.
+    """
+    mappings = {}
+    for view_type in VIEW_TYPES:
+        mappings[view_type] = {}
+        for path in sorted(glob.glob(os.path.join(room_dir, "mapping", view_type, "*.json"))):
+            try:
+                with open(path, "r") as f:
+                    mappings[view_type][Path(path).stem] = json.load(f)
+            except json.JSONDecodeError:
+                continue
+    return mappings
+
+
+def read_captions(room_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Precomputed captions of every caption model: model name -> captions"""
+    captions = {}
+    for path in sorted(glob.glob(os.path.join(room_dir, "captions", "*", "image_captions.json"))):
+        with open(path, "r") as f:
+            captions[os.path.basename(os.path.dirname(path))] = json.load(f)
+    return captions
+
+
+def _walk(directory: str, prefix: str = ""):
+    """Yield (relative path, path) of the files under directory, sorted"""
+    with os.scandir(directory) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.is_dir():
+                if entry.name != "__pycache__":
+                    yield from _walk(entry.path, f"{prefix}{entry.name}/")
+            else:
+                yield f"{prefix}{entry.name}", entry.path
+
+
+@functools.lru_cache(maxsize=None)
+def _engine_digest() -> bytes:
+    digest = hashlib.blake2b(str(BUNDLE_FORMAT).encode())
+    for engine_dir in _ENGINE_DIRS:
+        for relative_path, path in _walk(engine_dir):
+            if relative_path.endswith(".py"):
+                digest.update(relative_path.encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return digest.digest()
+
+
+def room_digest(room_dir: str) -> str:
+    """Content hash of everything a bundle is built from: config.py, mapping
+    and caption files, image file names and the engine source."""
+    digest = hashlib.blake2b(_engine_digest(), digest_size=16)
+    for relative_path, path in _walk(room_dir):
+        if relative_path.endswith(".png"):
+            digest.update(relative_path.encode())
+        elif relative_path.endswith((".py", ".json")):
+            digest.update(relative_path.encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class RoomBundle:
+    """Everything a session needs from a room directory, compiled once.
+
+    Holds the RoomDefinition, the image manifest, the parsed mapping files
+    and the captions of every caption model.
+    """
+
+    name: str
+    digest: str
+    definition: RoomDefinition
+    images: Dict[str, Dict[str, Dict[str, str]]]
+    mappings: Dict[str, Dict[str, Any]]
+    captions: Dict[str, Dict[str, Any]]
+
+    @classmethod
+    def build(cls, room_dir: str) -> "RoomBundle":
+        room_dir = os.path.abspath(room_dir)
+        config_path = os.path.join(room_dir, "config.py")
+        definition = RoomDefinition.from_config(config_path)
+        hint_message = definition.template.hint_message
+        if getattr(hint_message, "__module__", None) == "config":
+            definition.template.hint_message = ConfigFunction(
+                config_path, hint_message.__name__
+            )
+        return cls(
+            name=os.path.basename(room_dir),
+            digest=room_digest(room_dir),
+            definition=definition,
+            images=scan_images(room_dir),
+            mappings=read_mappings(room_dir),
+            captions=read_captions(room_dir),
+        )
+
+
+def bundle_path(room_dir: str, digest: str, bundle_dir: Optional[str] = None) -> str:
+    name = os.path.basename(os.path.abspath(room_dir))
+    return os.path.join(bundle_dir or BUNDLE_DIR, f"{name}-{digest}.pkl")
+
+
+def compile_room(room_dir: str, bundle_dir: Optional[str] = None) -> str:
+    """Write the bundle of a room and remove its stale bundles; returns its path"""
+    bundle = RoomBundle.build(room_dir)
+    path = bundle_path(room_dir, bundle.digest, bundle_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for stale_path in glob.glob(bundle_path(room_dir, "*", bundle_dir)):
+        if stale_path != path:
+            os.remove(stale_path)
+    # write then rename, so a concurrent reader never sees a partial bundle
+    with open(f"{path}.{os.getpid()}.tmp", "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{path}.{os.getpid()}.tmp", path)
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def _read_bundle(path: str) -> RoomBundle:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_room_bundle(room_dir: str, bundle_dir: Optional[str] = None) -> Optional[RoomBundle]:
+    """Compiled bundle of a room, or None if it was not compiled or its
+    inputs changed since. Bundles are read once per process."""
+    path = bundle_path(room_dir, room_digest(room_dir), bundle_dir)
+    if not os.path.exists(path):
+        return None
+    return _read_bundle(path)
@@ -0,0 +1,85 @@
+import functools
+import importlib.util
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from vis_escape.constants import ASSETS_DIR
+from vis_escape.game.manage.game_state import GameSnapshot, GameState
+
+
+def exec_config(config_path: str):
+    """Execute a room's config.py and return it as a module"""
+    spec = importlib.util.spec_from_file_location("config", config_path)
+    config_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config_module)
+    return config_module
+
+
+@dataclass(frozen=True)
+class RoomDefinition:
+    """Static part of a room, built once from assets/roomN/config.py.
+
+    Receptacles, their transition tables, items and rules live in the
+    template game state and are frozen; every session created with
+    new_game() shares them and only owns its mutable state.
+    """
+
+    name: str
+    config_path: str
+    template: GameState
+    initial_snapshot: GameSnapshot
+
+    @classmethod
+    def from_config(cls, config_path: str, name: str = None) -> "RoomDefinition":
+        template: GameState = exec_config(config_path).game_state
+        for receptacle in template._receptacle_states:
+            receptacle.game_receptacle.freeze()
+        return cls(
+            name=name or os.path.basename(os.path.dirname(config_path)),
+            config_path=config_path,
+            template=template,
+            initial_snapshot=template.snapshot(),
+        )
+
+    def new_game(self) -> GameState:
+        """Return a fresh session of this room in its initial state."""
+        return self.template.fork()
+
+    @property
+    def walls(self) -> Dict[str, List[str]]:
+        return {
+            wall_id: list(wall.receptacles)
+            for wall_id, wall in self.template.walls.items()
+        }
+
+    @property
+    def item_names(self) -> Tuple[str, ...]:
+        return tuple(self.template._item_index)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_room_definition(config_path: str, mtime_ns: int) -> RoomDefinition:
+    # room_bundle builds on this module, so it is imported on first load
+    from vis_escape.game.manage.room_bundle import load_room_bundle
+
+    bundle = load_room_bundle(os.path.dirname(config_path))
+    if bundle is not None:
+        return bundle.definition
+    return RoomDefinition.from_config(config_path)
+
+
+def load_room_definition_from_config(config_path: str) -> RoomDefinition:
+    """Process-wide memoised RoomDefinition; reloaded if config.py changes.
+
+    Uses the room's compiled bundle (`vis-escape compile-rooms`) when it is
+    up to date, otherwise executes config.py.
+    """
+    config_path = os.path.abspath(config_path)
+    return _load_room_definition(config_path, os.stat(config_path).st_mtime_ns)
+
+
+def load_room_definition(room_name: str) -> RoomDefinition:
+    return load_room_definition_from_config(
+        os.path.join(ASSETS_DIR, room_name, "config.py")
+    )
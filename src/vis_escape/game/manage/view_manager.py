@@ -1,9 +1,9 @@
-import json
 import os
 import platform
 from pathlib import Path
 from typing import Dict, Optional
 
+from vis_escape.game.core.action import Action
 from vis_escape.game.manage.game_state import (
     GameState,
     ItemState,
@@ -11,6 +11,10 @@ from vis_escape.game.manage.game_state import (
     WallState,
 )
 from vis_escape.game.manage.message_manager import ActionType, MessageManager
+from vis_escape.game.manage.room_assets import get_room_assets
+from vis_escape.log import get_logger
+
+logger = get_logger(__name__)
 
 
 
@@ -21,19 +25,21 @@ class ViewManager:
             room_asset_dir: Directory path to room assets
         """
         self.play_mode = play_mode
-        self.asset_dir = Path(room_asset_dir)
+        self.asset_dir = Path(os.path.abspath(room_asset_dir))
         self.image_dir = self.asset_dir / "image"
         self.mapping_dir = self.asset_dir / "mapping"
+        self.model_name = model_name
+        # image manifest, mapping index and captions are shared process-wide
+        self.assets = get_room_assets(str(self.asset_dir))
         if play_mode == "ai":
-            self.captions_path = (
-                self.asset_dir / "captions" / model_name / "image_captions.json"
-            )
-        self.wall_images: Dict[str, Dict[str, str]] = {}
-        self.object_images: Dict[str, Dict[str, str]] = {}
-        self.item_images: Dict[str, Dict[str, str]] = {}
+            self.captions_path = Path(self.assets.captions_path(model_name))
         self._load_image_mappings()
         self._load_image_captions()
         self.message_manager = MessageManager()
+        self.reset_message(game_state)
+
+    def reset_message(self, game_state: GameState):
+        """Set last_message to the opening message of a (new) game"""
         self.last_message = {
             "action_message": "",
             "after_state_message": self._get_image_caption(
@@ -64,34 +70,15 @@ class ViewManager:
         │   │   └── ...
         │   └── ...
         """
-        # Load wall image
-        walls_dir = self.image_dir / "wall_view"
-        for wall_dir in walls_dir.iterdir():
-            if wall_dir.is_dir():
-                wall_id = wall_dir.name
-                self.wall_images[wall_id] = {
-                    path.stem: str(path) for path in wall_dir.glob("*.png")
-                }
-
-        objects_dir = self.image_dir / "object_view"
-        for obj_dir in objects_dir.iterdir():
-            if obj_dir.is_dir():
-                obj_id = obj_dir.name
-                self.object_images[obj_id] = {
-                    path.stem: str(path) for path in obj_dir.glob("*.png")
-                }
-        objects_dir = self.image_dir / "item_view"
-        for obj_dir in objects_dir.iterdir():
-            if obj_dir.is_dir():
-                obj_id = obj_dir.name
-                self.item_images[obj_id] = {
-                    path.stem: str(path) for path in obj_dir.glob("*.png")
-                }
+        self.wall_images: Dict[str, Dict[str, str]] = self.assets.images["wall_view"]
+        self.object_images: Dict[str, Dict[str, str]] = self.assets.images["object_view"]
+        self.item_images: Dict[str, Dict[str, str]] = self.assets.images["item_view"]
+        self.mappings = self.assets.mappings
+        self.mapping_index = self.assets.mapping_index
 
     def _load_image_captions(self):
         if self.play_mode == "ai":
-            with open(self.captions_path, "r") as f:
-                self.image_captions = json.load(f)
+            self.image_captions = self.assets.captions(self.model_name)
         else:
             self.image_captions = {}
 
@@ -270,99 +257,55 @@ class ViewManager:
             }
             for obj_id, obj in wall_state.receptacles.items()
         }
-        mapping_file = self.mapping_dir / "wall_view" / f"{wall_state.wall_id}.json"
-        with open(mapping_file, "r") as f:
-            mapping_data = json.load(f)
-
-        matching_scenes = []
-        for scene in mapping_data["scene_states"]:
-            states_match = all(
-                scene["object_states"][obj_id]["receptacle_state"]
-                == states["receptacle_state"]
-                for obj_id, states in receptacle_states.items()
-                if obj_id in scene["object_states"]
+        if not self.mapping_index.has_wall(wall_state.wall_id):
+            raise FileNotFoundError(
+                self.mapping_dir / "wall_view" / f"{wall_state.wall_id}.json"
             )
-            if states_match:
-                matching_scenes.append(scene)
-
-        if not matching_scenes:
-            return "0"
-
-        if len(matching_scenes) == 1:
-            return matching_scenes[0]["image_path"].split(".")[0]
-
-        else:
-            matching_count = [0 for _ in range(len(matching_scenes))]
-            best_scene = None
-            for i, scene in enumerate(matching_scenes):
-                for obj_id, states in receptacle_states.items():
-                    if obj_id in scene["object_states"]:
-                        scene_items = set(scene["object_states"][obj_id]["items"])
-                        current_items = set(states["items"])
-                        if scene_items == current_items:
-                            matching_count[i] += 1
-            best_scene_idx = matching_count.index(max(matching_count))
-            best_scene = matching_scenes[best_scene_idx]
-            return best_scene["image_path"].split(".")[0]
+        return self.mapping_index.wall_image(wall_state.wall_id, receptacle_states)
 
     def _encode_receptacle_state(
         self, receptacle_id: str, obj: ReceptacleState
     ) -> Optional[str]:
-        mapping_file = self.mapping_dir / "object_view" / f"{receptacle_id}.json"
-        try:
-            with open(mapping_file, "r") as f:
-                mapping_data = json.load(f)
-
-            current_state = obj.current_state
-            for scene in mapping_data["scene_states"]:
-                if scene["object_states"]["receptacle_state"] == current_state[
-                    "receptacle_state"
-                ] and set(scene["object_states"]["items"]) == set(
-                    current_state["interactable_items"]
-                ):
-                    return scene["image_path"]
-
-            return None
-        except (FileNotFoundError, json.JSONDecodeError):
-            print("object mapping file not found or json decode error")
+        if receptacle_id not in self.mapping_index.receptacles:
+            logger.warning("object mapping file not found or json decode error")
             return None
 
-    def _encode_item_state(self, item_state: ItemState) -> Optional[str]:
-        mapping_file = (
-            self.mapping_dir / "item_view" / f"{item_state.game_item.item_name}.json"
+        current_state = obj.current_state
+        return self.mapping_index.receptacle_image(
+            receptacle_id,
+            current_state["receptacle_state"],
+            current_state["interactable_items"],
         )
-        try:
-            with open(mapping_file, "r") as f:
-                mapping_data = json.load(f)
 
-            current_state = item_state.get_current_state()
-
-            for state in mapping_data["item_states"]:
-                if state["name"] == current_state:
-                    return state["image_path"]
-            return None
-        except (FileNotFoundError, json.JSONDecodeError):
-            print("item mapping file not found or json decode error")
+    def _encode_item_state(self, item_state: ItemState) -> Optional[str]:
+        item_name = item_state.game_item.item_name
+        if item_name not in self.mapping_index.items:
+            logger.warning("item mapping file not found or json decode error")
             return None
+        return self.mapping_index.item_image(item_name, item_state.get_current_state())
 
     def _determine_action_type(
         self, prev_state: GameState, current_state: GameState, action: str
     ) -> ActionType:
-        if action.startswith("turn_to_"):
+        action = Action(action)
+        if action.verb == "turn_to":
             return ActionType.TURN
 
-        if action.startswith("inspect "):
+        if action.verb == "inspect":
             return ActionType.INSPECT
 
         if action == "step_back":
             return ActionType.STEP_BACK
 
-        if action.startswith("use "):
-            if prev_state.context.triggers == current_state.context.triggers:
+        if action.verb == "use":
+            if (
+                prev_state.context.triggers_hash()
+                == current_state.context.triggers_hash()
+            ):
                 return ActionType.USE_INVALID
             return ActionType.USE_VALID
 
-        if action.startswith("pick "):
+        if action.verb == "pick":
             return ActionType.PICK
 
         return ActionType.RECEPTACLE_ACTION
@@ -0,0 +1,92 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_scope = threading.local()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide event loop behind the synchronous inference API.
+
+    It runs in a daemon thread, so any number of threads can have requests
+    in flight on it at once.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="vis_escape-inference", daemon=True
+                )
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+@contextlib.contextmanager
+def cancel_scope(cancelled: threading.Event):
+    """Make run_sync() calls of this thread cancellable through `cancelled`.
+
+    Once it is set, the request in flight is cancelled and this and every
+    later run_sync() in the scope raise asyncio.CancelledError, which, unlike
+    ordinary errors, is not swallowed by the agents' `except Exception`.
+    """
+    previous = getattr(_scope, "cancelled", None)
+    _scope.cancelled = cancelled
+    try:
+        yield cancelled
+    finally:
+        _scope.cancelled = previous
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the inference loop and wait for its result.
+
+    The coroutine sees the caller's context variables. Interrupting the wait
+    (e.g. with Ctrl-C) cancels the coroutine.
+    """
+    loop = get_loop()
+    if _in_loop_thread(loop):
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the inference loop; await instead")
+    cancelled = getattr(_scope, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        coro.close()
+        raise asyncio.CancelledError()
+    future = asyncio.run_coroutine_threadsafe(
+        _in_context(list(contextvars.copy_context().items()), coro), loop
+    )
+    try:
+        if cancelled is not None:
+            while not concurrent.futures.wait([future], timeout=0.05).done:
+                if cancelled.is_set():
+                    future.cancel()
+                    raise asyncio.CancelledError()
+        return future.result()
+    except concurrent.futures.CancelledError:
+        raise asyncio.CancelledError() from None
+    except BaseException:
+        future.cancel()
+        raise
+
+
+async def _in_context(variables, coro):
+    # runs as its own task, so setting the variables does not leak to others
+    for variable, value in variables:
+        variable.set(value)
+    return await coro
+
+
+def _in_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
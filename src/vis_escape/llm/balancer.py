@@ -0,0 +1,159 @@
+import contextlib
+import itertools
+import random
+import threading
+import time
+from typing import Collection, Iterator, List, Optional, Sequence
+
+import openai
+from openai import OpenAI
+
+from vis_escape.log import get_logger
+
+logger = get_logger(__name__)
+
+# Errors that count against a replica's health: it could not be reached or
+# failed to answer. Other errors (bad requests, rate limits) are the
+# request's fault, not the replica's.
+_REPLICA_ERRORS = (openai.APIConnectionError, openai.InternalServerError, TimeoutError)
+
+# Weight of the newest sample in a replica's latency average
+_LATENCY_SMOOTHING = 0.2
+
+
+class Replica:
+    """One server of a replicated model, with its passive health state"""
+
+    def __init__(self, client: OpenAI):
+        self.client = client
+        self.base_url = str(client.base_url)
+        self.outstanding = 0
+        self.latency: Optional[float] = None  # smoothed seconds per request
+        self.failures = 0  # consecutive
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.ejections = 0
+
+    def healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class ReplicaSet:
+    """The servers of a model whose `base_url` in endpoints.yaml is a list,
+    used in place of its client: every request picks a replica by `policy`.
+
+    policy:
+        round-robin: healthy replicas in turn
+        least-outstanding: the healthy replica with the fewest requests in
+            flight from this process (ties in turn)
+        latency-weighted: a healthy replica drawn with probability
+            proportional to 1 / (its smoothed latency x (requests in flight
+            from this process + 1)), i.e. to how soon it should answer
+    eject_after: consecutive failures (connection errors, timeouts, 5xx)
+        after which a replica gets no requests for `eject_for` seconds.
+        Then it gets requests again, and its next failure ejects it again
+        until it answers one.
+
+    When every replica is ejected, the one coming back soonest is used.
+    """
+
+    POLICIES = ("round-robin", "least-outstanding", "latency-weighted")
+
+    def __init__(
+        self,
+        model_name: str,
+        clients: Sequence[OpenAI],
+        policy: str = "round-robin",
+        eject_after: int = 3,
+        eject_for: float = 30.0,
+    ):
+        if not clients:
+            raise ValueError(f"No replicas for model '{model_name}'")
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f"Invalid balancing policy '{policy}' for model '{model_name}', expected one of {self.POLICIES}"
+            )
+        if eject_after < 1 or eject_for < 0:
+            raise ValueError(
+                f"Invalid ejection eject_after={eject_after}, eject_for={eject_for} for model '{model_name}'"
+            )
+        self.model_name = model_name
+        self.replicas: List[Replica] = [Replica(client) for client in clients]
+        self.policy = policy
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """All replicas' URLs: the model's endpoint, for shared limits"""
+        return ",".join(replica.base_url for replica in self.replicas)
+
+    @property
+    def api_key(self) -> str:
+        return self.replicas[0].client.api_key
+
+    def _pick(self, avoid: Collection[Replica] = ()) -> Replica:
+        now = time.monotonic()
+        healthy = [replica for replica in self.replicas if replica.healthy(now)]
+        if len(healthy) > 1 and avoid:
+            healthy = [replica for replica in healthy if replica not in avoid] or healthy
+        if not healthy:
+            return min(self.replicas, key=lambda replica: replica.ejected_until)
+        turn = next(self._turn)
+        if self.policy == "round-robin":
+            return healthy[turn % len(healthy)]
+        if self.policy == "least-outstanding":
+            start = turn % len(healthy)
+            rotated = healthy[start:] + healthy[:start]
+            return min(rotated, key=lambda replica: replica.outstanding)
+        # latency-weighted; replicas not measured yet get the best weight so
+        # that they are tried
+        measured = [replica.latency for replica in healthy if replica.latency]
+        fastest = min(measured) if measured else 1.0
+        weights = [1 / ((replica.latency or fastest) * (replica.outstanding + 1)) for replica in healthy]
+        return random.choices(healthy, weights)[0]
+
+    @contextlib.contextmanager
+    def request(self, avoid: Collection[Replica] = ()) -> Iterator[Replica]:
+        """Pick a replica for one request, other than those in `avoid` when
+        another one is healthy, and record how the request went"""
+        with self._lock:
+            replica = self._pick(avoid)
+            replica.outstanding += 1
+            replica.requests += 1
+        start = time.monotonic()
+        failure = None
+        try:
+            yield replica
+        except _REPLICA_ERRORS as e:
+            failure = e
+            raise
+        else:
+            latency = time.monotonic() - start
+            with self._lock:
+                replica.failures = 0
+                if replica.latency is None:
+                    replica.latency = latency
+                else:
+                    replica.latency += _LATENCY_SMOOTHING * (latency - replica.latency)
+        finally:
+            with self._lock:
+                replica.outstanding -= 1
+                if failure is not None:
+                    self._failed(replica, failure)
+
+    def _failed(self, replica: Replica, error: BaseException):
+        replica.failures += 1
+        if replica.failures >= self.eject_after:
+            replica.ejected_until = time.monotonic() + self.eject_for
+            replica.ejections += 1
+            logger.warning(
+                "Ejected replica %s of %s for %gs after %d failures: %s",
+                replica.base_url,
+                self.model_name,
+                self.eject_for,
+                replica.failures,
+                error,
+            )
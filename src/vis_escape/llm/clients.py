@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from vis_escape.config.models import get_connection_limits
+from vis_escape.llm.balancer import ReplicaSet
+
+_clients: Dict[Tuple, OpenAI] = {}
+_clients_lock = threading.Lock()
+_replica_sets: Dict[Tuple, ReplicaSet] = {}
+# Per event loop: async connections can only be used on the loop they were
+# opened on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, AsyncOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client_key(
+    base_url: Optional[str], api_key: Optional[str], default_query: Optional[Mapping[str, Any]]
+) -> Tuple:
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY") if base_url is None else "EMPTY"
+    if base_url is not None:
+        base_url = str(base_url).rstrip("/")
+    return base_url, api_key, tuple(sorted((default_query or {}).items()))
+
+
+def _new_client(client_class, http_client_class, key: Tuple, model_name: Optional[str]):
+    base_url, api_key, default_query = key
+    limits = httpx.Limits(**get_connection_limits(model_name or ""))
+    return client_class(
+        api_key=api_key,
+        base_url=base_url,
+        default_query=dict(default_query) or None,
+        http_client=http_client_class(limits=limits),
+        # failed requests are retried by the model's RetryPolicy instead
+        max_retries=0,
+    )
+
+
+def get_client(
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    default_query: Optional[Mapping[str, Any]] = None,
+    model_name: Optional[str] = None,
+) -> OpenAI:
+    """The process-wide OpenAI client of an endpoint.
+
+    Clients are shared by every caller in the process (captioning, agents,
+    runners, any thread), so their keep-alive connections are reused instead
+    of every client opening its own. base_url None is the OpenAI API, and
+    api_key None is $OPENAI_API_KEY there and "EMPTY" for other endpoints.
+    The connection limits are those of `model_name`, the first model asking
+    for the endpoint (see get_connection_limits).
+    """
+    key = _client_key(base_url, api_key, default_query)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _new_client(OpenAI, DefaultHttpxClient, key, model_name)
+    return client
+
+
+def get_async_client(
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    default_query: Optional[Mapping[str, Any]] = None,
+    model_name: Optional[str] = None,
+) -> AsyncOpenAI:
+    """get_client() for the running event loop: its AsyncOpenAI client of an
+    endpoint"""
+    key = _client_key(base_url, api_key, default_query)
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = _new_client(AsyncOpenAI, DefaultAsyncHttpxClient, key, model_name)
+    return client
+
+
+def get_replica_set(
+    model_name: str,
+    base_urls: Sequence[str],
+    default_query: Optional[Mapping[str, Any]] = None,
+    policy: str = "round-robin",
+    eject_after: int = 3,
+    eject_for: float = 30.0,
+) -> ReplicaSet:
+    """The process-wide ReplicaSet of a replicated model over the pooled
+    clients of its base URLs.
+
+    Shared like the clients, so that every agent and runner in the process
+    takes turns, counts requests in flight and ejects failing replicas
+    together instead of each balancing its own requests alone.
+    """
+    key = (
+        model_name,
+        tuple(str(base_url).rstrip("/") for base_url in base_urls),
+        tuple(sorted((default_query or {}).items())),
+        policy,
+        eject_after,
+        eject_for,
+    )
+    with _clients_lock:
+        replica_set = _replica_sets.get(key)
+    if replica_set is None:
+        replicas = [
+            get_client(base_url, default_query=default_query, model_name=model_name) for base_url in base_urls
+        ]
+        with _clients_lock:
+            replica_set = _replica_sets.get(key)
+            if replica_set is None:
+                replica_set = _replica_sets[key] = ReplicaSet(
+                    model_name, replicas, policy=policy, eject_after=eject_after, eject_for=eject_for
+                )
+    return replica_set
+
+
+def model_clients(config: Mapping[str, Any]) -> Dict[str, Union[OpenAI, ReplicaSet]]:
+    """Pooled clients of every model in an endpoints configuration (see
+    vis_escape.config.models.get_config), by model name. A model with a list
+    of base URLs gets its shared ReplicaSet (see get_replica_set)."""
+    clients = {}
+    for model_name, model_config in config["models"].items():
+        if model_config["type"] == "openai":
+            try:
+                clients[model_name] = get_client(model_name=model_name)
+            except Exception as e:
+                print(f"Warning: Failed to create OpenAI client for {model_name}: {e}")
+        elif model_config["type"] == "vllm":
+            base_urls = model_config["base_url"]
+            if isinstance(base_urls, str):
+                clients[model_name] = get_client(
+                    base_urls, default_query=model_config.get("args", None), model_name=model_name
+                )
+            else:
+                clients[model_name] = get_replica_set(
+                    model_name,
+                    base_urls,
+                    default_query=model_config.get("args", None),
+                    policy=model_config.get("balancing", "round-robin"),
+                    eject_after=int(model_config.get("eject_after", 3)),
+                    eject_for=float(model_config.get("eject_for", 30.0)),
+                )
+    return clients
+
+
+def close_clients():
+    """Close the pooled synchronous clients and their connections, and drop
+    the replica sets over them"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _replica_sets.clear()
+    for client in clients:
+        client.close()
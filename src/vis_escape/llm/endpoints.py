@@ -0,0 +1,45 @@
+import asyncio
+import weakref
+from typing import Dict, Optional, Union
+
+from openai import AsyncOpenAI, OpenAI
+
+from vis_escape.config.models import get_max_concurrency
+from vis_escape.llm.clients import get_async_client
+
+# Per event loop: semaphores can only be used on the loop they were first
+# used on
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def endpoint_key(client: Union[OpenAI, AsyncOpenAI]) -> str:
+    """Requests to the same endpoint share its concurrency limit"""
+    return str(client.base_url)
+
+
+def async_client(client: Union[OpenAI, AsyncOpenAI], model_name: Optional[str] = None) -> AsyncOpenAI:
+    """AsyncOpenAI counterpart of a client, for the running event loop.
+
+    The agents hold synchronous OpenAI clients; their async twins are the
+    pooled clients of the same endpoint, key and default query (see
+    vis_escape.llm.clients), with the connection limits of `model_name`.
+    """
+    if isinstance(client, AsyncOpenAI):
+        return client
+    return get_async_client(str(client.base_url), client.api_key, client._custom_query or None, model_name)
+
+
+def endpoint_semaphore(client: Union[OpenAI, AsyncOpenAI], model_name: str) -> asyncio.Semaphore:
+    """Semaphore bounding the requests in flight to a client's endpoint.
+
+    The limit is the max_concurrency of the first model seen on the
+    endpoint (see get_max_concurrency).
+    """
+    semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    key = endpoint_key(client)
+    semaphore = semaphores.get(key)
+    if semaphore is None:
+        semaphore = semaphores[key] = asyncio.Semaphore(get_max_concurrency(model_name))
+    return semaphore
@@ -0,0 +1,197 @@
+import asyncio
+import collections
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from vis_escape.log import get_logger
+
+logger = get_logger(__name__)
+
+# Hedging stats of a model are logged every this many calls
+_LOG_EVERY = 100
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When a call to a model is sent a second time.
+
+    percentile: a call still unanswered after this percentile of the
+        model's recent request latencies is sent again, to another replica
+        when the model has several
+    min_samples: latencies measured before any call is hedged
+    window: recent latencies the percentile is taken over
+    """
+
+    percentile: float = 95.0
+    min_samples: int = 20
+    window: int = 200
+
+    def __post_init__(self):
+        if not 0 < self.percentile < 100:
+            raise ValueError(f"Invalid hedge percentile {self.percentile}")
+        if self.min_samples < 1 or self.window < self.min_samples:
+            raise ValueError(f"Invalid hedge min_samples {self.min_samples}, window {self.window}")
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "HedgePolicy":
+        """Policy from the `hedge` section of a model in endpoints.yaml"""
+        names = {field.name for field in fields(cls)}
+        unknown = set(config) - names
+        if unknown:
+            raise ValueError(f"Unknown hedge options {sorted(unknown)}, expected {sorted(names)}")
+        return cls(**config)
+
+
+class Hedger:
+    """Hedges the calls of one model by its HedgePolicy and keeps the
+    latencies the hedging delay is taken from (from a request's dispatch to
+    its answer; a primary request cancelled unanswered counts the time it
+    was out), and the stats logged:
+
+        calls: calls sent through the hedger
+        hedged: calls sent a second time
+        hedge_won: hedged calls answered by the second request first
+        saved: estimated seconds saved by those wins; a won call's
+            primary request is cancelled, so its latency is estimated as
+            the mean of the recent latencies longer than it was out
+    """
+
+    def __init__(self, model_name: str, policy: HedgePolicy):
+        self.model_name = model_name
+        self.policy = policy
+        self.latencies = collections.deque(maxlen=policy.window)
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+
+    def delay(self) -> Optional[float]:
+        """Seconds after which a call is hedged, None until enough latencies
+        are known"""
+        with self._lock:
+            if len(self.latencies) < self.policy.min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.policy.percentile / 100))]
+
+    def _record(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def _saved(self, elapsed: float) -> float:
+        with self._lock:
+            slower = [latency for latency in self.latencies if latency > elapsed]
+        return sum(slower) / len(slower) - elapsed if slower else 0.0
+
+    async def _timed(
+        self,
+        send: Callable[[Callable[[], None]], Awaitable],
+        sent: dict,
+        results: dict,
+        name: str,
+        on_sent: Optional[asyncio.Event] = None,
+    ):
+        def dispatched():
+            sent[name] = time.monotonic()
+            if on_sent is not None:
+                on_sent.set()
+
+        start = time.monotonic()
+        result = await send(dispatched)
+        self._record(time.monotonic() - sent.get(name, start))
+        results["winner"] = name
+        return result
+
+    async def call(self, send: Callable[[Callable[[], None]], Awaitable]):
+        """Await send(dispatched), where send calls dispatched() once its
+        request actually goes out (past the rate limiter and the endpoint's
+        queue); once the model's hedging delay passes after that without an
+        answer, call send() again and return whichever answers first,
+        cancelling the other. A request still waiting for its turn is never
+        hedged. An error of one request is raised only when the other fails
+        too."""
+        delay = self.delay()
+        sent = {}
+        results = {}
+        primary_sent = asyncio.Event()
+        primary = asyncio.ensure_future(self._timed(send, sent, results, "primary", primary_sent))
+        pending = {primary}
+        try:
+            if delay is not None:
+                # the delay starts once the primary is sent, not while it waits
+                waiter = asyncio.ensure_future(primary_sent.wait())
+                try:
+                    await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiter.cancel()
+                if not primary.done():
+                    done, _ = await asyncio.wait(pending, timeout=delay - (time.monotonic() - sent["primary"]))
+                    if not done:
+                        pending.add(asyncio.ensure_future(self._timed(send, sent, results, "hedge")))
+                        self.stats["hedged"] += 1
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            answered = time.monotonic()
+            for task in pending:
+                task.cancel()
+            if pending:
+                # let the losers release their replica, connection and slot
+                await asyncio.gather(*pending, return_exceptions=True)
+            winner = results.get("winner")
+            elapsed = answered - sent["primary"] if "primary" in sent else 0.0
+            self._count(elapsed, winner)
+            if winner == "hedge" and "primary" in sent:
+                # the primary was cancelled unanswered: its time so far is a
+                # lower bound of its latency, kept so the window keeps its tail
+                self._record(elapsed)
+
+    def _count(self, elapsed: float, winner: Optional[str]):
+        self.stats["calls"] += 1
+        if winner == "hedge":
+            self.stats["hedge_won"] += 1
+            self.stats["saved"] += self._saved(elapsed)
+        if self.stats["calls"] % _LOG_EVERY == 0:
+            self.log()
+
+    def log(self):
+        stats = self.stats
+        if not stats["calls"]:
+            return
+        logger.info(
+            "Hedging %s: %d of %d calls hedged (%.1f%%), %d won by the hedge, ~%.1fs saved",
+            self.model_name,
+            stats["hedged"],
+            stats["calls"],
+            100 * stats["hedged"] / stats["calls"],
+            stats["hedge_won"],
+            stats["saved"],
+        )
+
+
+_hedgers: Dict[str, Optional[Hedger]] = {}
+_hedgers_lock = threading.Lock()
+
+
+def configure_hedging(model_name: str, policy: Optional[HedgePolicy]):
+    """Hedge a model's calls by `policy` in this process (None: never),
+    in place of its `hedge` section in endpoints.yaml"""
+    with _hedgers_lock:
+        _hedgers[model_name] = Hedger(model_name, policy) if policy is not None else None
+
+
+def get_hedger(model_name: str, policy: Optional[HedgePolicy]) -> Optional[Hedger]:
+    """The process's Hedger of a model, made from `policy` (its configured
+    HedgePolicy) on first use; None when the model is not hedged"""
+    with _hedgers_lock:
+        if model_name not in _hedgers:
+            _hedgers[model_name] = Hedger(model_name, policy) if policy is not None else None
+            if policy is not None:
+                logger.info("Hedging %s at the p%g of its latency", model_name, policy.percentile)
+        return _hedgers[model_name]
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from vis_escape.llm.image_encoding import DEFAULT_PROFILE, ImageProfile, encode_image_uncached
+from vis_escape.llm.image_pack import read_packed_image
+
+
+class EncodedImageCache:
+    """Bounded LRU cache of encoded observation images.
+
+    Entries are keyed by (absolute path, mtime, size, image profile), so an
+    image that changes on disk is encoded again. The cache holds at most
+    max_entries payloads and max_bytes of payload text. A memory miss is
+    served from the room's image pack (see vis_escape.llm.image_pack) when
+    one was built, then from cache_dir if set, and only then encoded.
+    Payloads encoded here are written to cache_dir, which every process
+    using the same directory shares.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 256 << 20,
+        cache_dir: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.pack_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def _key(image_path: str, profile: ImageProfile) -> Tuple:
+        stat = os.stat(image_path)
+        return (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size, profile.key)
+
+    def _disk_path(self, key: Tuple) -> str:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.b64")
+
+    def _read_disk(self, key: Tuple) -> Optional[str]:
+        try:
+            with open(self._disk_path(key), "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: Tuple, payload: str):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename, so a concurrent reader never sees a partial payload
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def get(self, image_path: str, profile: ImageProfile = DEFAULT_PROFILE) -> str:
+        """Base64 JPEG payload of image_path, encoded at most once"""
+        key = self._key(image_path, profile)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+
+        payload = read_packed_image(key[0], key[1], key[2], profile)
+        if payload is not None:
+            with self._lock:
+                self.pack_hits += 1
+        elif self.cache_dir and (payload := self._read_disk(key)) is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            payload = encode_image_uncached(image_path, profile)
+            with self._lock:
+                self.misses += 1
+            if self.cache_dir:
+                self._write_disk(key, payload)
+        self._put(key, payload)
+        return payload
+
+    def _put(self, key: Tuple, payload: str):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "pack_hits": self.pack_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+# Shared by captioning (vis_escape.utils) and the agents' inference layer
+image_cache = EncodedImageCache(
+    max_entries=int(os.environ.get("VIS_ESCAPE_IMAGE_CACHE_ENTRIES", 4096)),
+    max_bytes=int(os.environ.get("VIS_ESCAPE_IMAGE_CACHE_MB", 256)) << 20,
+    cache_dir=os.environ.get("VIS_ESCAPE_IMAGE_CACHE_DIR") or None,
+)
+
+
+def encode_image(image_path: str, profile: ImageProfile = DEFAULT_PROFILE) -> str:
+    """Base64 JPEG payload of an image through the shared image_cache"""
+    return image_cache.get(image_path, profile)
+
+
+def image_url(
+    image_path: str,
+    profile: ImageProfile = DEFAULT_PROFILE,
+    local_media_path: Optional[str] = None,
+) -> Dict[str, str]:
+    """The image_url part of a chat message for an image under a profile.
+
+    With local_media_path (the server's --allowed-local-media-path, for an
+    endpoint sharing our filesystem) the image is sent as a file:// URL when
+    it lies under that directory and the profile leaves the image as is;
+    otherwise it is sent inline as base64.
+    """
+    url = None
+    if local_media_path and profile.key == DEFAULT_PROFILE.key:
+        path = os.path.realpath(image_path)
+        if path.startswith(os.path.join(os.path.realpath(local_media_path), "")):
+            url = {"url": Path(path).as_uri()}
+    if url is None:
+        url = {"url": f"data:image/jpeg;base64,{encode_image(image_path, profile)}"}
+    if profile.detail:
+        url["detail"] = profile.detail
+    return url
@@ -0,0 +1,88 @@
+import base64
+import io
+from dataclasses import dataclass, fields
+from typing import Any, Mapping, Optional
+
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """How an observation image is encoded before it is sent.
+
+    max_side: longest side in pixels after downscaling (None keeps the size)
+    quality: JPEG quality (None uses PIL's default)
+    grayscale: send a single-channel image
+    detail: OpenAI detail hint ("low", "high" or "auto"; None omits it)
+    """
+
+    max_side: Optional[int] = None
+    quality: Optional[int] = None
+    grayscale: bool = False
+    detail: Optional[str] = None
+
+    DETAILS = ("low", "high", "auto")
+
+    def __post_init__(self):
+        if self.max_side is not None and self.max_side <= 0:
+            raise ValueError(f"Invalid image max_side {self.max_side}")
+        if self.quality is not None and not 1 <= self.quality <= 95:
+            raise ValueError(f"Invalid JPEG quality {self.quality}, expected 1-95")
+        if self.detail is not None and self.detail not in self.DETAILS:
+            raise ValueError(f"Invalid image detail '{self.detail}', expected one of {self.DETAILS}")
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "ImageProfile":
+        """Profile from the `image` section of a model in endpoints.yaml"""
+        names = {field.name for field in fields(cls)}
+        unknown = set(config) - names
+        if unknown:
+            raise ValueError(f"Unknown image profile options {sorted(unknown)}, expected {sorted(names)}")
+        return cls(**config)
+
+    @property
+    def key(self) -> str:
+        """Stable name of the encode params, used in cache and pack keys.
+        detail only affects the request, not the payload, so it is left out."""
+        return (
+            f"side={self.max_side or 'full'},q={self.quality or 'default'},"
+            f"{'gray' if self.grayscale else 'rgb'}"
+        )
+
+    @classmethod
+    def from_key(cls, key: str) -> "ImageProfile":
+        """Inverse of key, e.g. ImageProfile.from_key("side=512,q=85,gray")"""
+        max_side = quality = None
+        grayscale = False
+        for part in key.split(","):
+            name, _, value = part.partition("=")
+            if name == "side" and value != "full":
+                max_side = int(value)
+            elif name == "q" and value != "default":
+                quality = int(value)
+            elif name in ("gray", "rgb") and not value:
+                grayscale = name == "gray"
+            elif name not in ("side", "q"):
+                raise ValueError(f"Invalid image profile '{key}'")
+        return cls(max_side=max_side, quality=quality, grayscale=grayscale)
+
+
+DEFAULT_PROFILE = ImageProfile()
+
+
+def encode_image_uncached(image_path: str, profile: ImageProfile = DEFAULT_PROFILE) -> str:
+    """JPEG/base64 payload of an image, as sent in vision requests"""
+    with Image.open(image_path) as img:
+        mode = "L" if profile.grayscale else "RGB"
+        if img.mode != mode:
+            img = img.convert(mode)
+        if profile.max_side and max(img.size) > profile.max_side:
+            img = img.copy()
+            img.thumbnail((profile.max_side, profile.max_side), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if profile.quality is None:
+            img.save(buffer, format="JPEG")
+        else:
+            img.save(buffer, format="JPEG", quality=profile.quality)
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
@@ -0,0 +1,141 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterable, Optional
+
+from vis_escape.constants import PROJECT_ROOT
+from vis_escape.llm.image_encoding import DEFAULT_PROFILE, ImageProfile, encode_image_uncached
+
+# Where `vis-escape pack-images` writes packs and the image cache looks for them
+PACK_DIR = os.environ.get(
+    "VIS_ESCAPE_IMAGE_PACK_DIR", os.path.join(PROJECT_ROOT, ".cache", "images")
+)
+
+# magic | index offset | index length, followed by the payloads and the JSON index
+PACK_MAGIC = b"VEIMGPK1"
+_HEADER = struct.Struct("<8sQQ")
+
+
+def pack_path(room_dir: str, pack_dir: Optional[str] = None) -> str:
+    return os.path.join(pack_dir or PACK_DIR, f"{os.path.basename(os.path.abspath(room_dir))}.pack")
+
+
+def build_image_pack(
+    room_dir: str,
+    profiles: Iterable[ImageProfile] = (DEFAULT_PROFILE,),
+    pack_dir: Optional[str] = None,
+) -> str:
+    """Encode every image of a room with each profile into the room's pack
+    file; returns its path. The payloads are exactly what encode_image sends.
+    """
+    from vis_escape.game.manage.room_bundle import scan_images
+
+    room_dir = os.path.abspath(room_dir)
+    paths = [
+        os.path.join("image", view_type, obj_id, file_name)
+        for view_type, objects in scan_images(room_dir).items()
+        for obj_id, files_by_state in sorted(objects.items())
+        for file_name in sorted(files_by_state.values())
+    ]
+    index = {"images": {}, "profiles": {}}
+    for rel_path in paths:
+        stat = os.stat(os.path.join(room_dir, rel_path))
+        index["images"][rel_path] = [stat.st_mtime_ns, stat.st_size]
+
+    path = pack_path(room_dir, pack_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(PACK_MAGIC, 0, 0))
+        for profile in profiles:
+            offsets = index["profiles"].setdefault(profile.key, {})
+            for rel_path in paths:
+                payload = encode_image_uncached(os.path.join(room_dir, rel_path), profile)
+                offsets[rel_path] = [f.tell(), len(payload)]
+                f.write(payload.encode("ascii"))
+        index_offset = f.tell()
+        index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, index_offset, len(index_bytes)))
+    # write then rename, so a worker never maps a partial pack
+    os.replace(tmp_path, path)
+    return path
+
+
+class ImagePack:
+    """Read-only, memory-mapped pack of a room's encoded images.
+
+    Payloads are sliced straight out of the mapping, so worker processes
+    reading the same pack share its pages through the OS page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an image pack")
+        index = json.loads(self._mmap[index_offset : index_offset + index_length])
+        self.images: Dict[str, list] = index["images"]
+        self.offsets: Dict[str, Dict[str, list]] = index["profiles"]
+
+    @property
+    def profiles(self):
+        return list(self.offsets)
+
+    def get(self, rel_path: str, mtime_ns: int, size: int, profile: ImageProfile) -> Optional[str]:
+        """Payload of an image, or None if it is not packed for this profile
+        or changed on disk since the pack was built"""
+        offsets = self.offsets.get(profile.key)
+        if offsets is None or rel_path not in offsets:
+            return None
+        if self.images[rel_path] != [mtime_ns, size]:
+            return None
+        offset, length = offsets[rel_path]
+        return self._mmap[offset : offset + length].decode("ascii")
+
+    def close(self):
+        self._mmap.close()
+
+
+_packs: Dict[str, Optional[ImagePack]] = {}
+_packs_lock = threading.Lock()
+
+
+def get_image_pack(room_dir: str) -> Optional[ImagePack]:
+    """Process-wide pack of a room directory, or None if it was not built"""
+    pack = _packs.get(room_dir, False)
+    if pack is False:
+        with _packs_lock:
+            pack = _packs.get(room_dir, False)
+            if pack is False:
+                path = pack_path(room_dir)
+                pack = _packs[room_dir] = ImagePack(path) if os.path.exists(path) else None
+    return pack
+
+
+def invalidate_image_packs() -> None:
+    """Forget the opened packs, so rebuilt packs are mapped on next use"""
+    with _packs_lock:
+        _packs.clear()
+
+
+def read_packed_image(
+    image_path: str, mtime_ns: int, size: int, profile: ImageProfile
+) -> Optional[str]:
+    """Packed payload of a room image (assets/roomN/image/<view>/<obj>/<file>),
+    or None if there is no up-to-date pack entry for it"""
+    obj_dir = os.path.dirname(image_path)
+    image_dir = os.path.dirname(os.path.dirname(obj_dir))
+    if os.path.basename(image_dir) != "image":
+        return None
+    room_dir = os.path.dirname(image_dir)
+    pack = get_image_pack(room_dir)
+    if pack is None:
+        return None
+    return pack.get(os.path.relpath(image_path, room_dir), mtime_ns, size, profile)
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from vis_escape.constants import PROJECT_ROOT
+from vis_escape.log import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are shared between threads only
+    fcntl = None
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_DIR = os.environ.get("VIS_ESCAPE_RATE_LIMIT_DIR") or os.path.join(
+    PROJECT_ROOT, ".cache", "ratelimit"
+)
+
+# tokens and time of the last update
+_STATE = struct.Struct("<dd")
+
+# Completion tokens reserved for a request without max_tokens, until the
+# limiter has seen some answers
+DEFAULT_COMPLETION_TOKENS = 256
+# Seconds of tokens-per-minute refill a tpm bucket holds, so that requests
+# far under the limit do not wait for their own tokens
+TPM_BURST = 10.0
+# Image tokens of a request, by OpenAI detail hint
+_IMAGE_TOKENS = {"low": 85}
+_DEFAULT_IMAGE_TOKENS = 765
+
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in a file, so that every process on the
+    machine opening the same file draws from the same bucket.
+
+    The bucket holds `burst` seconds of its refill, and at least one token,
+    and refills at limit / (60 + max(1, burst)) tokens per second, so no
+    60 s window sees more than `limit` tokens. With no burst it holds a
+    single token and requests are paced evenly just under `limit` per
+    minute, so providers that enforce their limit over shorter windows see
+    no bursts either. Tokens are reserved, not waited for: a reservation
+    may take the bucket into debt and returns how long the caller has to
+    wait for its turn, which keeps callers in order without polling; a
+    request larger than the bucket waits for the refill it lacks.
+    """
+
+    def __init__(self, path: str, limit: float, burst: float = 0.0):
+        if limit <= 0:
+            raise ValueError(f"Invalid rate limit {limit}")
+        if burst < 0:
+            raise ValueError(f"Invalid rate limit burst {burst}")
+        self.path = path
+        self.limit = limit
+        self.rate = limit / (60 + max(1.0, burst))
+        self.capacity = max(1.0, burst * self.rate)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _update(self, amount: float) -> float:
+        """Take `amount` tokens (negative gives them back); returns the
+        bucket's balance afterwards, negative when in debt"""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                state = os.pread(self._fd, _STATE.size, 0)
+                if len(state) == _STATE.size:
+                    tokens, updated = _STATE.unpack(state)
+                    tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+                else:
+                    tokens = self.capacity
+                tokens -= amount
+                os.pwrite(self._fd, _STATE.pack(tokens, now), 0)
+                return tokens
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def reserve(self, amount: float) -> float:
+        """Reserve `amount` tokens; returns the seconds to wait before using them"""
+        return max(0.0, -self._update(amount) / self.rate)
+
+    def refund(self, amount: float):
+        """Give back tokens reserved but not used (negative: take more)"""
+        self._update(-amount)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """The requests-per-minute and tokens-per-minute buckets of one model on
+    one endpoint and API key"""
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        state_dir: str = RATE_LIMIT_DIR,
+    ):
+        self.name = name
+        self.requests = SharedTokenBucket(os.path.join(state_dir, f"{name}.rpm"), rpm) if rpm else None
+        self.tokens = (
+            SharedTokenBucket(os.path.join(state_dir, f"{name}.tpm"), tpm, burst=TPM_BURST) if tpm else None
+        )
+        self.stats = Counter()
+        # running mean of the answers' lengths, reserved for the next ones
+        self.completion_tokens = float(DEFAULT_COMPLETION_TOKENS)
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait for the turn of one request of about `estimated_tokens`"""
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.reserve(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        self.stats["requests"] += 1
+        if wait > 0:
+            self.stats["waits"] += 1
+            self.stats["waited_ms"] += int(wait * 1000)
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated_tokens: int, usage: Any = None):
+        """Correct the token reservation of a request once its usage is known
+        (None: the request failed and used no tokens)"""
+        if self.tokens is None:
+            return
+        if usage is None:
+            self.tokens.refund(estimated_tokens)
+            return
+        self._settle(estimated_tokens, usage.total_tokens, usage.completion_tokens)
+
+    def settle_streamed(self, estimated_tokens: int, prompt_tokens: int, text: str):
+        """settle() for a stream ended early, which reports no usage: the
+        estimated `prompt_tokens` and the `text` streamed, at 4 characters
+        per token (a stream read on in the background uses more)"""
+        if self.tokens is None:
+            return
+        completion_tokens = len(text) // 4
+        self._settle(estimated_tokens, prompt_tokens + completion_tokens, completion_tokens)
+
+    def _settle(self, estimated_tokens: int, total_tokens: int, completion_tokens: int):
+        self.tokens.refund(estimated_tokens - total_tokens)
+        self.completion_tokens += 0.1 * (completion_tokens - self.completion_tokens)
+
+
+def estimate_prompt_tokens(request: Mapping[str, Any]) -> int:
+    """Rough token count of a chat completion request's messages: 4
+    characters per text token and a fixed cost per image"""
+    text = 0
+    images = 0
+    for message in request.get("messages", ()):
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    images += _IMAGE_TOKENS.get(part["image_url"].get("detail"), _DEFAULT_IMAGE_TOKENS)
+                else:
+                    text += len(json.dumps(part.get("text", ""), ensure_ascii=False))
+        else:
+            text += len(json.dumps(content, ensure_ascii=False))
+    return int(text // 4 + images)
+
+
+def estimate_tokens(request: Mapping[str, Any], completion_tokens: float = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Rough token count of a chat completion request and its answer, to
+    reserve before sending it: estimate_prompt_tokens, and max_tokens (or
+    `completion_tokens`) for the answer"""
+    completion = request.get("max_tokens") or request.get("max_completion_tokens") or completion_tokens
+    return int(estimate_prompt_tokens(request) + completion)
+
+
+_limiters: Dict[Tuple, Optional[RateLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    endpoint: str, api_key: Optional[str], model_name: str, rpm: Optional[float], tpm: Optional[float]
+) -> Optional[RateLimiter]:
+    """The process's RateLimiter of a model on an endpoint, None without
+    limits. Processes using the same endpoint, key and model share buckets."""
+    key = (endpoint, api_key, model_name, rpm, tpm)
+    with _limiters_lock:
+        if key not in _limiters:
+            limiter = None
+            if rpm or tpm:
+                digest = hashlib.blake2b(
+                    "\0".join((endpoint, api_key or "", model_name)).encode(), digest_size=12
+                ).hexdigest()
+                limiter = RateLimiter(digest, rpm, tpm)
+                logger.info("Rate limits of %s at %s: rpm=%s tpm=%s", model_name, endpoint, rpm, tpm)
+            _limiters[key] = limiter
+        return _limiters[key]
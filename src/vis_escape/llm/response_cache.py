@@ -0,0 +1,243 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import unquote, urlparse
+
+from openai.types.chat import ChatCompletion
+
+from vis_escape.constants import PROJECT_ROOT
+from vis_escape.log import get_logger
+
+logger = get_logger(__name__)
+
+# off: no cache; read-only: serve hits, never store; read-write: serve hits,
+# store misses; record: always call the model and store the response;
+# replay: serve hits, a miss is an error
+MODES = ("off", "read-only", "read-write", "record", "replay")
+DEFAULT_PATH = os.path.join(PROJECT_ROOT, ".cache", "responses.sqlite")
+
+
+class ResponseCacheMiss(KeyError):
+    """A request that is not in the cache, in replay mode"""
+
+
+class _Run:
+    def __init__(self):
+        self.stats = Counter()
+        # answered requests per request digest
+        self.answered = Counter()
+
+
+_run: contextvars.ContextVar[Optional[_Run]] = contextvars.ContextVar(
+    "response_cache_run", default=None
+)
+
+
+@contextlib.contextmanager
+def run_stats() -> Iterator[Counter]:
+    """Make the requests of this context one run (one experiment): count its
+    cache hits and misses, next to the cache-wide counters, and number the
+    repeats of a request, so each repeat is cached as its own sample and the
+    run replays in order"""
+    run = _Run()
+    token = _run.set(run)
+    try:
+        yield run.stats
+    finally:
+        _run.reset(token)
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _canonical_messages(messages: Any) -> Any:
+    """Messages with file:// images replaced by the digest of their content,
+    so a changed image on disk is a different request"""
+    canonical = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            parts = []
+            for part in content:
+                url = part.get("image_url", {}).get("url", "") if part.get("type") == "image_url" else ""
+                if url.startswith("file://"):
+                    digest = _file_digest(unquote(urlparse(url).path))
+                    part = {**part, "image_url": {**part["image_url"], "url": f"sha256:{digest}"}}
+                parts.append(part)
+            message = {**message, "content": parts}
+        canonical.append(message)
+    return canonical
+
+
+def request_key(model: str, request: Dict[str, Any]) -> str:
+    """Digest of a chat completion request: model, full message list (inline
+    images included) and every sampling parameter. Within a run, the n-th
+    repeat of a request gets the suffix ":n"."""
+    request = {**request, "messages": _canonical_messages(request["messages"])}
+    payload = json.dumps({"model": model, **request}, sort_keys=True, ensure_ascii=False)
+    key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    run = _run.get()
+    repeat = run.answered[key] if run is not None else 0
+    return f"{key}:{repeat}" if repeat else key
+
+
+class ResponseCache:
+    """SQLite cache of chat completions keyed by request_key.
+
+    Safe to share between threads and between processes on one machine
+    (WAL journal). Entries are evicted least recently used first once the
+    stored responses exceed max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, mode: str = "read-write", max_bytes: int = 1 << 30):
+        if mode not in MODES:
+            raise ValueError(f"Invalid response cache mode '{mode}', expected one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._db = None
+        if mode != "off":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)")
+            # running total of the responses' sizes, kept by put and _evict
+            # so that eviction does not sum the table on every put
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._db.execute(
+                "INSERT OR IGNORE INTO meta SELECT 'size', COALESCE(SUM(size), 0) FROM responses"
+            )
+            self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _count(self, event: str):
+        run = _run.get()
+        with self._lock:
+            self.stats[event] += 1
+            if run is not None:
+                run.stats[event] += 1
+
+    @staticmethod
+    def _answered(key: str):
+        run = _run.get()
+        if run is not None:
+            run.answered[key.split(":")[0]] += 1
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        """The cached completion of a request, None on a miss. In record mode
+        every request is a miss; in replay mode a miss raises ResponseCacheMiss."""
+        if self.mode in ("off", "record"):
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.mode != "read-only":
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+        if row is None:
+            self._count("misses")
+            if self.mode == "replay":
+                raise ResponseCacheMiss(f"Request {key[:16]} is not in the response cache {self.path}")
+            return None
+        self._count("hits")
+        self._answered(key)
+        return ChatCompletion.model_validate_json(row[0])
+
+    def put(self, key: str, model: str, completion: ChatCompletion):
+        """Store the model's answer to a request that missed (stored only in
+        read-write and record mode)"""
+        self._answered(key)
+        if self.mode not in ("read-write", "record"):
+            return
+        response = completion.model_dump_json()
+        now = time.time()
+        with self._lock:
+            # a write first, so the transaction holds the write lock before
+            # reading the size of the response it replaces
+            self._db.execute(
+                "UPDATE meta SET value = value + ?"
+                " - COALESCE((SELECT size FROM responses WHERE key = ?), 0) WHERE name = 'size'",
+                (len(response), key),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response), now, now),
+            )
+            self._evict()
+            self._db.commit()
+        self._count("stores")
+
+    def _evict(self):
+        (total,) = self._db.execute("SELECT value FROM meta WHERE name = 'size'").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        evicted = []
+        freed = 0
+        # least recently used first, read only as far as needed
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if freed >= excess:
+                break
+            evicted.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._db.execute("UPDATE meta SET value = value - ? WHERE name = 'size'", (freed,))
+        self.stats["evictions"] += len(evicted)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.RLock()
+
+
+def configure_response_cache(
+    mode: str = "read-write", path: Optional[str] = None, max_mb: Optional[int] = None
+) -> ResponseCache:
+    """Replace the process-wide response cache used by every inference call"""
+    global _cache
+    cache = ResponseCache(
+        path or os.environ.get("VIS_ESCAPE_RESPONSE_CACHE") or DEFAULT_PATH,
+        mode,
+        (max_mb or int(os.environ.get("VIS_ESCAPE_RESPONSE_CACHE_MB", 1024))) << 20,
+    )
+    with _cache_lock:
+        previous, _cache = _cache, cache
+    if previous is not None:
+        previous.close()
+    if cache.enabled:
+        logger.info("Response cache %s (%s)", cache.path, cache.mode)
+    return cache
+
+
+def get_response_cache() -> ResponseCache:
+    """The process-wide response cache, configured from the environment
+    (VIS_ESCAPE_RESPONSE_CACHE_MODE, default off) on first use"""
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                configure_response_cache(os.environ.get("VIS_ESCAPE_RESPONSE_CACHE_MODE", "off"))
+    return _cache
@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import email.utils
+import random
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+import openai
+
+# Retries per experiment when the runner does not set a budget
+DEFAULT_RETRY_BUDGET = 100
+
+# Transient failures of the endpoint; every other error is fatal
+_RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes openai.APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.ConflictError,
+    TimeoutError,  # the model's request timeout
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How failed requests to a model's endpoint are retried.
+
+    max_attempts: attempts per call, the first one included
+    backoff: seconds before the first retry; doubled after every attempt
+        up to max_backoff, and drawn uniformly from [0, that] (full jitter)
+    max_backoff: longest sleep between attempts, unless the server asks
+        for a longer one with Retry-After
+    deadline: seconds a call may take across all its attempts and sleeps
+    """
+
+    max_attempts: int = 5
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    deadline: float = 900.0
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError(f"Invalid retry max_attempts {self.max_attempts}")
+        if self.backoff < 0 or self.max_backoff < self.backoff:
+            raise ValueError(f"Invalid retry backoff {self.backoff}, max_backoff {self.max_backoff}")
+        if self.deadline <= 0:
+            raise ValueError(f"Invalid retry deadline {self.deadline}")
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "RetryPolicy":
+        """Policy from the `retry` section of a model in endpoints.yaml"""
+        names = {field.name for field in fields(cls)}
+        unknown = set(config) - names
+        if unknown:
+            raise ValueError(f"Unknown retry options {sorted(unknown)}, expected {sorted(names)}")
+        return cls(**config)
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """Transient errors (connection failures, timeouts, 408/409/429/5xx)
+        are retried; bad requests, authentication and every other error
+        would fail again and are not"""
+        if isinstance(error, openai.APIStatusError):
+            return isinstance(error, _RETRYABLE_ERRORS) or error.status_code == 408
+        return isinstance(error, _RETRYABLE_ERRORS)
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """Seconds to sleep after the `attempt`-th (1-based) failed attempt"""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds a rate-limited server asked us to wait, if any"""
+    response = getattr(error, "response", None)
+    if response is None or getattr(response, "status_code", None) != 429:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class RetryBudget:
+    """Retries left to one experiment, and the retries not yet reported"""
+
+    def __init__(self, budget: Optional[int] = DEFAULT_RETRY_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def spend(self, event: Dict[str, Any]) -> bool:
+        """Record a retry; False, and nothing recorded, once the budget is spent"""
+        with self._lock:
+            if self.budget is not None and self.used >= self.budget:
+                return False
+            self.used += 1
+            self._events.append(event)
+            return True
+
+    def take(self) -> List[Dict[str, Any]]:
+        """The retries recorded since the last take()"""
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+
+_budget: contextvars.ContextVar[Optional[RetryBudget]] = contextvars.ContextVar(
+    "retry_budget", default=None
+)
+
+
+@contextlib.contextmanager
+def retry_budget(budget: Optional[int] = DEFAULT_RETRY_BUDGET) -> Iterator[RetryBudget]:
+    """Share one retry budget between the requests of this context (one
+    experiment run); None is unlimited"""
+    retries = RetryBudget(budget)
+    token = _budget.set(retries)
+    try:
+        yield retries
+    finally:
+        _budget.reset(token)
+
+
+def take_retries() -> List[Dict[str, Any]]:
+    """The retries of the current run since the last call, for its history"""
+    retries = _budget.get()
+    return retries.take() if retries is not None else []
+
+
+def spend_retry(event: Dict[str, Any]) -> bool:
+    """Record a retry against the current run's budget (always allowed
+    outside a run); False when the budget is spent"""
+    retries = _budget.get()
+    return retries.spend(event) if retries is not None else True
@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+from openai.types.chat import ChatCompletion
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+
+from vis_escape.log import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds the end of a run waits for the captured streams still being read
+DEFAULT_CAPTURE_TIMEOUT = 600.0
+
+
+class CapturedStream:
+    """A stream ended early for its caller and read to its end in the
+    background, for the run history"""
+
+    def __init__(self, model: str, text: str):
+        self.model = model
+        self.text = text  # so far; the full answer once done
+        self.done = threading.Event()
+        self._slots = []
+
+    def _append(self, content: str):
+        self.text += content
+
+    def _finish(self):
+        with _captures_lock:
+            self.done.set()
+            for texts, index in self._slots:
+                texts[index] = self.text
+
+    def _fill(self, texts: List[Optional[str]], index: int):
+        with _captures_lock:
+            texts[index] = self.text
+            if not self.done.is_set():
+                self._slots.append((texts, index))
+
+
+class StreamCaptures:
+    """The streams of one experiment run whose full answers are kept"""
+
+    def __init__(self):
+        self._streams: List[CapturedStream] = []
+        self._new: List[CapturedStream] = []
+
+    def add(self, stream: CapturedStream):
+        with _captures_lock:
+            self._streams.append(stream)
+            self._new.append(stream)
+
+    def take(self) -> List[CapturedStream]:
+        """The streams captured since the last take()"""
+        with _captures_lock:
+            streams, self._new = self._new, []
+        return streams
+
+    def wait(self, timeout: float = DEFAULT_CAPTURE_TIMEOUT) -> bool:
+        """Wait until every captured stream is read; False on timeout"""
+        deadline = time.monotonic() + timeout
+        for stream in list(self._streams):
+            if not stream.done.wait(max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+
+_captures_lock = threading.Lock()
+_captures: contextvars.ContextVar[Optional[StreamCaptures]] = contextvars.ContextVar(
+    "stream_captures", default=None
+)
+# background reads, referenced until they end
+_tails = set()
+
+
+@contextlib.contextmanager
+def capture_streams(enabled: bool = True) -> Iterator[Optional[StreamCaptures]]:
+    """Keep reading the streams of this context (one experiment run) that
+    their caller ended early, to record their full answers; yields None,
+    and streams are closed when ended, unless `enabled`"""
+    captures = StreamCaptures() if enabled else None
+    token = _captures.set(captures)
+    try:
+        yield captures
+    finally:
+        _captures.reset(token)
+
+
+def take_streams() -> List[CapturedStream]:
+    """The streams of the current run captured since the last call"""
+    captures = _captures.get()
+    return captures.take() if captures is not None else []
+
+
+def wait_streams(timeout: float = DEFAULT_CAPTURE_TIMEOUT) -> bool:
+    """Wait until every stream the current run captured is read; False on
+    timeout"""
+    captures = _captures.get()
+    return captures.wait(timeout) if captures is not None else True
+
+
+def full_texts(streams: List[CapturedStream]) -> List[Optional[str]]:
+    """The answers of captured streams, for a run history entry: each is
+    the text read so far and replaced by the full answer once it is read"""
+    texts: List[Optional[str]] = [None] * len(streams)
+    for index, stream in enumerate(streams):
+        stream._fill(texts, index)
+    return texts
+
+
+def _completion(first, model: str, text: str, finish_reason: str, usage) -> ChatCompletion:
+    return ChatCompletion(
+        id=first.id if first is not None else "",
+        created=first.created if first is not None else int(time.time()),
+        model=first.model if first is not None else model,
+        object="chat.completion",
+        choices=[
+            Choice(
+                index=0,
+                message=ChatCompletionMessage(role="assistant", content=text),
+                finish_reason=finish_reason,
+            )
+        ],
+        usage=usage,
+    )
+
+
+async def stream_completion(client, model: str, until: Callable[[str], bool], **kwargs) -> ChatCompletion:
+    """Stream a chat completion and return it as soon as until(text so far)
+    is true, or once it ends.
+
+    A stream ended early is closed, which makes vLLM stop generating it, or,
+    when the current run captures streams, read to its end in the
+    background. Either way the completion returned holds the text up to
+    that point and no usage.
+    """
+    stream = await client.chat.completions.create(
+        model=model, stream=True, stream_options={"include_usage": True}, **kwargs
+    )
+    first = None
+    text = ""
+    finish_reason = "stop"
+    usage = None
+    try:
+        async for chunk in stream:
+            first = first or chunk
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason is not None:
+                finish_reason = choice.finish_reason
+            if choice.delta.content:
+                text += choice.delta.content
+                if until(text):
+                    break
+        else:
+            return _completion(first, model, text, finish_reason, usage)
+    except BaseException:
+        await stream.close()
+        raise
+
+    captures = _captures.get()
+    if captures is None:
+        await stream.close()
+    else:
+        captured = CapturedStream(model, text)
+        captures.add(captured)
+        tail = asyncio.ensure_future(_read_tail(stream, captured))
+        _tails.add(tail)
+        tail.add_done_callback(_tails.discard)
+    return _completion(first, model, text, "stop", None)
+
+
+async def _read_tail(stream, captured: CapturedStream):
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                captured._append(chunk.choices[0].delta.content)
+    except Exception as e:
+        logger.warning("Lost the end of a captured %s stream: %s", captured.model, e)
+    finally:
+        await stream.close()
+        captured._finish()
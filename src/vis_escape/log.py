@@ -0,0 +1,69 @@
+"""Logging for the game engine.
+
+Engine messages go to the "vis_escape" logger tree instead of print(). By
+default INFO and above ("Picked Key", "Game Clear!!") are written to stdout
+as before, while DEBUG (rule and answer checks) is off; a disabled call costs
+a level check and never formats its arguments. Set VIS_ESCAPE_LOG_LEVEL to
+change the default level, and use quiet() around bulk rollouts.
+"""
+
+import contextlib
+import logging
+import os
+import sys
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+
+ROOT_LOGGER = "vis_escape"
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to the current sys.stdout, so redirect_stdout still captures it"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _configure_root() -> logging.Logger:
+    logger = logging.getLogger(ROOT_LOGGER)
+    handler = _StdoutHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get("VIS_ESCAPE_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    return logger
+
+
+_root = _configure_root()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for a vis_escape module, e.g. get_logger(__name__)"""
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
+
+
+def set_level(level) -> None:
+    _root.setLevel(level)
+
+
+@contextlib.contextmanager
+def quiet(level=WARNING):
+    """Engine quiet mode: only messages at `level` and above are emitted"""
+    previous = _root.level
+    _root.setLevel(level)
+    try:
+        yield
+    finally:
+        _root.setLevel(previous)
@@ -1,5 +1,9 @@
 from typing import List
 
+from vis_escape.log import get_logger
+
+logger = get_logger(__name__)
+
 
 class Item:
     def __init__(
@@ -131,8 +135,7 @@ class QuizItem(Item):
         return [f"inspect {self._item_name}"]
 
     def check_answer(self, try_answer: str) -> bool:
-        print("Checking answer: ", try_answer)
-        print("Answer: ", self._answer)
+        logger.debug("checking answer %r against %r", try_answer, self._answer)
         return self._answer.lower() == try_answer.lower()
 
     def answer_correct(self):
@@ -1,11 +1,16 @@
 from typing import Dict, List, Optional, Set
 
+from vis_escape.game.core.action import Action
 from vis_escape.game.core.context import GameContext
 from vis_escape.game.core.rules import TransitionRule
-from vis_escape.objects.items.lock.non_key_lock import NonKeyLock
+from vis_escape.game.core.state_hash import StateHash, zobrist_key
+from vis_escape.log import get_logger
+from vis_escape.objects.transition_table import TransitionTable
 
 from .item import Item
 
+logger = get_logger(__name__)
+
 
 class Receptacle:
     def __init__(
@@ -19,22 +24,38 @@ class Receptacle:
         self._possible_states = possible_states
         self._current_state = initial_state
         self._interactable_states = interactable_states
+        self._initial_interactable_states = dict(interactable_states)
         self._contained_items = set(interactable_states.keys())
         self._transitions: Dict[str, Dict[str, tuple[str, TransitionRule]]] = {}
+        self._transition_table: Optional[TransitionTable] = None
+        self._frozen = False
+        self._version = 0
+        self._full_state: Optional[dict] = None
+        self._full_state_version = -1
+        self._state_hash = StateHash()
+        self._hash = self._feature_hash()
 
     def add_transition(
         self, from_state: str, action: str, to_state: str, rule: TransitionRule
     ):
+        if self._frozen:
+            raise ValueError(
+                f"Receptacle {self._id} is frozen; its transitions are shared by all sessions"
+            )
         if from_state not in self._transitions:
             self._transitions[from_state] = {}
         self._transitions[from_state][action] = (to_state, rule)
+        self._transition_table = None
 
     def add_item(self, item: Item) -> bool:
         self._contained_items.add(item)
+        self._rehash()
         return True
 
     def remove_item(self, item: Item) -> bool:
-        self._contained_items.discard(item)
+        if item in self._contained_items:
+            self._contained_items.discard(item)
+            self._rehash()
         return True
 
     @property
@@ -62,64 +83,146 @@ class Receptacle:
                 )
         return transitions
 
-    def get_interactable_items_in_current_state(self):
-        interactable_items_in_currnet_state = set()
-        for item, interactable_state in self._interactable_states.items():
-            if self._current_state in interactable_state:
-                interactable_items_in_currnet_state.add(item)
+    @property
+    def transition_table(self) -> TransitionTable:
+        """Compiled transitions; built by freeze(), or on first use."""
+        if self._transition_table is None:
+            self._transition_table = TransitionTable.compile(self)
+        return self._transition_table
+
+    def has_transition(self, action: str) -> bool:
+        return self.transition_table.has_action(action)
 
-        return list(interactable_items_in_currnet_state)
+    @property
+    def version(self) -> int:
+        """Bumped on every change to the state, contained or interactable items."""
+        return self._version
+
+    def _is_interactable(self, item: Item) -> bool:
+        states = self._interactable_states.get(item)
+        return states is not None and self._current_state in states
+
+    def get_interactable_items_in_current_state(self):
+        return [
+            item
+            for item, interactable_state in self._interactable_states.items()
+            if self._current_state in interactable_state
+        ]
 
     def get_actions(self) -> Set[str]:
-        base_actions = set(self._transitions.get(self._current_state, {}).keys())
-        for item in self._contained_items:
+        return set(self.get_ordered_actions())
+
+    def get_ordered_actions(self) -> List[str]:
+        """Actions in transition order, then interactable items in room order."""
+        actions = list(self._transitions.get(self._current_state, {}))
+        for item, interactable_state in self._interactable_states.items():
             if (
-                item in self._interactable_states
-                and self._current_state in self._interactable_states[item]
+                item in self._contained_items
+                and self._current_state in interactable_state
             ):
-                base_actions.update(item.get_actions())
-        return base_actions
+                actions.extend(item.get_actions())
+        return list(dict.fromkeys(actions))
 
     @property
     def current_state(self) -> str:
         return self._current_state
 
     def set_current_state(self, state: str):
-        self._current_state = state
+        self._move_to(state)
         return self.get_full_state()
 
+    def _move_to(self, state: str):
+        self._current_state = state
+        self._rehash()
+
+    def _feature_hash(self) -> int:
+        value = zobrist_key("receptacle", self._id, self._current_state)
+        for item in self._contained_items:
+            value ^= zobrist_key("contains", self._id, item.item_name)
+        for item in self._interactable_states:
+            value ^= zobrist_key("interactable", self._id, item.item_name)
+        return value
+
+    def _rehash(self):
+        """Swap this receptacle's features in the shared game hash."""
+        new_hash = self._feature_hash()
+        self._state_hash.value ^= self._hash ^ new_hash
+        self._hash = new_hash
+        self._version += 1
+
+    def bind_state_hash(self, state_hash: StateHash, contribute: bool = True):
+        self._state_hash = state_hash
+        if contribute:
+            state_hash.value ^= self._hash
+
     def get_full_state(self) -> dict:
-        return {
-            "receptacle_state": self._current_state,
-            "interactable_items": sorted(
-                item.item_name
-                for item in self.get_interactable_items_in_current_state()
-            ),
-            "contained_items": sorted(
-                [item._item_name for item in self._contained_items]
-            ),
-        }
+        # Rebuilt only after a change; the dict is shared, do not mutate it.
+        if self._full_state_version != self._version:
+            self._full_state = {
+                "receptacle_state": self._current_state,
+                "interactable_items": sorted(
+                    item.item_name
+                    for item in self.get_interactable_items_in_current_state()
+                ),
+                "contained_items": sorted(
+                    [item._item_name for item in self._contained_items]
+                ),
+            }
+            self._full_state_version = self._version
+        return self._full_state
+
+    def freeze(self):
+        """Mark the static definition (states, transitions) as read-only."""
+        self._possible_states = frozenset(self._possible_states)
+        self._transition_table = TransitionTable.compile(self)
+        self._frozen = True
+
+    def get_mutable_state(self) -> tuple:
+        """Return (current state, contained items, interactable items) as an
+        immutable record; transitions, rules and items are not included."""
+        return (
+            self._current_state,
+            frozenset(self._contained_items),
+            frozenset(self._interactable_states),
+        )
+
+    def set_mutable_state(self, mutable_state: tuple):
+        current_state, contained_items, interactable_items = mutable_state[:3]
+        self._current_state = current_state
+        if self._contained_items != contained_items:
+            self._contained_items = set(contained_items)
+        if self._interactable_states.keys() != interactable_items:
+            self._interactable_states = {
+                item: states
+                for item, states in self._initial_interactable_states.items()
+                if item in interactable_items
+            }
+        self._rehash()
+
+    def clone(self) -> "Receptacle":
+        """Copy that shares transitions, rules and items but owns its state."""
+        cloned = object.__new__(type(self))
+        cloned.__dict__.update(self.__dict__)
+        cloned._contained_items = set(self._contained_items)
+        cloned._interactable_states = dict(self._interactable_states)
+        return cloned
 
     def pick_item(self, item_name: str, context: GameContext) -> Optional[Item]:
-        interactable_items_str = [
-            item.item_name for item in self.get_interactable_items_in_current_state()
-        ]
-        if item_name not in interactable_items_str:
+        item = self.transition_table.items_by_name.get(item_name)
+        if item is None or not self._is_interactable(item):
             return None
 
-        for item in self.get_interactable_items_in_current_state():
-            if item.item_name == item_name:
-                self._contained_items.remove(item)
-                self._interactable_states.pop(item)
+        self._contained_items.remove(item)
+        self._interactable_states.pop(item)
+        self._rehash()
 
-                # trigger handling
-                trigger_name = f"picked_{item.item_name}"
-                context.triggers[trigger_name] = True
+        # trigger handling
+        trigger_name = f"picked_{item.item_name}"
+        context.set_trigger(trigger_name)
 
-                # inventory update
-                context.add_to_player_inventory(item_name, item)
-                return item
-        return None
+        # inventory update
+        context.add_to_player_inventory(item_name, item)
+        return item
 
     def use_item(self, item_name: str, context: GameContext) -> Optional[Item]:
         if item_name not in context.get_player_inventory_str():
@@ -132,61 +235,55 @@ class Receptacle:
                     and self.current_state == v.appliable_state
                 ):
                     trigger_name = f"used_{item_name}"
-                    context.triggers[trigger_name] = True
+                    context.set_trigger(trigger_name)
         item = context.remove_from_player_inventory(item_name)
         return item
 
     def handle_action(self, action: str, context: GameContext) -> str:
-        interactable_items = self.get_interactable_items_in_current_state()
-        for item in interactable_items:
-            if isinstance(item, NonKeyLock):
-                if item.answer.lower() == action.lower():
-                    next_state, rule = self._transitions[self._current_state]["unlock"]
-                    self._current_state = next_state
-                    return self.get_full_state()
-
-        if " " in action:
-            action_type = action.split(" ")[0]
-            target_item_name = action.split(" ")[1]
+        action = Action(action)
+        table = self.transition_table
+        for lock in table.lock_answers.get(action.lower(), ()):
+            if self._is_interactable(lock):
+                transition = table.lookup(self._current_state, "unlock")
+                if transition is None:
+                    raise ValueError(
+                        f"Error: {self._id} has no unlock transition "
+                        f"from {self._current_state}"
+                    )
+                self._move_to(transition[0])
+                return self.get_full_state()
+
+        transition = table.lookup(self._current_state, action)
+        if action.target is not None:
+            action_type = action.verb
+            target_item_name = action.target
             if action_type == "pick":
-                interactable_items_str = [
-                    item.item_name
-                    for item in self.get_interactable_items_in_current_state()
-                ]
-                if target_item_name in interactable_items_str:
-                    item = self.pick_item(target_item_name, context)
-                    print(f"Picked {item.item_name}")
-                else:
+                item = self.pick_item(target_item_name, context)
+                if item is None:
                     raise ValueError(
                         f"Error: {target_item_name} is not in the current state"
                     )
+                logger.info("Picked %s", item.item_name)
                 return self.get_full_state()
             elif action_type == "use":  ###keyLock
-                if (self._current_state in self._transitions) and (
-                    action in self._transitions[self._current_state]
-                ):
-                    next_state, rule = self._transitions[self._current_state][action]
+                if transition is not None:
+                    next_state, rule = transition
                     if rule.evaluate(context):
                         item = self.use_item(target_item_name, context)
-                        self._current_state = next_state
+                        self._move_to(next_state)
                 return self.get_full_state()
             else:
-                if (self._current_state in self._transitions) and (
-                    action in self._transitions[self._current_state]
-                ):
-                    next_state, rule = self._transitions[self._current_state][action]
+                if transition is not None:
+                    next_state, rule = transition
                     if rule.evaluate(context):
-                        self._current_state = next_state
-                context.triggers[action] = True
+                        self._move_to(next_state)
+                context.set_trigger(action)
                 return self.get_full_state()
         else:
-            if (
-                self._current_state in self._transitions
-                and action in self._transitions[self._current_state]
-            ):
-                next_state, rule = self._transitions[self._current_state][action]
+            if transition is not None:
+                next_state, rule = transition
                 if rule.evaluate(context):
-                    self._current_state = next_state
+                    self._move_to(next_state)
 
             return self.get_full_state()
 
@@ -203,24 +300,41 @@ class SequenceReceptacle(Receptacle):
         super().__init__(id, possible_states, initial_state, interactable_states)
         self._correct_sequence = correct_sequence
         self._current_sequence: List[str] = []
+        self._rehash()
 
     def handle_action(self, action: str, context: GameContext) -> str:
         self._current_sequence.append(action)
+        self._rehash()
 
         if self._is_correct_sequence():
-            if (
-                self._current_state in self._transitions
-                and "sequence_complete" in self._transitions[self._current_state]
-            ):
-                next_state, rule = self._transitions[self._current_state][
-                    "sequence_complete"
-                ]
+            transition = self.transition_table.lookup(
+                self._current_state, "sequence_complete"
+            )
+            if transition is not None:
+                next_state, rule = transition
                 if rule.evaluate(context):
-                    self._current_state = next_state
+                    self._move_to(next_state)
                     self.reset_sequence()
 
         return super().handle_action(action, context)
 
+    def get_mutable_state(self) -> tuple:
+        return super().get_mutable_state() + (tuple(self._current_sequence),)
+
+    def _feature_hash(self) -> int:
+        return super()._feature_hash() ^ zobrist_key(
+            "sequence", self._id, tuple(getattr(self, "_current_sequence", ()))
+        )
+
+    def set_mutable_state(self, mutable_state: tuple):
+        self._current_sequence = list(mutable_state[3])
+        super().set_mutable_state(mutable_state)
+
+    def clone(self) -> "SequenceReceptacle":
+        cloned = super().clone()
+        cloned._current_sequence = list(self._current_sequence)
+        return cloned
+
     def _is_correct_sequence(self) -> bool:
         if len(self._current_sequence) < len(self._correct_sequence):
             return False
@@ -230,3 +344,4 @@ class SequenceReceptacle(Receptacle):
 
     def reset_sequence(self):
         self._current_sequence = []
+        self._rehash()
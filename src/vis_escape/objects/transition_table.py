@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from vis_escape.game.core.rules import TransitionRule
+from vis_escape.objects.item import Item
+from vis_escape.objects.items.lock.non_key_lock import NonKeyLock
+
+if TYPE_CHECKING:
+    from vis_escape.objects.receptacle import Receptacle
+
+NO_TRANSITION = -1
+
+
+@dataclass(frozen=True)
+class TransitionTable:
+    """Receptacle transitions compiled to integer ids, built once per room.
+
+    next_state[state_id][action_id] is the target state id (or
+    NO_TRANSITION) and rules[state_id][action_id] the rule guarding it.
+    lock_answers maps a lowercased NonKeyLock answer to its locks and
+    items_by_name maps an interactable item's name to the item, so stepping
+    a receptacle never scans its items or re-walks the transition dicts.
+    """
+
+    states: Tuple[str, ...]
+    actions: Tuple[str, ...]
+    state_ids: Dict[str, int]
+    action_ids: Dict[str, int]
+    next_state: Tuple[Tuple[int, ...], ...]
+    rules: Tuple[Tuple[Optional[TransitionRule], ...], ...]
+    lock_answers: Dict[str, Tuple[NonKeyLock, ...]]
+    items_by_name: Dict[str, Item]
+
+    @classmethod
+    def compile(cls, receptacle: "Receptacle") -> "TransitionTable":
+        transitions = receptacle._transitions
+        states = list(transitions)
+        actions = []
+        for from_state, state_actions in transitions.items():
+            for action, (to_state, _) in state_actions.items():
+                states.append(to_state)
+                actions.append(action)
+        states = tuple(
+            dict.fromkeys(states + sorted(receptacle.get_total_states()))
+        )
+        actions = tuple(dict.fromkeys(actions))
+        state_ids = {state: index for index, state in enumerate(states)}
+        action_ids = {action: index for index, action in enumerate(actions)}
+
+        next_state = [[NO_TRANSITION] * len(actions) for _ in states]
+        rules = [[None] * len(actions) for _ in states]
+        for from_state, state_actions in transitions.items():
+            state_id = state_ids[from_state]
+            for action, (to_state, rule) in state_actions.items():
+                next_state[state_id][action_ids[action]] = state_ids[to_state]
+                rules[state_id][action_ids[action]] = rule
+
+        lock_answers: Dict[str, Tuple[NonKeyLock, ...]] = {}
+        items_by_name: Dict[str, Item] = {}
+        for item in receptacle._initial_interactable_states:
+            if isinstance(item, NonKeyLock):
+                answer = item.answer.lower()
+                lock_answers[answer] = lock_answers.get(answer, ()) + (item,)
+            items_by_name.setdefault(item.item_name, item)
+
+        return cls(
+            states=states,
+            actions=actions,
+            state_ids=state_ids,
+            action_ids=action_ids,
+            next_state=tuple(tuple(row) for row in next_state),
+            rules=tuple(tuple(row) for row in rules),
+            lock_answers=lock_answers,
+            items_by_name=items_by_name,
+        )
+
+    def lookup(self, state: str, action: str) -> Optional[Tuple[str, TransitionRule]]:
+        """Return (to_state, rule) for a transition, or None if undefined."""
+        state_id = self.state_ids.get(state)
+        action_id = self.action_ids.get(action)
+        if state_id is None or action_id is None:
+            return None
+        to_state_id = self.next_state[state_id][action_id]
+        if to_state_id == NO_TRANSITION:
+            return None
+        return self.states[to_state_id], self.rules[state_id][action_id]
+
+    def has_action(self, action: str) -> bool:
+        """True if any state of the receptacle has a transition for action."""
+        return action in self.action_ids
+
+    def to_dict(self) -> dict:
+        return {
+            "states": list(self.states),
+            "actions": list(self.actions),
+            "next_state": [list(row) for row in self.next_state],
+            "rules": [
+                [str(rule) if rule is not None else None for rule in row]
+                for row in self.rules
+            ],
+            "lock_answers": {
+                answer: [lock.item_name for lock in locks]
+                for answer, locks in self.lock_answers.items()
+            },
+            "items": list(self.items_by_name),
+        }
@@ -1,20 +1,5 @@
-import base64
-import io
-import os
-
-import time
-from openai import OpenAI
-from PIL import Image
-
-
-def _encode_image(image_path: str) -> str:
-    with Image.open(image_path) as img:
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG")
-        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+from vis_escape.experiment.agent import inference
+from vis_escape.llm.clients import get_client
 
 
 def run_inference_vision_caption(
@@ -35,48 +20,12 @@ def run_inference_vision_caption(
     Returns:
         Generated caption string
     """
-    base64_image = _encode_image(image_path)
-    
-    # Configure client based on whether base_url is provided
-    if base_url:
-        # vLLM mode
-        client = OpenAI(api_key="EMPTY", base_url=base_url)
-    else:
-        # OpenAI mode
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    
-    # Retry logic (for OpenAI rate limits)
-    while True:
-        try:
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                temperature=0.0
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Error generating caption for {image_path}: {e}")
-            if base_url:
-                # vLLM: fail immediately
-                return f"Failed to generate caption: {str(e)}"
-            else:
-                # OpenAI: retry after delay
-                print("Retrying in 5 seconds...")
-                time.sleep(5)
-                continue
+    # Pooled client: vLLM server if base_url is provided, else the OpenAI API.
+    # The request goes through the shared inference path, so it is answered
+    # from the response cache when possible and retried by the model's
+    # RetryPolicy (see endpoints.yaml).
+    client = get_client(base_url, model_name=model_name)
+    return inference.run_inference_vision_caption(client, image_path, prompt, model_name)
 
 
 # Backward compatibility aliases